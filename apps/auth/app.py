@@ -1,15 +1,22 @@
 from __future__ import annotations
 
+import codecs
+import dataclasses
+import itertools
 import json
 import logging
 from os import environ
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Union
 
-from apps.auth.models import AuthManager
-from flask import Flask, jsonify, request
+import click
+from apps.auth.importer import RenterImporter
+from apps.auth.models import AuthManager, is_service_request_valid
+from apps.common.hashing import HashPoolBusyError, PasswordHasher
+from flask import Flask, Response, jsonify, request, stream_with_context
+from pymysql import OperationalError, ProgrammingError
 
 if TYPE_CHECKING:
-    from werkzeug.wrappers import Response
+    from collections.abc import Iterator
 app = Flask(__name__)
 app.secret_key = environ['SECRET_KEY']
 
@@ -43,10 +50,18 @@ def find_user_handler() -> tuple[Response, int]:
     This endpoint validates the request using Basic Authentication headers.
     If the credentials are valid, the user's details are returned.
 
+    If the password hashing pool is saturated, the request is answered with HTTP 503
+    and a Retry-After header instead of waiting.
+
     Returns:
         tuple[Response, int]: JSON response with user data or error message, and HTTP status code.
     """
-    return jsonify(AuthManager.get_user(request)), 200
+    result = AuthManager.get_user(request)
+    if result["status"] == 503:
+        response = jsonify(result)
+        response.headers["Retry-After"] = "1"
+        return response, 503
+    return jsonify(result), 200
 
 
 @app.route("/register_renter", methods=["POST"])
@@ -63,5 +78,114 @@ def register_handler() -> tuple[Response, int]:
     return jsonify(AuthManager.register_user(request)), 200
 
 
+@app.route("/users/batch", methods=["POST"])
+def users_batch_handler() -> Union[Response, tuple[Response, int]]:
+    """
+    Handle the `/users/batch` endpoint to resolve many users at once.
+
+    Only internal services may call it: the `X-Service-Token` header must match `SERVICE_TOKEN`.
+    The JSON body holds `user_ids` and/or `emails` lists, together at most
+    `AuthManager.MAX_BATCH_USERS` entries. Users and their renter records are read with one
+    query on an unbuffered cursor and written out as they arrive, as a JSON object with
+    `users` and the `missing` user IDs and emails.
+
+    Returns:
+        Union[Response, tuple[Response, int]]: Streamed JSON response, or JSON error message and HTTP status code.
+    """
+    if not is_service_request_valid(request):
+        return jsonify({"status": 401, "message": "Unauthorized"}), 401
+    try:
+        user_ids, email_keys = AuthManager.parse_batch_request(request)
+    except ValueError as error:
+        return jsonify({"status": 400, "message": str(error)}), 200
+    users = AuthManager.find_users(user_ids, email_keys)
+    try:
+        # Run the query before the response starts, so that its errors can still be reported.
+        first_user = next(users, None)
+    except (OperationalError, ProgrammingError) as error:
+        logging.error("Database error in users_batch_handler: %s", error)
+        return jsonify({"status": 500, "message": "Internal Server Error"}), 200
+
+    def generate() -> Iterator[str]:
+        found = []
+        yield '{"status": 200, "message": "OK", "users": ['
+        if first_user is not None:
+            for user in itertools.chain((first_user,), users):
+                yield ("," if found else "") + json.dumps(user, ensure_ascii=False)
+                found.append((user["user_id"], user["email"]))
+        missing = AuthManager.find_missing(user_ids, email_keys, found)
+        yield '], "missing": ' + json.dumps(missing, ensure_ascii=False) + "}"
+
+    return Response(stream_with_context(generate()), mimetype="application/json")
+
+
+@app.route("/renters/import", methods=["POST"])
+def renters_import_handler() -> Union[Response, tuple[Response, int]]:
+    """
+    Handle the `/renters/import` endpoint to register renters in bulk from a CSV body.
+
+    Only internal services may call it: the `X-Service-Token` header must match `SERVICE_TOKEN`.
+    The CSV is read from the request body while it arrives and imported in chunks, see
+    `RenterImporter`. The response is streamed as newline-delimited JSON: one object per
+    skipped row with its line, email and error, and a final object with the totals.
+
+    Returns:
+        Union[Response, tuple[Response, int]]: Streamed NDJSON response, or JSON error message and HTTP status code.
+    """
+    if not is_service_request_valid(request):
+        return jsonify({"status": 401, "message": "Unauthorized"}), 401
+    try:
+        chunk_size = int(request.args.get("chunk_size", RenterImporter.CHUNK_SIZE))
+    except ValueError:
+        return jsonify({"status": 400, "message": "Invalid chunk size"}), 200
+    importer = RenterImporter(app.config["db_config"], chunk_size=max(1, chunk_size))
+    failures = importer.run(codecs.iterdecode(request.stream, "utf-8-sig"))
+
+    def generate() -> Iterator[str]:
+        try:
+            for failure in failures:
+                yield json.dumps(dataclasses.asdict(failure), ensure_ascii=False) + "\n"
+        except ValueError as error:
+            yield json.dumps({"status": 400, "message": str(error)}) + "\n"
+            return
+        except HashPoolBusyError as error:
+            logging.warning("Renter import stopped: %s", error)
+            yield json.dumps({"status": 503, "message": "Service Unavailable", "imported": importer.imported}) + "\n"
+            return
+        except Exception as error:
+            logging.error("Renter import failed: %s", error)
+            yield json.dumps({"status": 500, "message": "Internal Server Error"}) + "\n"
+            return
+        yield json.dumps({"status": 200, "imported": importer.imported, "failed": importer.failed}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+@app.cli.command("import-renters")
+@click.argument("csv_file", type=click.File("r", encoding="utf-8-sig"))
+@click.option("--chunk-size", default=RenterImporter.CHUNK_SIZE, show_default=True, help="Rows per transaction.")
+def import_renters_command(csv_file: click.utils.LazyFile, chunk_size: int) -> None:
+    """Register renters in bulk from CSV_FILE, printing every skipped row."""
+    importer = RenterImporter(app.config["db_config"], chunk_size=chunk_size)
+    for failure in importer.run(csv_file):
+        click.echo(f"line {failure.line}: {failure.email}: {failure.error}", err=True)
+    click.echo(f"Imported {importer.imported} renters, skipped {importer.failed} rows.")
+
+
+@app.route("/stats", methods=["GET"])
+def stats_handler() -> tuple[Response, int]:
+    """
+    Handle the `/stats` endpoint with timings of the password hashing pool.
+
+    The counters belong to the worker process that serves the request.
+
+    Returns:
+        tuple[Response, int]: JSON with calls, rejections, queue and compute time per operation, and HTTP status code.
+    """
+    return jsonify({
+        operation: dataclasses.asdict(stats) for operation, stats in PasswordHasher.get_stats().items()
+    }), 200
+
+
 if __name__ == "__main__":
     app.run()
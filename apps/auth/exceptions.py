@@ -1,2 +1,6 @@
 class UserNotFoundError(Exception):
-    pass
\ No newline at end of file
+    pass
+
+
+class UserAlreadyExistsError(Exception):
+    pass
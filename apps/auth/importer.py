@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import csv
+import logging
+from dataclasses import dataclass
+from itertools import islice
+from os import environ
+from typing import Any, Iterable, Iterator, Optional
+
+from apps.auth.models import User, normalize_email
+from apps.common.database.base_model import BaseModel
+from apps.common.database.sql_provider import SQLProvider
+from apps.common.hashing import PasswordHasher
+from apps.common.meta import MetaSQL
+from pymysql import IntegrityError
+from pymysql.constants.ER import DUP_ENTRY as ER_DUP_ENTRY
+from pymysql.converters import escape_item
+
+REQUIRED_COLUMNS = (
+    "email",
+    "password",
+    "first_name",
+    "last_name",
+    "phone_number",
+    "renter_address",
+    "business_sphere",
+)
+
+
+@dataclass
+class ImportFailure:
+    """
+    A CSV row that was not imported.
+
+    Attributes:
+        line (int): Line number of the row in the CSV file, the header being line 1.
+        email (str): Email of the row, as given.
+        error (str): Reason the row was skipped.
+    """
+
+    line: int
+    email: str
+    error: str
+
+
+class RenterImporter(BaseModel, metaclass=MetaSQL):
+    """
+    Registers renters in bulk from a CSV file with a header of `REQUIRED_COLUMNS`.
+
+    The file is read in chunks of `chunk_size` rows. In every chunk, rows with missing
+    fields or an email already used by an earlier row or an existing user are reported and
+    skipped; passwords of the remaining rows are hashed on the shared `PasswordHasher` pool; and
+    users and renters are inserted with one multi-row INSERT each inside one transaction.
+    If the transaction fails because of a concurrent registration, the chunk is retried
+    row by row, so a failing row never aborts the import.
+
+    Args:
+        db_config (dict[str, Any]): Database configuration of the auth service.
+        chunk_size (int): Rows inserted per transaction.
+
+    Attributes:
+        imported (int): Renters registered so far.
+        failed (int): Rows skipped so far.
+    """
+    sql_provider: SQLProvider
+
+    CHUNK_SIZE = int(environ.get("RENTER_IMPORT_CHUNK_SIZE", 500))
+
+    def __init__(self, db_config: dict[str, Any], chunk_size: int = CHUNK_SIZE):
+        self.db_config = db_config
+        self.chunk_size = chunk_size
+        self.imported = 0
+        self.failed = 0
+        self._seen: set[str] = set()
+
+    def run(self, csv_lines: Iterable[str]) -> Iterator[ImportFailure]:
+        """
+        Imports every row of a CSV file, yielding the rows that could not be imported.
+
+        Args:
+            csv_lines (Iterable[str]): Lines of the CSV file, read lazily.
+
+        Yields:
+            ImportFailure: Every skipped row, as soon as its chunk is processed.
+
+        Raises:
+            ValueError: If the header lacks required columns.
+            OperationalError: If the database is unavailable.
+            HashPoolBusyError: If the hashing pool is saturated.
+        """
+        reader = csv.DictReader(csv_lines)
+        missing_columns = set(REQUIRED_COLUMNS) - set(reader.fieldnames or ())
+        if missing_columns:
+            raise ValueError(f"Missing CSV columns: {', '.join(sorted(missing_columns))}")
+
+        rows = enumerate(reader, start=2)
+        while chunk := list(islice(rows, self.chunk_size)):
+            yield from self._import_chunk(chunk)
+        # Emails that were unknown a moment ago may be registered now.
+        User.missing_cache.invalidate()
+        logging.info("Renter import finished: %d imported, %d failed", self.imported, self.failed)
+
+    def _import_chunk(self, chunk: list[tuple[int, dict[str, Optional[str]]]]) -> Iterator[ImportFailure]:
+        valid: list[tuple[int, str, dict[str, str]]] = []
+        for line, row in chunk:
+            values = {column: (row.get(column) or "").strip() for column in REQUIRED_COLUMNS}
+            empty = [column for column in REQUIRED_COLUMNS if not values[column]]
+            email_key = normalize_email(values["email"])
+            if empty:
+                yield self._fail(line, values["email"], f"Missing fields: {', '.join(empty)}")
+            elif email_key in self._seen:
+                yield self._fail(line, values["email"], "Duplicate email in the file")
+            else:
+                self._seen.add(email_key)
+                valid.append((line, email_key, values))
+        if not valid:
+            return
+
+        existing = {email_key for _, email_key in self._get_user_ids([email_key for _, email_key, _ in valid])}
+        for line, email_key, values in valid:
+            if email_key in existing:
+                yield self._fail(line, values["email"], "User with the same email already exists")
+        valid = [entry for entry in valid if entry[1] not in existing]
+        if not valid:
+            return
+
+        hashes = PasswordHasher.hash_many([values["password"] for _, _, values in valid])
+        for (_, _, values), password_hash in zip(valid, hashes):
+            values["password"] = password_hash
+
+        try:
+            self._insert(valid)
+            self.imported += len(valid)
+        except IntegrityError as error:
+            if error.args[0] != ER_DUP_ENTRY:
+                raise
+            logging.warning("Renter import chunk hit a duplicate email, retrying it row by row")
+            for entry in valid:
+                try:
+                    self._insert([entry])
+                    self.imported += 1
+                except IntegrityError as row_error:
+                    if row_error.args[0] != ER_DUP_ENTRY:
+                        raise
+                    yield self._fail(entry[0], entry[2]["email"], "User with the same email already exists")
+
+    def _insert(self, entries: list[tuple[int, str, dict[str, str]]]) -> None:
+        """Inserts users and their renters with one multi-row INSERT per table in one transaction."""
+        with self.transaction(self.db_config) as cursor:
+            self.insert_many(
+                self.sql_provider.get("add_users_batch.sql"),
+                self.db_config,
+                [(values["email"], values["password"], "renter") for _, _, values in entries],
+                cursor=cursor,
+            )
+            user_ids = {
+                email_key: user_id
+                for user_id, email_key in self._get_user_ids([email_key for _, email_key, _ in entries], cursor)
+            }
+            self.insert_many(
+                self.sql_provider.get("add_renters_batch.sql"),
+                self.db_config,
+                [
+                    (
+                        values["first_name"],
+                        values["last_name"],
+                        values["phone_number"],
+                        values["renter_address"],
+                        values["business_sphere"],
+                        user_ids[email_key],
+                    )
+                    for _, email_key, values in entries
+                ],
+                cursor=cursor,
+            )
+
+    def _get_user_ids(self, email_keys: list[str], cursor: Any = None) -> tuple[tuple[int, str], ...]:
+        return self.fetch_all(
+            self.sql_provider.get(
+                "get_user_ids_by_email_keys.sql",
+                email_keys=", ".join(escape_item(email_key, "utf8mb4") for email_key in email_keys),
+            ),
+            self.db_config,
+            cursor,
+        )
+
+    def _fail(self, line: int, email: str, error: str) -> ImportFailure:
+        self.failed += 1
+        return ImportFailure(line, email, error)
@@ -1,16 +1,26 @@
 from __future__ import annotations
 
+import hmac
 import logging
 from base64 import b64decode
-from typing import Optional, Union
+from os import environ
+from typing import TYPE_CHECKING, Any, Optional, Union
 
-from apps.auth.exceptions import UserNotFoundError
+from apps.auth.exceptions import UserAlreadyExistsError, UserNotFoundError
+from apps.common.cache import TTLCache
 from apps.common.database.base_model import BaseModel
 from apps.common.database.sql_provider import SQLProvider
+from apps.common.hashing import HashPoolBusyError, PasswordHasher
 from apps.common.meta import MetaSQL
 from flask import Request, current_app
-from pymysql import ProgrammingError
-from werkzeug.security import check_password_hash
+from pymysql import IntegrityError, ProgrammingError
+from pymysql.constants.ER import DUP_ENTRY as ER_DUP_ENTRY
+from pymysql.converters import escape_item
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+RENTER_FIELDS = ("renter_id", "first_name", "last_name", "phone_number", "renter_address", "business_sphere")
 
 
 def is_auth_request_valid(api_request: Request) -> bool:
@@ -29,6 +39,37 @@ def is_auth_request_valid(api_request: Request) -> bool:
     return True
 
 
+def is_service_request_valid(api_request: Request) -> bool:
+    """
+    Checks that the request carries the credential shared by the internal services.
+
+    The `X-Service-Token` header must match the `SERVICE_TOKEN` environment variable.
+    Without `SERVICE_TOKEN` no request is accepted.
+
+    Args:
+        api_request (Request): The incoming Flask request object.
+
+    Returns:
+        bool: True if the service token is configured and matches, False otherwise.
+    """
+    token: str = environ.get("SERVICE_TOKEN", "")
+    supplied: str = api_request.headers.get("X-Service-Token", "")
+    return bool(token) and hmac.compare_digest(supplied.encode(), token.encode())
+
+
+def normalize_email(email: str) -> str:
+    """
+    Builds the lookup key of an email, matching the generated `users.email_key` column.
+
+    Args:
+        email (str): Email address as entered by the user.
+
+    Returns:
+        str: The email without surrounding spaces, in lower case.
+    """
+    return email.strip().lower()
+
+
 def decode_basic_authorization(api_request: Request) -> tuple[str, str]:
     """
     Decodes the Basic Authorization header and extracts the username and password.
@@ -68,8 +109,18 @@ class User(BaseModel, metaclass=MetaSQL):
         role (str): Role assigned to the user.
         email (str): User's email address.
         password (str): Hashed password of the user.
+        found_cache (TTLCache): Users found by email key, kept for a short time.
+        missing_cache (TTLCache): Email keys without a user, kept for an even shorter time.
     """
     sql_provider: SQLProvider
+    found_cache = TTLCache(
+        max_size=int(environ.get("USER_CACHE_SIZE", 1024)),
+        ttl=float(environ.get("USER_CACHE_TTL", 30)),
+    )
+    missing_cache = TTLCache(
+        max_size=int(environ.get("USER_CACHE_SIZE", 1024)),
+        ttl=float(environ.get("USER_NEGATIVE_CACHE_TTL", 5)),
+    )
 
     def __init__(self, user_id: int, role: str, email: str, password: str):
         self.user_id = user_id
@@ -102,7 +153,11 @@ class User(BaseModel, metaclass=MetaSQL):
     @classmethod
     def get_by_email(cls, email: str) -> Optional[User]:
         """
-        Fetches a user by their email address.
+        Fetches a user by their email address, ignoring case and surrounding spaces.
+
+        The lookup goes through the unique index on `users.email_key`. Found users and
+        unknown emails are cached per worker for a few seconds, so repeated logins and
+        retries do not reach the database.
 
         Args:
             email (str): The email address of the user to retrieve.
@@ -113,10 +168,17 @@ class User(BaseModel, metaclass=MetaSQL):
         Raises:
             UserNotFoundError: If no user with the provided email exists.
         """
-        result = cls.fetch_one(
-            cls.sql_provider.get("get_user_by_email.sql", email=email),
-            current_app.config["db_config"],
-        )
+        email_key = normalize_email(email)
+        result = cls.found_cache.get(email_key)
+        if result is None and cls.missing_cache.get(email_key) is None:
+            result = cls.fetch_one(
+                cls.sql_provider.get("get_user_by_email.sql", email_key=email_key),
+                current_app.config["db_config"],
+            )
+            if result:
+                cls.found_cache.set(email_key, result)
+            else:
+                cls.missing_cache.set(email_key, True)
         if result:
             return User(*result)  # type: ignore
         raise UserNotFoundError("Could not find user by email.")
@@ -126,6 +188,9 @@ class User(BaseModel, metaclass=MetaSQL):
         """
         Creates a new renter user in the database.
 
+        The user and the renter are inserted in one transaction; a duplicate email is
+        rejected by the unique index on `users.email_key`, so no separate lookup is needed.
+
         Args:
             role (str): Role of the user (currently supported only renter).
             email (str): Email address of the user.
@@ -137,6 +202,7 @@ class User(BaseModel, metaclass=MetaSQL):
 
         Raises:
             NotImplementedError: If the role is not 'renter'.
+            UserAlreadyExistsError: If a user with the same email exists.
         """
         if role != "renter":
             raise NotImplementedError("Other roles except renter are have not been implemented yet.")
@@ -146,7 +212,7 @@ class User(BaseModel, metaclass=MetaSQL):
                     cls.sql_provider.get(
                         "add_user.sql",
                         role=role,
-                        email=email,
+                        email=email.strip(),
                         password=password,
                         cursor=cursor,
                     ),
@@ -159,7 +225,13 @@ class User(BaseModel, metaclass=MetaSQL):
                     current_app.config["db_config"],
                     cursor=cursor,
                 )
+            cls.missing_cache.invalidate(normalize_email(email))
             return True
+        except IntegrityError as error:
+            if error.args[0] == ER_DUP_ENTRY:
+                raise UserAlreadyExistsError("User with the same email already exists.") from error
+            current_app.logger.error(f"Database error during renter creation: {error}")
+            return False
         except ProgrammingError as error:
             current_app.logger.error(f"Database error during renter creation: {error}")
             return False
@@ -168,17 +240,29 @@ class User(BaseModel, metaclass=MetaSQL):
         """
         Checks whether the provided password hash matches the user's stored hashed password.
 
+        The check runs on the password hashing pool, so it does not hold the request thread's CPU.
+
         Args:
             password_hash (str): The plain text password to verify.
 
         Returns:
             bool: True if the password matches, False otherwise.
+
+        Raises:
+            HashPoolBusyError: If the hashing pool is saturated.
         """
-        return check_password_hash(self.password, password_hash)
+        return PasswordHasher.verify(self.password, password_hash)
 
 
 class AuthManager(BaseModel, metaclass=MetaSQL):
-    """Handles authentication-related operations such as user retrieval and registration."""
+    """
+    Handles authentication-related operations such as user retrieval and registration.
+
+    Attributes:
+        MAX_BATCH_USERS (int): Most user IDs and emails one batch lookup may contain.
+    """
+    sql_provider: SQLProvider
+    MAX_BATCH_USERS = int(environ.get("USERS_BATCH_LIMIT", 500))
 
     @classmethod
     def get_user(cls, request: Request) -> dict[str, Union[int, str]]:
@@ -212,6 +296,9 @@ class AuthManager(BaseModel, metaclass=MetaSQL):
         except UserNotFoundError as error:
             logging.warning("User not found: %s", error)
             return {"status": 404, "message": "User not found"}
+        except HashPoolBusyError as error:
+            logging.warning("Password check rejected: %s", error)
+            return {"status": 503, "message": "Service Unavailable"}
         except ProgrammingError as error:
             logging.error("Database error in find_user_handler: %s", error)
             return {"status": 500, "message": "Internal Server Error"}
@@ -246,24 +333,111 @@ class AuthManager(BaseModel, metaclass=MetaSQL):
                 "message": f"Missing required fields: {', '.join(missing_fields)}",
             }
         try:
-            User.get_by_email(data["email"])
+            created = User.create_renter(
+                role="renter",
+                email=data["email"],
+                password=data["password"],
+                first_name=data["first_name"],
+                last_name=data["last_name"],
+                phone_number=data["phone_number"],
+                renter_address=data["renter_address"],
+                business_sphere=data["business_sphere"],
+            )
+            if created:
+                return {"status": 201, "message": "User created successfully"}
+            else:
+                return {"status": 500, "message": "Failed to create user"}
+        except UserAlreadyExistsError:
             return {"status": 409, "message": "User with the same email already exists"}
-        except UserNotFoundError:
-            try:
-                created = User.create_renter(
-                    role="renter",
-                    email=data["email"],
-                    password=data["password"],
-                    first_name=data["first_name"],
-                    last_name=data["last_name"],
-                    phone_number=data["phone_number"],
-                    renter_address=data["renter_address"],
-                    business_sphere=data["business_sphere"],
-                )
-                if created:
-                    return {"status": 201, "message": "User created successfully"}
-                else:
-                    return {"status": 500, "message": "Failed to create user"}
-            except Exception as error:
-                logging.error("Error during user creation: %s", error)
-                return {"status": 500, "message": "Internal Server Error"}
+        except Exception as error:
+            logging.error("Error during user creation: %s", error)
+            return {"status": 500, "message": "Internal Server Error"}
+
+    @classmethod
+    def parse_batch_request(cls, request: Request) -> tuple[list[int], list[str]]:
+        """
+        Extracts the user IDs and emails of a batch lookup from a JSON body.
+
+        Args:
+            request (Request): The HTTP request with `user_ids` and/or `emails` lists in JSON format.
+
+        Returns:
+            tuple[list[int], list[str]]: Distinct user IDs and normalized emails, in request order.
+
+        Raises:
+            ValueError: If the lists are missing, malformed or longer than `MAX_BATCH_USERS` together.
+        """
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            raise ValueError("Expected a JSON object with 'user_ids' and/or 'emails'.")
+        user_ids, emails = data.get("user_ids", []), data.get("emails", [])
+        if not isinstance(user_ids, list) or not isinstance(emails, list) or not user_ids and not emails:
+            raise ValueError("Expected a JSON object with 'user_ids' and/or 'emails'.")
+        if len(user_ids) + len(emails) > cls.MAX_BATCH_USERS:
+            raise ValueError(f"At most {cls.MAX_BATCH_USERS} users can be looked up at once.")
+        if not all(isinstance(user_id, int) and not isinstance(user_id, bool) for user_id in user_ids):
+            raise ValueError("'user_ids' must contain integers.")
+        if not all(isinstance(email, str) for email in emails):
+            raise ValueError("'emails' must contain strings.")
+        return list(dict.fromkeys(user_ids)), list(dict.fromkeys(normalize_email(email) for email in emails))
+
+    @classmethod
+    def find_users(cls, user_ids: list[int], email_keys: list[str]) -> Iterator[dict[str, Any]]:
+        """
+        Streams many users with their renter records from one query.
+
+        Rows are read from an unbuffered server-side cursor, so the users are not held in memory.
+        The query runs when the first user is requested.
+
+        Args:
+            user_ids (list[int]): IDs of the users to find.
+            email_keys (list[str]): Normalized emails of the users to find.
+
+        Yields:
+            dict[str, Any]: Found users with their renter record or None, ordered by user ID.
+
+        Raises:
+            OperationalError: If no connection is available.
+            ProgrammingError: If the query fails.
+        """
+        rows = cls.stream(
+            cls.sql_provider.get(
+                "get_users_batch.sql",
+                user_ids=", ".join(str(user_id) for user_id in user_ids) or "null",
+                email_keys=", ".join(escape_item(email_key, "utf8mb4") for email_key in email_keys) or "null",
+            ),
+            current_app.config["db_config"],
+        )
+        previous_user_id = None
+        for user_id, role, email, *renter in rows:
+            if user_id == previous_user_id:
+                continue
+            previous_user_id = user_id
+            yield {
+                "user_id": user_id,
+                "role": role,
+                "email": email,
+                "renter": dict(zip(RENTER_FIELDS, renter)) if renter[0] is not None else None,
+            }
+
+    @staticmethod
+    def find_missing(
+            user_ids: list[int], email_keys: list[str], found: list[tuple[int, str]]
+    ) -> dict[str, list[Union[int, str]]]:
+        """
+        Lists the requested user IDs and emails that matched none of the found users.
+
+        Args:
+            user_ids (list[int]): IDs of the requested users.
+            email_keys (list[str]): Normalized emails of the requested users.
+            found (list[tuple[int, str]]): ID and email of every found user.
+
+        Returns:
+            dict[str, list[Union[int, str]]]: The unmatched `user_ids` and `emails`.
+        """
+        found_ids = {user_id for user_id, _ in found}
+        found_keys = {normalize_email(email) for _, email in found}
+        return {
+            "user_ids": [user_id for user_id in user_ids if user_id not in found_ids],
+            "emails": [email_key for email_key in email_keys if email_key not in found_keys],
+        }
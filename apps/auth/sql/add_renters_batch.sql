@@ -0,0 +1,2 @@
+insert into advertising.renters (first_name, last_name, phone_number, renter_address, business_sphere, user_id)
+values (%s, %s, %s, %s, %s, %s);
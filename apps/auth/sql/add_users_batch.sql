@@ -0,0 +1,2 @@
+insert into advertising.users (email, password, role)
+values (%s, %s, %s);
@@ -1,3 +1,3 @@
 select user_id, role, email, password
 from advertising.users
-where email = "$email";
\ No newline at end of file
+where email_key = "$email_key";
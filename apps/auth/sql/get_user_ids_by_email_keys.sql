@@ -0,0 +1,3 @@
+select user_id, email_key
+from advertising.users
+where email_key in ($email_keys);
@@ -0,0 +1,7 @@
+select u.user_id, u.role, u.email,
+       r.renter_id, r.first_name, r.last_name, r.phone_number, r.renter_address, r.business_sphere
+from advertising.users u
+         left join advertising.renters r on r.user_id = u.user_id
+where u.user_id in ($user_ids)
+   or u.email_key in ($email_keys)
+order by u.user_id;
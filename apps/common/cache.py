@@ -0,0 +1,204 @@
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+
+class SharedVersion:
+    """
+    A version counter shared by every worker process on the host through a file.
+
+    The version is the modification time of the file, so reading it is a single ``stat``
+    call, and it is re-read at most once per ``poll_interval`` seconds.
+
+    Args:
+        name (str): Name of the counter, used as the file name.
+        poll_interval (float): Minimum number of seconds between two reads of the file.
+    """
+
+    def __init__(self, name: str, poll_interval: float = 1.0):
+        self.path = os.path.join(
+            os.environ.get("CACHE_VERSION_DIR", tempfile.gettempdir()),
+            f"advertising_{name}.version",
+        )
+        self.poll_interval = poll_interval
+        self._version = 0
+        self._checked_at: Optional[float] = None
+
+    def get(self) -> int:
+        """
+        Returns the current version.
+
+        Returns:
+            int: The version, or 0 if the counter has never been bumped.
+        """
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at >= self.poll_interval:
+            self._version = self._read()
+            self._checked_at = now
+        return self._version
+
+    def bump(self) -> None:
+        """Increments the version, so every process sees it on its next poll."""
+        version = max(time.time_ns(), self._read() + 1)
+        with open(self.path, "a"):
+            os.utime(self.path, ns=(version, version))
+        self._version = version
+        self._checked_at = time.monotonic()
+
+    def _read(self) -> int:
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+
+@dataclass
+class CacheStats:
+    """
+    Snapshot of cache usage.
+
+    Attributes:
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups that found no fresh entry.
+        evictions (int): Entries dropped to respect the size limit.
+        expirations (int): Entries dropped because their TTL passed.
+        invalidations (int): Times the whole cache was cleared.
+        size (int): Number of entries currently stored.
+    """
+
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    invalidations: int
+    size: int
+
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    A thread-safe, size-bounded LRU cache with per-entry TTL.
+
+    If a shared version is given, the whole cache is cleared whenever the version
+    changes, which lets one process invalidate the caches of all workers.
+
+    Args:
+        max_size (int): Maximum number of entries.
+        ttl (float): Seconds an entry stays fresh.
+        version (Optional[SharedVersion]): Version counter that invalidates the cache on change.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 60.0, version: Optional[SharedVersion] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.version = version
+        self._entries: OrderedDict[Hashable, Tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._seen_version = version.get() if version else 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Returns a fresh cached value.
+
+        Args:
+            key (Hashable): Cache key.
+            default (Any): Value returned on a miss.
+
+        Returns:
+            Any: The cached value, or ``default`` if there is no fresh entry.
+        """
+        self._check_version()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                self._expirations += 1
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Stores a value, evicting the least recently used entries if the cache is full.
+
+        Args:
+            key (Hashable): Cache key.
+            value (Any): Value to store.
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Returns a cached value, loading and storing it on a miss.
+
+        Args:
+            key (Hashable): Cache key.
+            loader (Callable[[], Any]): Function producing the value on a miss.
+
+        Returns:
+            Any: The cached or freshly loaded value.
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """
+        Drops one entry, or the whole cache if no key is given.
+
+        Args:
+            key (Optional[Hashable]): Cache key to drop.
+        """
+        with self._lock:
+            if key is not None:
+                self._entries.pop(key, None)
+                return
+            self._entries.clear()
+            self._invalidations += 1
+
+    def stats(self) -> CacheStats:
+        """
+        Returns a snapshot of the cache usage.
+
+        Returns:
+            CacheStats: Current statistics of the cache.
+        """
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                expirations=self._expirations,
+                invalidations=self._invalidations,
+                size=len(self._entries),
+            )
+
+    def _check_version(self) -> None:
+        if self.version is None:
+            return
+        version = self.version.get()
+        if version != self._seen_version:
+            self._seen_version = version
+            self.invalidate()
@@ -1,10 +1,11 @@
 from contextlib import contextmanager
-from typing import Any, Generator, Optional, Union
+from typing import Any, Generator, Iterator, Optional, Sequence, Union
 
-from pymysql import OperationalError, connect
+from pymysql import InterfaceError, OperationalError
 from pymysql.connections import Connection
-from pymysql.cursors import Cursor
+from pymysql.cursors import Cursor, SSCursor
 
+from .connection_pool import ConnectionPool
 from .db_manager import DBContextManager
 
 
@@ -33,8 +34,6 @@ class BaseModel:
             cursor.execute(query)
             return cursor
         with DBContextManager(db_config) as context_cursor:
-            if context_cursor is None:
-                raise OperationalError("Failed to create a database cursor.")
             context_cursor.execute(query)
             return context_cursor
 
@@ -52,6 +51,9 @@ class BaseModel:
 
         Returns:
             tuple[tuple[str, ...], ...]: A tuple of rows fetched from the database.
+
+        Raises:
+            OperationalError: If the query fails or no connection is available.
         """
         cursor = cls.execute_query(query, db_config, cursor)
         return cursor.fetchall()
@@ -70,10 +72,50 @@ class BaseModel:
 
         Returns:
             Optional[tuple[str, ...]]: A single row fetched from the database, or None if no result.
+
+        Raises:
+            OperationalError: If the query fails or no connection is available.
         """
         cursor = cls.execute_query(query, db_config, cursor)
         return cursor.fetchone()
 
+    @classmethod
+    def stream(
+            cls, query: str, db_config: dict[str, Any], batch_size: int = 1000
+    ) -> Iterator[tuple[Any, ...]]:
+        """
+        Yields the rows of a SQL query as they arrive from the server.
+
+        The query runs on an unbuffered server-side cursor, so only ``batch_size`` rows are
+        held in memory at a time. The connection is checked out when iteration starts and
+        released when the generator is exhausted or closed.
+
+        Args:
+            query (str): SQL query to stream results of.
+            db_config (dict[str, Any]): Database configuration.
+            batch_size (int): Number of rows read from the socket at once.
+
+        Yields:
+            tuple[Any, ...]: Rows of the result.
+
+        Raises:
+            OperationalError: If the query fails or no connection is available.
+        """
+        pool = ConnectionPool.for_config(db_config)
+        connection: Connection[Cursor] = pool.acquire()
+        cursor: SSCursor = connection.cursor(SSCursor)
+        finished = False
+        try:
+            cursor.execute(query)
+            while rows := cursor.fetchmany(batch_size):
+                yield from rows
+            cursor.close()
+            finished = True
+        finally:
+            # Closing an unfinished unbuffered cursor would read the rest of the result,
+            # so an abandoned stream drops its connection instead.
+            pool.release(connection, discard=not finished)
+
     @classmethod
     def insert(
             cls, query: str, db_config: dict[str, Any], cursor: Optional[Cursor] = None
@@ -92,6 +134,39 @@ class BaseModel:
         cursor = cls.execute_query(query, db_config, cursor)
         return cursor.lastrowid
 
+    @classmethod
+    def insert_many(
+            cls,
+            query: str,
+            db_config: dict[str, Any],
+            rows: Sequence[Sequence[Any]],
+            cursor: Optional[Cursor] = None,
+    ) -> int:
+        """
+        Inserts several records with a single multi-row INSERT statement.
+
+        The query must use ``%s`` placeholders in its VALUES clause, which pymysql
+        expands into one statement for all rows.
+
+        Args:
+            query (str): Parametrized SQL query to insert new records.
+            db_config (dict[str, Any]): Database configuration.
+            rows (Sequence[Sequence[Any]]): Values for every inserted row.
+            cursor (Optional[Cursor], optional): Reusable database cursor. Defaults to None.
+
+        Returns:
+            int: The number of inserted rows.
+
+        Raises:
+            OperationalError: If the insert fails or the cursor cannot be created.
+        """
+        if not rows:
+            return 0
+        if cursor:
+            return cursor.executemany(query, rows)
+        with DBContextManager(db_config) as context_cursor:
+            return context_cursor.executemany(query, rows)
+
     @classmethod
     def call_procedure(
             cls,
@@ -119,8 +194,6 @@ class BaseModel:
             cursor.callproc(procedure_name, params)
             return cursor.fetchall()
         with DBContextManager(db_config) as context_cursor:
-            if context_cursor is None:
-                raise OperationalError("Failed to create a database cursor.")
             context_cursor.callproc(procedure_name, params)
             return context_cursor.fetchall()
 
@@ -128,7 +201,7 @@ class BaseModel:
     @contextmanager
     def transaction(cls, db_config: dict[str, Any]) -> Generator[Cursor, None, None]:
         """
-        Manages a database transaction.
+        Manages a database transaction on a pooled connection.
 
         Args:
             db_config (dict[str, Any]): Database configuration.
@@ -139,15 +212,23 @@ class BaseModel:
         Raises:
             Exception: Rolls back the transaction in case of any error.
         """
-        connection: Connection[Cursor] = connect(**db_config)
+        pool = ConnectionPool.for_config(db_config)
+        connection: Connection[Cursor] = pool.acquire()
         cursor: Cursor = connection.cursor()
+        broken = False
         try:
             yield cursor
             connection.commit()
         except Exception as e:
-            connection.rollback()
+            broken = isinstance(e, (OperationalError, InterfaceError))
+            try:
+                connection.rollback()
+            except (OperationalError, InterfaceError):
+                broken = True
             raise e
         finally:
-            cursor.close()
-            connection.close()
+            try:
+                cursor.close()
+            finally:
+                pool.release(connection, discard=broken)
 
@@ -0,0 +1,311 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, ClassVar, Optional
+
+from pymysql import connect
+from pymysql.connections import Connection
+from pymysql.err import Error, OperationalError
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeoutError(OperationalError):
+    """Raised when no connection becomes available within the checkout timeout."""
+
+
+@dataclass
+class PoolStats:
+    """
+    Snapshot of connection pool usage.
+
+    Attributes:
+        in_use (int): Connections currently checked out.
+        idle (int): Connections waiting in the pool.
+        created (int): Connections opened since the pool was created.
+        discarded (int): Connections closed because they were broken, too old or idle for too long.
+        waits (int): Checkouts that had to wait for a free connection.
+        total_wait_time (float): Total time in seconds spent waiting for a free connection.
+        max_wait_time (float): Longest single wait in seconds.
+    """
+
+    in_use: int
+    idle: int
+    created: int
+    discarded: int
+    waits: int
+    total_wait_time: float
+    max_wait_time: float
+
+
+class _PooledConnection:
+    """A connection together with the timestamps the pool needs to expire it."""
+
+    __slots__ = ("connection", "created_at", "last_used")
+
+    def __init__(self, connection: Connection[Any]):
+        self.connection = connection
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class ConnectionPool:
+    """
+    A bounded, thread-safe pool of pymysql connections for a single database configuration.
+
+    Pools are shared per process and keyed by the database configuration, so every role
+    from ``db_config.json`` gets its own pool. Connections are validated on checkout,
+    recycled after ``max_lifetime`` seconds and dropped after ``max_idle_time`` seconds
+    of inactivity. Connections inherited through ``fork`` are never reused by the child.
+
+    Args:
+        db_config (dict[str, Any]): Keyword arguments for ``pymysql.connect``.
+        max_size (int): Maximum number of open connections.
+        timeout (float): Seconds to wait for a free connection before giving up.
+        max_lifetime (float): Seconds after which a connection is recycled.
+        max_idle_time (float): Seconds after which an idle connection is closed.
+        ping_interval (float): Idle seconds after which a connection is pinged before reuse.
+    """
+
+    MAX_SIZE: ClassVar[int] = int(os.environ.get("DB_POOL_MAX_SIZE", 8))
+    TIMEOUT: ClassVar[float] = float(os.environ.get("DB_POOL_TIMEOUT", 10))
+    MAX_LIFETIME: ClassVar[float] = float(os.environ.get("DB_POOL_MAX_LIFETIME", 1800))
+    MAX_IDLE_TIME: ClassVar[float] = float(os.environ.get("DB_POOL_MAX_IDLE_TIME", 300))
+    PING_INTERVAL: ClassVar[float] = float(os.environ.get("DB_POOL_PING_INTERVAL", 30))
+
+    _pools: ClassVar[dict[tuple[tuple[str, Any], ...], ConnectionPool]] = {}
+    _pools_lock: ClassVar[threading.Lock] = threading.Lock()
+
+    def __init__(
+            self,
+            db_config: dict[str, Any],
+            max_size: int = MAX_SIZE,
+            timeout: float = TIMEOUT,
+            max_lifetime: float = MAX_LIFETIME,
+            max_idle_time: float = MAX_IDLE_TIME,
+            ping_interval: float = PING_INTERVAL,
+    ):
+        self.db_config = dict(db_config)
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.max_idle_time = max_idle_time
+        self.ping_interval = ping_interval
+
+        self._cond = threading.Condition()
+        self._idle: list[_PooledConnection] = []
+        self._in_use: dict[int, _PooledConnection] = {}
+        self._size = 0
+        self._pid = os.getpid()
+
+        self._created = 0
+        self._discarded = 0
+        self._waits = 0
+        self._total_wait_time = 0.0
+        self._max_wait_time = 0.0
+
+    @classmethod
+    def for_config(cls, db_config: dict[str, Any]) -> ConnectionPool:
+        """
+        Returns the process-wide pool for the given database configuration, creating it if needed.
+
+        Args:
+            db_config (dict[str, Any]): Database configuration.
+
+        Returns:
+            ConnectionPool: The pool serving this configuration.
+        """
+        key = tuple(sorted(db_config.items()))
+        pool = cls._pools.get(key)
+        if pool is None:
+            with cls._pools_lock:
+                pool = cls._pools.get(key)
+                if pool is None:
+                    pool = cls._pools[key] = cls(db_config)
+        return pool
+
+    @classmethod
+    def get_all_stats(cls) -> dict[str, PoolStats]:
+        """
+        Returns usage statistics for every pool in the current process.
+
+        Returns:
+            dict[str, PoolStats]: Statistics keyed by ``user@host/database``.
+        """
+        return {pool.name: pool.stats() for pool in list(cls._pools.values())}
+
+    @classmethod
+    def reset_all(cls) -> None:
+        """Drops every pooled connection without closing sockets shared with a parent process."""
+        cls._pools_lock = threading.Lock()
+        for pool in list(cls._pools.values()):
+            pool._reset_after_fork()
+
+    @property
+    def name(self) -> str:
+        return (
+            f"{self.db_config.get('user')}@{self.db_config.get('host')}"
+            f"/{self.db_config.get('database')}"
+        )
+
+    def acquire(self) -> Connection[Any]:
+        """
+        Checks a connection out of the pool.
+
+        Returns:
+            Connection: A live connection that must be handed back with ``release``.
+
+        Raises:
+            PoolTimeoutError: If the pool is exhausted for longer than ``timeout`` seconds.
+            OperationalError: If a new connection cannot be established.
+        """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            entry = self._take_or_reserve(deadline)
+            if entry is None:
+                entry = self._open()
+            elif not self._is_healthy(entry):
+                self._discard(entry)
+                continue
+            with self._cond:
+                self._in_use[id(entry.connection)] = entry
+            return entry.connection
+
+    def release(self, connection: Connection[Any], discard: bool = False) -> None:
+        """
+        Returns a connection to the pool.
+
+        Args:
+            connection (Connection): A connection previously obtained from ``acquire``.
+            discard (bool): Close the connection instead of reusing it, e.g. after a network error.
+        """
+        with self._cond:
+            entry = self._in_use.pop(id(connection), None)
+            if entry is None:
+                # Checked out before a fork or by another pool; never reuse it here.
+                return
+            entry.last_used = time.monotonic()
+            if not discard and connection.open and not self._is_expired(entry, entry.last_used):
+                self._idle.append(entry)
+                self._cond.notify()
+                return
+        self._discard(entry)
+
+    def stats(self) -> PoolStats:
+        """
+        Returns a snapshot of the pool usage.
+
+        Returns:
+            PoolStats: Current statistics of the pool.
+        """
+        with self._cond:
+            return PoolStats(
+                in_use=len(self._in_use),
+                idle=len(self._idle),
+                created=self._created,
+                discarded=self._discarded,
+                waits=self._waits,
+                total_wait_time=self._total_wait_time,
+                max_wait_time=self._max_wait_time,
+            )
+
+    def _take_or_reserve(self, deadline: float) -> Optional[_PooledConnection]:
+        """Pops an idle connection or reserves a slot for a new one, waiting while the pool is full."""
+        if self._pid != os.getpid():
+            self._reset_after_fork()
+        with self._cond:
+            started = time.monotonic()
+            waited = False
+            try:
+                while True:
+                    now = time.monotonic()
+                    while self._idle:
+                        entry = self._idle.pop()
+                        if not self._is_expired(entry, now):
+                            return entry
+                        self._size -= 1
+                        self._discarded += 1
+                        self._close(entry.connection)
+                    if self._size < self.max_size:
+                        self._size += 1
+                        return None
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        raise PoolTimeoutError(
+                            0, f"Timed out waiting for a connection from pool {self.name}."
+                        )
+                    waited = True
+                    self._cond.wait(remaining)
+            finally:
+                if waited:
+                    wait_time = time.monotonic() - started
+                    self._waits += 1
+                    self._total_wait_time += wait_time
+                    self._max_wait_time = max(self._max_wait_time, wait_time)
+
+    def _open(self) -> _PooledConnection:
+        """Opens a new connection into a slot reserved by ``_take_or_reserve``."""
+        try:
+            connection = connect(**self.db_config)
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._created += 1
+        return _PooledConnection(connection)
+
+    def _is_expired(self, entry: _PooledConnection, now: float) -> bool:
+        return (
+                now - entry.created_at > self.max_lifetime
+                or now - entry.last_used > self.max_idle_time
+        )
+
+    def _is_healthy(self, entry: _PooledConnection) -> bool:
+        """Pings connections that have been idle long enough for the server to drop them."""
+        if time.monotonic() - entry.last_used < self.ping_interval:
+            return entry.connection.open
+        try:
+            entry.connection.ping(reconnect=False)
+            return True
+        except Error as e:
+            logger.warning(f"Dropping broken pooled connection for {self.name}: {e}")
+            return False
+
+    def _discard(self, entry: _PooledConnection) -> None:
+        with self._cond:
+            self._size -= 1
+            self._discarded += 1
+            self._cond.notify()
+        self._close(entry.connection)
+
+    @staticmethod
+    def _close(connection: Connection[Any]) -> None:
+        try:
+            connection.close()
+        except Error:
+            connection._force_close()
+
+    def _reset_after_fork(self) -> None:
+        """
+        Forgets connections inherited from the parent, closing only the local socket copies.
+
+        The lock is replaced rather than acquired, since another thread of the parent
+        may have held it at the moment of the fork.
+        """
+        for entry in [*self._idle, *self._in_use.values()]:
+            entry.connection._force_close()
+        self._cond = threading.Condition()
+        self._idle = []
+        self._in_use = {}
+        self._size = 0
+        self._pid = os.getpid()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=ConnectionPool.reset_all)
@@ -1,10 +1,11 @@
 import logging
 from types import TracebackType
-from typing import Any, Optional, Type
+from typing import Optional, Type
 
 import pymysql
-from pymysql import connect
-from pymysql.err import OperationalError
+from pymysql.err import InterfaceError, OperationalError
+
+from .connection_pool import ConnectionPool
 
 logger = logging.getLogger(__name__)
 
@@ -13,57 +14,62 @@ class DBContextManager:
     """
     A context manager for managing database connections.
 
-    Handles opening and closing the connection and cursor automatically.
+    Checks a connection out of the per-configuration pool and hands it back automatically.
 
     Args:
         db_config (dict): Database configuration.
     """
 
     def __init__(self, db_config: dict[str, str]):
-        self.connector: pymysql.connections.Connection[Any] | None = None
+        self.connector: pymysql.connections.Connection[pymysql.cursors.Cursor] | None = None
         self.cursor: pymysql.cursors.Cursor | None = None
         self.db_config: dict[str, str] = db_config
+        self.pool: ConnectionPool = ConnectionPool.for_config(db_config)
 
-    def __enter__(self) -> pymysql.cursors.Cursor | None:
+    def __enter__(self) -> pymysql.cursors.Cursor:
         """
-        Establishes a database connection and returns a cursor for executing queries.
+        Takes a pooled database connection and returns a cursor for executing queries.
 
-        The method attempts to establish a connection to the database using the provided configuration.
+        The method attempts to check out a connection for the provided configuration.
 
         Returns:
-            pymysql.cursors.Cursor or None
+            pymysql.cursors.Cursor
+
+        Raises:
+            OperationalError: If no connection is available or the cursor cannot be created.
         """
         try:
-            self.connector = connect(
-                host=self.db_config['host'],
-                user=self.db_config['user'],
-                password=self.db_config['password'],
-                database=self.db_config['database']
-            )
-            # if self.connector is None:
-            #     raise OperationalError("Couldn't establish a database connection.")
+            self.connector = self.pool.acquire()
             self.cursor = self.connector.cursor()
             return self.cursor
         except OperationalError as e:
             logger.error(f"Error code: {e.args[0]}, Error description: {e.args[1]}")
-            return None
+            if self.connector is not None:
+                self.pool.release(self.connector, discard=True)
+                self.connector = None
+            raise
 
     def __exit__(self, exc_type: Optional[Type[BaseException]], exc: Optional[BaseException],
                  traceback: Optional[TracebackType]) -> Optional[bool]:
         """
-        Exit method to close the cursor and connection and handle exceptions.
+        Exit method to close the cursor, return the connection to the pool and handle exceptions.
 
-        If an exception occurred, the transaction is rolled back; otherwise, it's committed.
+        If an exception occurred, the transaction is rolled back and the exception is passed on
+        to the caller; otherwise, it's committed. Connections that failed on the network level
+        are discarded instead of being reused.
         """
         if self.cursor and self.connector:
-            if exc_type:
-                self.connector.rollback()
-            else:
-                self.connector.commit()
-            self.cursor.close()
-            self.connector.close()
-
-        # if exc_type:
-        #     raise OperationalError(exc_type, exc, traceback)
+            broken = isinstance(exc, (OperationalError, InterfaceError))
+            try:
+                if exc_type:
+                    self.connector.rollback()
+                else:
+                    self.connector.commit()
+                self.cursor.close()
+            except (OperationalError, InterfaceError) as e:
+                logger.error(f"Failed to finish pooled connection: {e}")
+                broken = True
+            finally:
+                self.pool.release(self.connector, discard=broken)
 
-        return True
+        return False
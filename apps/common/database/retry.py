@@ -0,0 +1,55 @@
+import logging
+import random
+import time
+from collections.abc import Callable
+from functools import wraps
+from typing import Any, TypeVar
+
+from pymysql.err import OperationalError
+
+logger = logging.getLogger(__name__)
+
+RetType = TypeVar("RetType")
+
+# ER_LOCK_WAIT_TIMEOUT and ER_LOCK_DEADLOCK: the transaction was rolled back and may be retried.
+LOCK_CONFLICT_ERRORS = frozenset({1205, 1213})
+
+
+def retry_on_lock_conflict(
+        attempts: int = 4, base_delay: float = 0.05, max_delay: float = 1.0
+) -> Callable[[Callable[..., RetType]], Callable[..., RetType]]:
+    """Decorator that reruns a transactional function after a lock wait timeout or a deadlock.
+
+    The wrapped function must open and finish its own transaction, so every attempt starts
+    from scratch. Delays grow exponentially with full jitter and are capped by ``max_delay``.
+
+    Args:
+        attempts (int): Maximum number of attempts, including the first one.
+        base_delay (float): Delay in seconds before the first retry.
+        max_delay (float): Upper bound for a single delay in seconds.
+
+    Returns:
+        Callable: The decorator.
+    """
+
+    def decorator(func: Callable[..., RetType]) -> Callable[..., RetType]:
+        @wraps(func)
+        def wrap(*args: Any, **kwargs: Any) -> RetType:
+            attempt = 1
+            while True:
+                try:
+                    return func(*args, **kwargs)
+                except OperationalError as e:
+                    if e.args[0] not in LOCK_CONFLICT_ERRORS or attempt >= attempts:
+                        raise
+                    delay = random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+                    logger.warning(
+                        f"Lock conflict in {func.__qualname__} (error {e.args[0]}), "
+                        f"retry {attempt}/{attempts - 1} in {delay:.3f}s"
+                    )
+                    time.sleep(delay)
+                    attempt += 1
+
+        return wrap
+
+    return decorator
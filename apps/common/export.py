@@ -0,0 +1,100 @@
+import csv
+import io
+import json
+from typing import Any, Callable, Dict, Iterable, Iterator, Sequence, Tuple
+
+from flask import Response
+
+CHUNK_SIZE = 64 * 1024
+
+
+def iter_csv(column_names: Sequence[str], rows: Iterable[Sequence[Any]]) -> Iterator[str]:
+    """
+    Formats rows as CSV with a header line, yielding chunks of about `CHUNK_SIZE` characters.
+
+    Arguments:
+        column_names (Sequence[str]): Names written to the header line.
+        rows (Iterable[Sequence[Any]]): Rows to format, consumed lazily.
+
+    Returns:
+        Iterator[str]: Chunks of the CSV document.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(column_names)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def iter_ndjson(column_names: Sequence[str], rows: Iterable[Sequence[Any]]) -> Iterator[str]:
+    """
+    Formats rows as newline-delimited JSON objects, yielding chunks of about `CHUNK_SIZE` characters.
+
+    Arguments:
+        column_names (Sequence[str]): Keys of every object.
+        rows (Iterable[Sequence[Any]]): Rows to format, consumed lazily.
+
+    Returns:
+        Iterator[str]: Chunks of the NDJSON document.
+    """
+    lines = []
+    size = 0
+    for row in rows:
+        line = json.dumps(dict(zip(column_names, row)), ensure_ascii=False, default=str)
+        lines.append(line)
+        size += len(line) + 1
+        if size >= CHUNK_SIZE:
+            yield "\n".join(lines) + "\n"
+            lines, size = [], 0
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+EXPORT_FORMATS: Dict[str, Tuple[Callable[[Sequence[str], Iterable[Sequence[Any]]], Iterator[str]], str]] = {
+    "csv": (iter_csv, "text/csv"),
+    "ndjson": (iter_ndjson, "application/x-ndjson"),
+}
+
+
+def export_response(
+        column_names: Sequence[str], rows: Iterable[Sequence[Any]], export_format: str, filename: str
+) -> Response:
+    """
+    Builds a streamed download of rows.
+
+    Rows are formatted while the response is sent, so the first chunk goes out as soon as
+    the first rows are read and memory use does not depend on the number of rows.
+
+    Arguments:
+        column_names (Sequence[str]): Column names of the rows.
+        rows (Iterable[Sequence[Any]]): Rows to export, consumed lazily.
+        export_format (str): Either "csv" or "ndjson".
+        filename (str): Download file name without extension.
+
+    Returns:
+        Response: Chunked response with the formatted rows.
+
+    Raises:
+        ValueError: If the format is not supported.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: '{export_format}'")
+    formatter, mimetype = EXPORT_FORMATS[export_format]
+    response = Response(
+        formatter(column_names, rows),
+        mimetype=mimetype,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}.{export_format}"',
+            # Keeps reverse proxies from buffering the whole export before passing it on.
+            "X-Accel-Buffering": "no",
+        },
+    )
+    if hasattr(rows, "close"):
+        # Releases the database connection right away if the client disconnects mid-download.
+        response.call_on_close(rows.close)
+    return response
@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import dataclasses
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, ClassVar, Optional
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+logger = logging.getLogger(__name__)
+
+
+class HashPoolBusyError(Exception):
+    """Raised when the hashing pool has too many queued calls or a call does not finish in time."""
+
+
+@dataclasses.dataclass
+class HashStats:
+    """
+    Snapshot of hashing pool usage for one operation.
+
+    Attributes:
+        calls (int): Calls completed by the pool.
+        rejected (int): Calls refused because the queue was full or that timed out.
+        in_flight (int): Calls currently queued or running.
+        total_queue_time (float): Total seconds calls waited for a free pool process.
+        total_compute_time (float): Total seconds spent hashing in pool processes.
+        max_latency (float): Longest time in seconds from submission to result.
+    """
+
+    calls: int
+    rejected: int
+    in_flight: int
+    total_queue_time: float
+    total_compute_time: float
+    max_latency: float
+
+
+def _timed(function: Callable[..., Any], *args: Any) -> tuple[Any, float]:
+    """Runs a function in a pool process and returns its result with the time it took."""
+    started = time.perf_counter()
+    return function(*args), time.perf_counter() - started
+
+
+class PasswordHasher:
+    """
+    Runs password hashing and verification on a bounded pool of processes.
+
+    The key derivation functions are deliberately slow, so running them in the request
+    thread holds a worker for the whole computation. Calls are handed to `WORKERS`
+    processes instead; at most `QUEUE_LIMIT` calls may be queued or running per worker
+    process, and further calls are refused with `HashPoolBusyError` right away, so callers
+    can answer 503 instead of piling up. The pool is created on first use in every process
+    and is never shared with a forked child.
+
+    Attributes:
+        WORKERS (int): Number of hashing processes.
+        QUEUE_LIMIT (int): Calls that may be queued or running at once.
+        TIMEOUT (float): Seconds to wait for the result of a call.
+    """
+
+    WORKERS: ClassVar[int] = int(os.environ.get("HASH_WORKERS", 2))
+    QUEUE_LIMIT: ClassVar[int] = int(os.environ.get("HASH_QUEUE_LIMIT", 16))
+    TIMEOUT: ClassVar[float] = float(os.environ.get("HASH_TIMEOUT", 10))
+
+    _executor: ClassVar[Optional[ProcessPoolExecutor]] = None
+    _lock: ClassVar[threading.Lock] = threading.Lock()
+    _in_flight: ClassVar[int] = 0
+    _stats: ClassVar[dict[str, HashStats]] = {}
+
+    @classmethod
+    def hash(cls, password: str) -> str:
+        """
+        Hashes a password with the default method of `generate_password_hash`.
+
+        Args:
+            password (str): The plain text password.
+
+        Returns:
+            str: The password hash.
+
+        Raises:
+            HashPoolBusyError: If the pool is saturated or the call timed out.
+        """
+        return cls._run("hash", generate_password_hash, password)
+
+    @classmethod
+    def hash_many(cls, passwords: list[str]) -> list[str]:
+        """
+        Hashes many passwords, keeping at most `WORKERS` of them in the pool at once.
+
+        Every password takes a queue slot like a single call, so a bulk import is bounded by
+        `QUEUE_LIMIT` and leaves the other slots to logins and registrations.
+
+        Args:
+            passwords (list[str]): The plain text passwords.
+
+        Returns:
+            list[str]: The password hashes, in the order of `passwords`.
+
+        Raises:
+            HashPoolBusyError: If the pool is saturated or a call timed out.
+        """
+        hashes: list[str] = []
+        pending: deque[tuple[Future[Any], HashStats, float]] = deque()
+        try:
+            for password in passwords:
+                if len(pending) >= cls.WORKERS:
+                    hashes.append(cls._result("hash", *pending.popleft()))
+                pending.append(cls._submit("hash", generate_password_hash, password))
+            while pending:
+                hashes.append(cls._result("hash", *pending.popleft()))
+        finally:
+            for future, _, _ in pending:
+                future.cancel()
+        return hashes
+
+    @classmethod
+    def verify(cls, password_hash: str, password: str) -> bool:
+        """
+        Checks a password against a hash produced by `generate_password_hash`.
+
+        Args:
+            password_hash (str): The stored password hash.
+            password (str): The plain text password to verify.
+
+        Returns:
+            bool: True if the password matches.
+
+        Raises:
+            HashPoolBusyError: If the pool is saturated or the call timed out.
+        """
+        return cls._run("verify", check_password_hash, password_hash, password)
+
+    @classmethod
+    def get_stats(cls) -> dict[str, HashStats]:
+        """
+        Returns usage statistics of the pool in the current process.
+
+        Returns:
+            dict[str, HashStats]: Statistics keyed by operation, "hash" or "verify".
+        """
+        with cls._lock:
+            return {
+                operation: dataclasses.replace(stats, in_flight=cls._in_flight)
+                for operation, stats in cls._stats.items()
+            }
+
+    @classmethod
+    def _run(cls, operation: str, function: Callable[..., Any], *args: Any) -> Any:
+        return cls._result(operation, *cls._submit(operation, function, *args))
+
+    @classmethod
+    def _submit(
+            cls, operation: str, function: Callable[..., Any], *args: Any
+    ) -> tuple[Future[Any], HashStats, float]:
+        """Takes a queue slot and hands a call to the pool, returning its future, stats and start time."""
+        with cls._lock:
+            stats = cls._stats.setdefault(operation, HashStats(0, 0, 0, 0.0, 0.0, 0.0))
+            if cls._in_flight >= cls.QUEUE_LIMIT:
+                stats.rejected += 1
+                raise HashPoolBusyError(f"Too many pending password {operation} calls")
+            cls._in_flight += 1
+        started = time.perf_counter()
+        try:
+            future = cls._get_executor().submit(_timed, function, *args)
+        except BrokenProcessPool as e:
+            cls._release()
+            cls._drop_pool(stats)
+            raise HashPoolBusyError(f"Password {operation} pool failed") from e
+        except BaseException:
+            cls._release()
+            raise
+        # The slot is freed when the pool is done with the call, not when the caller gives
+        # up on it: a call that is already running cannot be cancelled and keeps its process.
+        future.add_done_callback(cls._release)
+        return future, stats, started
+
+    @classmethod
+    def _result(cls, operation: str, future: Future[Any], stats: HashStats, started: float) -> Any:
+        """Waits for a call handed to the pool and records its timings."""
+        try:
+            result, compute_time = future.result(timeout=cls.TIMEOUT)
+        except FutureTimeoutError:
+            future.cancel()
+            with cls._lock:
+                stats.rejected += 1
+            raise HashPoolBusyError(f"Password {operation} timed out")
+        except BrokenProcessPool as e:
+            cls._drop_pool(stats)
+            raise HashPoolBusyError(f"Password {operation} pool failed") from e
+        latency = time.perf_counter() - started
+        with cls._lock:
+            stats.calls += 1
+            stats.total_queue_time += latency - compute_time
+            stats.total_compute_time += compute_time
+            stats.max_latency = max(stats.max_latency, latency)
+        return result
+
+    @classmethod
+    def _release(cls, future: Optional[Future[Any]] = None) -> None:
+        """Frees the queue slot of a call."""
+        with cls._lock:
+            cls._in_flight -= 1
+
+    @classmethod
+    def _drop_pool(cls, stats: HashStats) -> None:
+        """Forgets a pool whose process died; the next call starts a new pool."""
+        with cls._lock:
+            cls._executor = None
+            stats.rejected += 1
+
+    @classmethod
+    def _get_executor(cls) -> ProcessPoolExecutor:
+        if cls._executor is None:
+            with cls._lock:
+                if cls._executor is None:
+                    # Spawned processes do not inherit the threads and locks of a threaded worker.
+                    cls._executor = ProcessPoolExecutor(
+                        max_workers=cls.WORKERS, mp_context=multiprocessing.get_context("spawn")
+                    )
+                    logger.info(f"Started password hashing pool with {cls.WORKERS} processes")
+        return cls._executor
+
+    @classmethod
+    def _reset_after_fork(cls) -> None:
+        """Drops the pool inherited from the parent, whose processes belong to the parent."""
+        cls._executor = None
+        cls._lock = threading.Lock()
+        cls._in_flight = 0
+        cls._stats = {}
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=PasswordHasher._reset_after_fork)
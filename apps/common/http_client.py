@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, ClassVar, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of sending a request while the circuit breaker of a service is open."""
+
+
+class CircuitBreaker:
+    """
+    Stops calls to a failing service for a while, so callers fail fast instead of waiting for timeouts.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and every call is
+    refused for ``reset_timeout`` seconds. Then a single trial call is let through: its
+    success closes the circuit, its failure opens it again.
+
+    Args:
+        failure_threshold (int): Consecutive failures that open the circuit.
+        reset_timeout (float): Seconds the circuit stays open before a trial call.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_running = False
+        self._trial_thread: Optional[int] = None
+
+    @property
+    def state(self) -> str:
+        """One of "closed", "open" and "half-open"."""
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            return "open" if time.monotonic() - self._opened_at < self.reset_timeout else "half-open"
+
+    def allow(self) -> bool:
+        """
+        Decides whether a call may be made now.
+
+        Returns:
+            bool: True if the circuit is closed or this call is the trial of a half-open circuit.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_running:
+                return False
+            self._trial_running = True
+            self._trial_thread = threading.get_ident()
+            return True
+
+    def release(self) -> None:
+        """
+        Ends the trial call of the current thread if it finished without a recorded outcome.
+
+        Calls that raise something other than a request error, e.g. an interrupt, record
+        neither success nor failure, so without this the circuit would never admit another trial.
+        """
+        with self._lock:
+            if self._trial_running and self._trial_thread == threading.get_ident():
+                self._trial_running = False
+
+    def record_success(self) -> None:
+        """Closes the circuit after a successful call."""
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        """Counts a failed call, opening the circuit once the threshold is reached."""
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class HttpClient:
+    """
+    A keep-alive HTTP client for calls to one internal service.
+
+    Clients are shared per process and keyed by the base URL. Each one reuses pooled
+    connections of a ``requests.Session``, bounds every call with connect and read timeouts,
+    retries idempotent calls after connection errors, timeouts and 502/503/504 responses
+    with exponential backoff and full jitter, and fails fast through a circuit breaker while
+    the service is down. A 503 with ``Retry-After`` is the service shedding load, so it is
+    returned as is and does not count against the breaker. Connections inherited through ``fork`` are never reused by the child.
+
+    Args:
+        base_url (str): URL prefix of the service.
+        connect_timeout (float): Seconds to wait for a connection.
+        read_timeout (float): Seconds to wait for the response.
+        retries (int): Additional attempts of an idempotent call.
+        pool_size (int): Maximum number of kept-alive connections.
+        breaker (Optional[CircuitBreaker]): Circuit breaker of the service.
+    """
+
+    CONNECT_TIMEOUT: ClassVar[float] = float(os.environ.get("HTTP_CONNECT_TIMEOUT", 2))
+    READ_TIMEOUT: ClassVar[float] = float(os.environ.get("HTTP_READ_TIMEOUT", 5))
+    RETRIES: ClassVar[int] = int(os.environ.get("HTTP_RETRIES", 2))
+    POOL_SIZE: ClassVar[int] = int(os.environ.get("HTTP_POOL_SIZE", 10))
+    BREAKER_THRESHOLD: ClassVar[int] = int(os.environ.get("HTTP_BREAKER_THRESHOLD", 5))
+    BREAKER_RESET_TIMEOUT: ClassVar[float] = float(os.environ.get("HTTP_BREAKER_RESET_TIMEOUT", 30))
+    BACKOFF_BASE: ClassVar[float] = 0.1
+    BACKOFF_MAX: ClassVar[float] = 1.0
+    IDEMPOTENT_METHODS: ClassVar[frozenset[str]] = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+    RETRY_STATUSES: ClassVar[frozenset[int]] = frozenset({502, 503, 504})
+
+    _clients: ClassVar[dict[str, HttpClient]] = {}
+    _clients_lock: ClassVar[threading.Lock] = threading.Lock()
+
+    def __init__(
+            self,
+            base_url: str,
+            connect_timeout: float = CONNECT_TIMEOUT,
+            read_timeout: float = READ_TIMEOUT,
+            retries: int = RETRIES,
+            pool_size: int = POOL_SIZE,
+            breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.pool_size = pool_size
+        self.breaker = breaker or CircuitBreaker(self.BREAKER_THRESHOLD, self.BREAKER_RESET_TIMEOUT)
+        self._session = self._new_session()
+
+    @classmethod
+    def for_base_url(cls, base_url: str) -> HttpClient:
+        """
+        Returns the process-wide client for a service, creating it if needed.
+
+        Args:
+            base_url (str): URL prefix of the service.
+
+        Returns:
+            HttpClient: The client of this service.
+        """
+        client = cls._clients.get(base_url)
+        if client is None:
+            with cls._clients_lock:
+                client = cls._clients.get(base_url)
+                if client is None:
+                    client = cls._clients[base_url] = cls(base_url)
+        return client
+
+    @classmethod
+    def reset_all(cls) -> None:
+        """Replaces the sessions of every client without closing sockets shared with a parent process."""
+        cls._clients_lock = threading.Lock()
+        for client in list(cls._clients.values()):
+            client._session = client._new_session()
+            client.breaker = CircuitBreaker(client.breaker.failure_threshold, client.breaker.reset_timeout)
+
+    def request(self, method: str, path: str, **kwargs: Any) -> requests.Response:
+        """
+        Sends a request to the service.
+
+        Args:
+            method (str): HTTP method.
+            path (str): Path relative to the base URL.
+            **kwargs (Any): Further arguments of ``requests.Session.request``, e.g. headers or json.
+
+        Returns:
+            requests.Response: The response of the last attempt.
+
+        Raises:
+            CircuitOpenError: If the service is considered down.
+            requests.RequestException: If the last attempt failed.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"Circuit to {self.base_url} is open")
+        kwargs.setdefault("timeout", self.timeout)
+        attempts = 1 + (self.retries if method.upper() in self.IDEMPOTENT_METHODS else 0)
+        url = f"{self.base_url}/{path.lstrip('/')}"
+
+        attempt = 1
+        try:
+            while True:
+                try:
+                    response = self._session.request(method, url, **kwargs)
+                except requests.RequestException as e:
+                    if not isinstance(e, (requests.ConnectionError, requests.Timeout)) or attempt >= attempts:
+                        self.breaker.record_failure()
+                        raise
+                    reason = type(e).__name__
+                else:
+                    if response.status_code == 503 and "Retry-After" in response.headers:
+                        # The service is up and sheds load; retrying at once would only add to it.
+                        self.breaker.record_success()
+                        return response
+                    if response.status_code not in self.RETRY_STATUSES or attempt >= attempts:
+                        if response.status_code >= 500:
+                            self.breaker.record_failure()
+                        else:
+                            self.breaker.record_success()
+                        return response
+                    reason = f"status {response.status_code}"
+                    response.close()
+                delay = random.uniform(0, min(self.BACKOFF_MAX, self.BACKOFF_BASE * 2 ** (attempt - 1)))
+                logger.warning(
+                    f"{method.upper()} {url} failed ({reason}), retry {attempt}/{attempts - 1} in {delay:.3f}s"
+                )
+                time.sleep(delay)
+                attempt += 1
+        finally:
+            self.breaker.release()
+
+    def _new_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=HttpClient.reset_all)
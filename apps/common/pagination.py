@@ -0,0 +1,65 @@
+import base64
+import json
+from decimal import Decimal, InvalidOperation
+from os import environ
+from typing import Any, Optional, Sequence, Tuple
+
+DEFAULT_PAGE_SIZE = int(environ.get("PAGE_SIZE", 50))
+MAX_PAGE_SIZE = int(environ.get("MAX_PAGE_SIZE", 200))
+# Largest row count MySQL accepts in LIMIT, used to read every row with a paginated query.
+NO_LIMIT = 18446744073709551615
+
+
+def clamp_page_size(page_size: Optional[int]) -> int:
+    """
+    Bounds a requested page size.
+
+    Arguments:
+        page_size (Optional[int]): Requested number of rows per page, or None for the default.
+
+    Returns:
+        int: Page size between 1 and `MAX_PAGE_SIZE`.
+    """
+    if page_size is None:
+        return DEFAULT_PAGE_SIZE
+    return min(max(page_size, 1), MAX_PAGE_SIZE)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    Encodes the sort key of the last row of a page into a URL-safe cursor token.
+
+    Arguments:
+        values (Sequence[Any]): Numeric sort key values, most significant first.
+
+    Returns:
+        str: Cursor token for the next page.
+    """
+    payload = json.dumps([str(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, length: int) -> Tuple[Decimal, ...]:
+    """
+    Decodes a cursor token produced by `encode_cursor`.
+
+    Only numbers are accepted, so decoded values are safe to put into SQL templates.
+
+    Arguments:
+        token (str): Cursor token from the URL.
+        length (int): Expected number of sort key values.
+
+    Returns:
+        Tuple[Decimal, ...]: Sort key values of the last row of the previous page.
+
+    Raises:
+        ValueError: If the token is malformed.
+    """
+    try:
+        payload = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = tuple(Decimal(value) for value in json.loads(payload))
+    except (ValueError, TypeError, InvalidOperation):
+        raise ValueError("Invalid page cursor.")
+    if len(values) != length or not all(value.is_finite() for value in values):
+        raise ValueError("Invalid page cursor.")
+    return values
@@ -0,0 +1,9 @@
+from blinker import Namespace
+
+_signals = Namespace()
+
+# Sent by checkout after an order is committed, with the keyword arguments `order_id`,
+# `registration_date`, `renter_id`, `renter_name`, `business_sphere` and `rows`, the
+# (billboard_id, billboard_address, price) of every order row. Blueprints that keep data
+# derived from orders subscribe to it instead of being called by the renter blueprint.
+order_placed = _signals.signal("order-placed")
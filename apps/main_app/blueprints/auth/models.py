@@ -1,20 +1,23 @@
-import json
 from base64 import b64encode
 from os import environ
 from typing import Any, Optional, Tuple
 
 import requests
+from apps.common.http_client import CircuitOpenError, HttpClient
 from flask import session
 
 
 def process_api_response(
-        method: str, url: str, **kwargs: Any) -> Tuple[Optional[dict[str, str]], Optional[str]]:
+        method: str, path: str, **kwargs: Any) -> Tuple[Optional[dict[str, str]], Optional[str]]:
     """
-    Helper function to process API responses.
+    Helper function to call the authorization service and process its response.
+
+    Calls go through the shared keep-alive client of `AUTH_URL`, so they reuse pooled
+    connections, are bounded by timeouts and fail fast while the service is down.
 
     Args:
         method (str): HTTP method ('get' or 'post').
-        url (str): API endpoint URL.
+        path (str): API endpoint path relative to `AUTH_URL`.
         kwargs: Additional arguments for the request (e.g., headers, json).
 
     Returns:
@@ -23,13 +26,15 @@ def process_api_response(
             - Error message if the request failed, or None if successful.
     """
     try:
-        response = requests.request(method, url, **kwargs)
+        response = HttpClient.for_base_url(environ["AUTH_URL"]).request(method, path, **kwargs)
         if response.status_code != 200:
             return None, "Try again later"
-        result = json.loads(response.text)
+        result = response.json()
         if result.get("status") != 200:
             return None, result.get("message", "Unknown error")
         return result, None
+    except CircuitOpenError:
+        return None, "Authorization is temporarily unavailable. Please try again later."
     except requests.RequestException:
         return None, "An error occurred. Please try again later."
 
@@ -59,7 +64,7 @@ def authenticate_user(email: str, password: str) -> bool:
 
     result, error = process_api_response(
         method="get",
-        url=f"{environ['AUTH_URL']}/find_user",
+        path="/find_user",
         headers={"Authorization": auth_header},
     )
 
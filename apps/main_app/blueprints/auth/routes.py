@@ -1,10 +1,10 @@
 from __future__ import annotations
 
-from os import environ
+import dataclasses
 from typing import Union
 
-from flask import redirect, render_template, request
-from werkzeug.security import generate_password_hash
+from apps.common.hashing import HashPoolBusyError, PasswordHasher
+from flask import jsonify, redirect, render_template, request
 from werkzeug.wrappers import Response
 
 from .blueprint import auth_app
@@ -54,17 +54,25 @@ def auth_register_get_handler() -> str:
 
 
 @auth_app.route("/register", methods=["POST"])
-def auth_register_post_handler() -> str:
+def auth_register_post_handler() -> Union[str, tuple[str, int]]:
     """
     Handles POST requests for user registration.
 
+    The password is hashed on the password hashing pool; if the pool is saturated,
+    the registration page is returned with HTTP 503.
+
     Returns:
-        str: Rendered HTML of the successful registration page,
+        Union[str, tuple[str, int]]: Rendered HTML of the successful registration page,
         or the registration page with an error.
     """
+    try:
+        password_hash = PasswordHasher.hash(request.form["password"])
+    except HashPoolBusyError:
+        return render_template("registration.html", error="Server is busy. Please try again in a moment."), 503
+
     data = {
         "email": request.form["email"],
-        "password": generate_password_hash(request.form["password"]),
+        "password": password_hash,
         "first_name": request.form["first_name"],
         "last_name": request.form["last_name"],
         "phone_number": request.form["phone_number"],
@@ -73,7 +81,7 @@ def auth_register_post_handler() -> str:
     }
 
     result, error = process_api_response(
-        method="post", url=f"{environ['AUTH_URL']}/register_renter", json=data
+        method="post", path="/register_renter", json=data
     )
 
     if not result:
@@ -92,3 +100,19 @@ def auth_logout_handler() -> Response:
     """
     SessionManager.clear_session()
     return redirect("/")
+
+
+@auth_app.route("/stats", methods=["GET"])
+def auth_stats_handler() -> Response:
+    """
+    Handles GET requests for the password hashing pool statistics of registrations.
+
+    The counters belong to the worker process that serves the request. Logins are
+    verified by the auth service, which serves its own counters at `/stats`.
+
+    Returns:
+        Response: JSON with calls, rejections, queue and compute time per operation.
+    """
+    return jsonify({
+        operation: dataclasses.asdict(stats) for operation, stats in PasswordHasher.get_stats().items()
+    })
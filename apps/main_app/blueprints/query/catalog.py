@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from os import environ
+from typing import Any, ClassVar, Dict, List, Optional, Sequence, Tuple
+
+from apps.common.database.base_model import BaseModel
+from apps.common.database.sql_provider import SQLProvider
+from apps.common.meta import MetaSQL
+from flask import current_app, session
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - the catalog is optional
+    np = None
+
+logger = logging.getLogger(__name__)
+
+
+class ColumnarSnapshot:
+    """
+    Billboard catalog held as NumPy column arrays sorted by billboard ID.
+
+    Filters are answered with vectorized boolean masks instead of a database round trip.
+    Cities are dictionary-encoded, so a city filter is an integer comparison.
+
+    Args:
+        rows (Sequence[Sequence[Any]]): Rows of (billboard_id, price_per_month, size,
+            billboard_address, quality, city).
+    """
+
+    def __init__(self, rows: Sequence[Sequence[Any]] = ()):
+        self.city_codes: Dict[str, int] = {}
+        self.ids = np.empty(0, dtype=np.int64)
+        self.price = np.empty(0, dtype=np.float64)
+        self.size = np.empty(0, dtype=np.float64)
+        self.quality = np.empty(0, dtype=np.float64)
+        self.city = np.empty(0, dtype=np.int32)
+        self.address = np.empty(0, dtype=object)
+        self.upsert(rows)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def upsert(self, rows: Sequence[Sequence[Any]]) -> None:
+        """
+        Inserts new billboards and overwrites existing ones.
+
+        Args:
+            rows (Sequence[Sequence[Any]]): Rows of (billboard_id, price_per_month, size,
+                billboard_address, quality, city).
+        """
+        if not rows:
+            return
+        ids = np.fromiter((int(row[0]) for row in rows), dtype=np.int64, count=len(rows))
+        columns = (
+            np.fromiter((float(row[1]) for row in rows), dtype=np.float64, count=len(rows)),
+            np.fromiter((float(row[2]) for row in rows), dtype=np.float64, count=len(rows)),
+            np.fromiter((float(row[4]) for row in rows), dtype=np.float64, count=len(rows)),
+            np.fromiter((self._city_code(row[5]) for row in rows), dtype=np.int32, count=len(rows)),
+            np.array([row[3] for row in rows], dtype=object),
+        )
+
+        positions = np.searchsorted(self.ids, ids)
+        existing = positions < len(self.ids)
+        existing[existing] = self.ids[positions[existing]] == ids[existing]
+        targets = (self.price, self.size, self.quality, self.city, self.address)
+        for target, column in zip(targets, columns):
+            target[positions[existing]] = column[existing]
+
+        new = ~existing
+        if new.any():
+            merged_ids = np.concatenate((self.ids, ids[new]))
+            order = np.argsort(merged_ids, kind="stable")
+            self.ids = merged_ids[order]
+            self.price, self.size, self.quality, self.city, self.address = (
+                np.concatenate((target, column[new]))[order]
+                for target, column in zip(targets, columns)
+            )
+
+    def search(
+            self,
+            filters: Dict[str, str],
+            limit: Optional[int] = None,
+            sort: str = "price",
+            descending: bool = False,
+            after: Optional[Tuple[float, int]] = None,
+    ) -> List[Tuple[Any, ...]]:
+        """
+        Finds billboards matching the billboard query filters.
+
+        Bounds are exclusive, as in `select_billboard.sql`; empty strings mean no bound.
+
+        Args:
+            filters (Dict[str, str]): Filters as produced by the billboard query form.
+            limit (Optional[int]): Maximum number of returned billboards.
+            sort (str): Sort column, one of "price", "size" and "quality"; ties are ordered by billboard ID.
+            descending (bool): Sort in descending order.
+            after (Optional[Tuple[float, int]]): Sort value and ID of the last billboard of the previous page.
+
+        Returns:
+            List[Tuple[Any, ...]]: Rows of (billboard_id, price_per_month, size, billboard_address, quality)
+            in the requested order.
+        """
+        key = {"price": self.price, "size": self.size, "quality": self.quality}[sort]
+        mask = np.ones(len(self.ids), dtype=bool)
+        for column, low, high in (
+                (self.price, "min_price", "max_price"),
+                (self.quality, "min_quality", "max_quality"),
+                (self.size, "min_size", "max_size"),
+        ):
+            if filters.get(low, ""):
+                mask &= column > float(filters[low])
+            if filters.get(high, ""):
+                mask &= column < float(filters[high])
+        if filters.get("city", ""):
+            code = self.city_codes.get(filters["city"].strip().casefold())
+            if code is None:
+                return []
+            mask &= self.city == code
+
+        matches = np.flatnonzero(mask)
+        # Sorting on negated values gives the descending order without a second code path.
+        sign = -1 if descending else 1
+        values, ids = key[matches] * sign, self.ids[matches] * sign
+        if after is not None:
+            after_value, after_id = float(after[0]) * sign, int(after[1]) * sign
+            seek = (values > after_value) | ((values == after_value) & (ids > after_id))
+            matches, values, ids = matches[seek], values[seek], ids[seek]
+        if limit is not None and limit < len(matches):
+            # Partial selection of the first values, keeping ties at the boundary for the final sort.
+            threshold = np.partition(values, limit - 1)[limit - 1]
+            selected = values <= threshold
+            matches, values, ids = matches[selected], values[selected], ids[selected]
+        order = matches[np.lexsort((ids, values))][:limit]
+        return list(zip(
+            self.ids[order].tolist(),
+            self.price[order].tolist(),
+            self.size[order].tolist(),
+            self.address[order].tolist(),
+            self.quality[order].tolist(),
+        ))
+
+    def _city_code(self, city: Optional[str]) -> int:
+        key = (city or "").strip().casefold()
+        return self.city_codes.setdefault(key, len(self.city_codes))
+
+
+class BillboardCatalog(BaseModel, metaclass=MetaSQL):
+    """
+    Optional in-process columnar copy of the `billboards` table for the billboard query.
+
+    Enabled with the `BILLBOARD_CATALOG` environment variable when NumPy is installed.
+    Rows changed since the last refresh are found through the indexed `updated_at`
+    column and merged into the snapshot at most every `REFRESH_INTERVAL` seconds.
+    Deleted billboards disappear on the full reload every `FULL_RELOAD_INTERVAL` seconds.
+
+    Attributes:
+        REFRESH_INTERVAL (float): Minimum seconds between two incremental refreshes.
+        FULL_RELOAD_INTERVAL (float): Seconds after which the snapshot is rebuilt from scratch.
+    """
+    sql_provider: SQLProvider
+
+    REFRESH_INTERVAL: ClassVar[float] = 5.0
+    FULL_RELOAD_INTERVAL: ClassVar[float] = 3600.0
+    # Rows committed shortly after a refresh may carry an earlier `updated_at`; they are re-read.
+    CLOCK_MARGIN: ClassVar[timedelta] = timedelta(seconds=5)
+
+    _snapshot: ClassVar[Optional[ColumnarSnapshot]] = None
+    _since: ClassVar[Optional[datetime]] = None
+    _refreshed_at: ClassVar[float] = 0.0
+    _loaded_at: ClassVar[float] = 0.0
+    _lock: ClassVar[threading.Lock] = threading.Lock()
+    _warned: ClassVar[bool] = False
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        """
+        Checks whether the catalog should answer billboard queries.
+
+        A catalog enabled without NumPy is reported once per worker and stays off.
+
+        Returns:
+            bool: True if the catalog is enabled and NumPy is available.
+        """
+        if environ.get("BILLBOARD_CATALOG", "") != "1":
+            return False
+        if np is None:
+            if not cls._warned:
+                cls._warned = True
+                logger.warning("BILLBOARD_CATALOG=1 is set, but NumPy is not installed; the catalog is disabled")
+            return False
+        return True
+
+    @classmethod
+    def search(
+            cls,
+            filters: Dict[str, str],
+            limit: Optional[int] = None,
+            sort: str = "price",
+            descending: bool = False,
+            after: Optional[Tuple[float, int]] = None,
+    ) -> List[Tuple[Any, ...]]:
+        """
+        Finds billboards matching the billboard query filters in the snapshot.
+
+        Args:
+            filters (Dict[str, str]): Filters as produced by the billboard query form.
+            limit (Optional[int]): Maximum number of returned billboards.
+            sort (str): Sort column, one of "price", "size" and "quality".
+            descending (bool): Sort in descending order.
+            after (Optional[Tuple[float, int]]): Sort value and ID of the last billboard of the previous page.
+
+        Returns:
+            List[Tuple[Any, ...]]: Matching rows in the requested order.
+        """
+        cls.refresh()
+        with cls._lock:
+            return cls._snapshot.search(filters, limit, sort, descending, after)  # type: ignore
+
+    @classmethod
+    def refresh(cls, force: bool = False) -> None:
+        """
+        Brings the snapshot up to date with the database.
+
+        Args:
+            force (bool): Refresh even if the last refresh was less than `REFRESH_INTERVAL` ago.
+        """
+        now = time.monotonic()
+        if not force and now - cls._refreshed_at < cls.REFRESH_INTERVAL:
+            return
+        full_reload = cls._snapshot is None or now - cls._loaded_at > cls.FULL_RELOAD_INTERVAL
+        since = (
+            datetime(1970, 1, 2)
+            if full_reload or cls._since is None
+            else cls._since - cls.CLOCK_MARGIN
+        )
+        result = cls.fetch_all(
+            cls.sql_provider.get("get_changed_billboards.sql", since=since),
+            current_app.config["db_config"][session["role"]],
+        ) or ()
+
+        with cls._lock:
+            if full_reload:
+                cls._snapshot = ColumnarSnapshot([row[:6] for row in result])
+                cls._loaded_at = now
+                logger.info(f"Billboard catalog loaded with {len(cls._snapshot)} billboards")
+            else:
+                cls._snapshot.upsert([row[:6] for row in result])  # type: ignore
+            if result:
+                cls._since = max(max(row[6] for row in result), cls._since or datetime.min)
+            cls._refreshed_at = now
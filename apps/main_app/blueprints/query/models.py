@@ -1,13 +1,22 @@
 import logging
-from dataclasses import dataclass
-from typing import Any, Dict, Tuple
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from os import environ
+from typing import Any, Dict, Iterator, Optional, Tuple
 
+from apps.common.cache import SharedVersion, TTLCache
 from apps.common.database.base_model import BaseModel
 from apps.common.database.sql_provider import SQLProvider
 from apps.common.meta import MetaSQL
+from apps.common.pagination import NO_LIMIT, clamp_page_size, decode_cursor, encode_cursor
+from apps.main_app.blueprints.renter.models import Billboard
 from flask import current_app, session
 from pymysql import OperationalError
 
+from .catalog import BillboardCatalog
+
 logger = logging.getLogger(__name__)
 
 
@@ -20,16 +29,45 @@ class InfoResponse:
         result (Tuple[Any, ...]): The fetched data as a tuple of rows.
         error_message (str): Error message, if any.
         status (bool): Indicates whether the request was successful or not.
+        page (int): Number of the returned page for paginated results.
+        has_next (bool): Whether more results follow the returned page.
+        next_cursor (Optional[str]): Cursor token of the next page for keyset-paginated results.
     """
 
     result: Tuple[Any, ...]
     error_message: str
     status: bool
+    page: int = field(default=1)
+    has_next: bool = field(default=False)
+    next_cursor: Optional[str] = field(default=None)
 
 
 class QueryHandler(BaseModel, metaclass=MetaSQL):
-    """Handles database queries and processes user input for fetching information."""
+    """
+    Handles database queries and processes user input for fetching information.
+
+    Attributes:
+        SORT_COLUMNS (Dict[str, Tuple[str, int]]): Billboard columns the query results can be sorted by,
+            with their position in the result rows.
+        EXPORT_COLUMNS (Tuple[str, ...]): Column names of the billboard query result rows.
+        result_cache (TTLCache): Pages of billboard query results shared between requests of the worker,
+            together with the time it took to query them. Cleared by `Billboard.invalidate_cache`.
+    """
     sql_provider: SQLProvider
+    result_cache = TTLCache(
+        max_size=int(environ.get("QUERY_CACHE_SIZE", 256)),
+        ttl=float(environ.get("QUERY_CACHE_TTL", 60)),
+        version=SharedVersion("billboards"),
+    )
+    _saved_db_time: float = 0.0
+    _saved_time_lock = threading.Lock()
+
+    SORT_COLUMNS: Dict[str, Tuple[str, int]] = {
+        "price": ("price_per_month", 1),
+        "size": ("size", 2),
+        "quality": ("quality", 4),
+    }
+    EXPORT_COLUMNS: Tuple[str, ...] = ("billboard_id", "price_per_month", "size", "billboard_address", "quality")
 
     @classmethod
     def check_input(cls, input_data: Dict[str, str]) -> bool:
@@ -53,17 +91,177 @@ class QueryHandler(BaseModel, metaclass=MetaSQL):
         return True
 
     @classmethod
-    def process_user_input(cls, input_data: Dict[str, str]) -> InfoResponse:
+    def process_user_input(
+            cls,
+            input_data: Dict[str, str],
+            sort: str = "price",
+            descending: bool = False,
+            cursor: str = "",
+            page_size: Optional[int] = None,
+    ) -> InfoResponse:
+        """
+        Processes user input to generate and execute an SQL query for one page of billboards.
+
+        Pages are read with keyset pagination on the sort column and the billboard ID, so
+        every page costs the same no matter how deep it is. If the in-process billboard
+        catalog is enabled, the query is answered from it instead. Pages are kept in
+        `result_cache` under the normalized filters until they expire or billboards change.
+
+        Args:
+            input_data (Dict[str, str]): Dictionary containing input parameters for filtering results
+            sort (str): Sort column, one of `SORT_COLUMNS`.
+            descending (bool): Sort in descending order.
+            cursor (str): Cursor token of the requested page; empty for the first page.
+            page_size (Optional[int]): Number of billboards per page.
+
+        Returns:
+            InfoResponse: Contains the page of results, the next page cursor, error message, and status.
+
+        Raises:
+            ValueError: If the sort column or the cursor is invalid.
+        """
+        if sort not in cls.SORT_COLUMNS:
+            raise ValueError(f"Unknown sort column: '{sort}'")
+        sort_position = cls.SORT_COLUMNS[sort][1]
+        after = decode_cursor(cursor, 2) if cursor else None
+        page_size = clamp_page_size(page_size)
+
+        key = (cls.normalize_filters(input_data), sort, descending, after, page_size)
+        try:
+            result = cls._get_page(key, input_data, sort, descending, after, page_size + 1)
+            if result:
+                logger.info("Query executed successfully, results found.")
+                page = tuple(result[:page_size])
+                has_next = len(result) > page_size
+                return InfoResponse(
+                    result=page,
+                    error_message="",
+                    status=True,
+                    has_next=has_next,
+                    next_cursor=encode_cursor((page[-1][sort_position], page[-1][0])) if has_next else None,
+                )
+
+            logger.warning("Query executed, but no results found.")
+            return InfoResponse(
+                result=tuple(), error_message="Nothing could be found", status=False
+            )
+        except OperationalError as e:
+            logger.error(
+                f"SQL Operational Error - Code: {e.args[0]}, Description: {e.args[1]}"
+            )
+            return InfoResponse(
+                result=tuple(), error_message="Bad SQL query", status=False
+            )
+
+    @staticmethod
+    def normalize_filters(input_data: Dict[str, str]) -> Tuple[Tuple[str, Any], ...]:
+        """
+        Builds a canonical form of billboard filters, so equivalent searches share a cache entry.
+
+        Args:
+            input_data (Dict[str, str]): Validated filters of the billboard query.
+
+        Returns:
+            Tuple[Tuple[str, Any], ...]: Sorted (name, value) pairs with None for blank values,
+            integers for numeric bounds and a case-folded city.
+        """
+        normalized = []
+        for name, value in sorted(input_data.items()):
+            value = value.strip()
+            if not value:
+                normalized.append((name, None))
+            elif name == "city":
+                normalized.append((name, value.casefold()))
+            else:
+                normalized.append((name, int(value)))
+        return tuple(normalized)
+
+    @classmethod
+    def get_cache_stats(cls) -> Dict[str, Any]:
+        """
+        Returns usage statistics of the billboard query result cache of this worker.
+
+        Returns:
+            Dict[str, Any]: Cache counters together with the hit ratio and the database time
+            in seconds saved by cache hits.
+        """
+        stats = asdict(cls.result_cache.stats())
+        lookups = stats["hits"] + stats["misses"]
+        with cls._saved_time_lock:
+            saved_db_time = cls._saved_db_time
+        return dict(
+            stats,
+            hit_ratio=stats["hits"] / lookups if lookups else 0.0,
+            saved_db_time=round(saved_db_time, 6),
+        )
+
+    @classmethod
+    def _get_page(
+            cls,
+            key: Tuple[Any, ...],
+            input_data: Dict[str, str],
+            sort: str,
+            descending: bool,
+            after: Optional[Tuple[Any, ...]],
+            limit: int,
+    ) -> Tuple[Tuple[Any, ...], ...]:
+        """Returns billboards of a page from the result cache, querying them on a miss."""
+        Billboard.check_for_changes()
+        cached = cls.result_cache.get(key)
+        if cached is not None:
+            result, query_time = cached
+            with cls._saved_time_lock:
+                cls._saved_db_time += query_time
+            return result
+
+        started = time.perf_counter()
+        if BillboardCatalog.is_enabled():
+            result = tuple(BillboardCatalog.search(input_data, limit, sort, descending, after))
+        else:
+            sql_query = cls._billboard_query(input_data, sort, descending, after, limit)
+            logger.debug(f"Executing SQL query: {sql_query}")
+            result = tuple(cls.fetch_all(
+                sql_query, current_app.config["db_config"][session["role"]]
+            ) or ())
+        cls.result_cache.set(key, (result, time.perf_counter() - started))
+        return result
+
+    @classmethod
+    def export_billboards(
+            cls, input_data: Dict[str, str], sort: str = "price", descending: bool = False
+    ) -> Iterator[Tuple[Any, ...]]:
         """
-        Processes user input to generate and execute an SQL query.
+        Streams every billboard matching the filters from the database.
 
         Args:
             input_data (Dict[str, str]): Dictionary containing input parameters for filtering results
+            sort (str): Sort column, one of `SORT_COLUMNS`.
+            descending (bool): Sort in descending order.
 
         Returns:
-            InfoResponse: Contains the query result, error message, and status.
+            Iterator[Tuple[Any, ...]]: Rows in the order of `EXPORT_COLUMNS`, read lazily.
+
+        Raises:
+            ValueError: If the sort column is invalid.
         """
-        sql_query = QueryHandler.sql_provider.get(
+        if sort not in cls.SORT_COLUMNS:
+            raise ValueError(f"Unknown sort column: '{sort}'")
+        return cls.stream(
+            cls._billboard_query(input_data, sort, descending, None, NO_LIMIT),
+            current_app.config["db_config"][session["role"]],
+        )
+
+    @classmethod
+    def _billboard_query(
+            cls,
+            input_data: Dict[str, str],
+            sort: str,
+            descending: bool,
+            after: Optional[Tuple[Any, ...]],
+            limit: int,
+    ) -> str:
+        """Builds the billboard query for the rows following `after` in the given order."""
+        return cls.sql_provider.get(
             "select_billboard.sql",
             min_price=input_data["min_price"],
             max_price=input_data["max_price"],
@@ -72,20 +270,66 @@ class QueryHandler(BaseModel, metaclass=MetaSQL):
             max_quality=input_data["max_quality"],
             min_size=input_data["min_size"],
             max_size=input_data["max_size"],
+            sort_column=cls.SORT_COLUMNS[sort][0],
+            direction="desc" if descending else "asc",
+            seek_operator="<" if descending else ">",
+            after_value=after[0] if after else "",
+            after_id=after[1] if after else "",
+            limit=limit,
+        )
+
+    @classmethod
+    def find_free_billboards(
+            cls,
+            input_data: Dict[str, str],
+            start_date: str,
+            end_date: str,
+            cursor: str = "",
+            page_size: Optional[int] = None,
+    ) -> InfoResponse:
+        """
+        Finds billboards matching the filters that are free during the whole given period.
+
+        Billboards with an overlapping booking are excluded in the query itself, and pages
+        are read with keyset pagination on the price and the billboard ID, so every page
+        reads only as many free billboards as it shows.
+
+        Args:
+            input_data (Dict[str, str]): Dictionary containing input parameters for filtering results
+            start_date (str): First month of the period in MM/YYYY format.
+            end_date (str): Last month of the period in MM/YYYY format.
+            cursor (str): Cursor token of the requested page; empty for the first page.
+            page_size (Optional[int]): Number of billboards per page.
+
+        Returns:
+            InfoResponse: Contains the page of free billboards, the next page cursor, error message, and status.
+
+        Raises:
+            ValueError: If the dates or the cursor are malformed or the period is empty.
+        """
+        try:
+            start = datetime.strptime(start_date, "%m/%Y")
+            end = datetime.strptime(end_date, "%m/%Y")
+        except ValueError:
+            raise ValueError("Invalid date format. Expected MM/YYYY.")
+        if end < start:
+            raise ValueError("End date must be equal to or later than start date.")
+        after = decode_cursor(cursor, 2) if cursor else None
+        page_size = clamp_page_size(page_size)
+
+        sql_query = cls.sql_provider.get(
+            "select_free_billboards.sql",
+            start_index=start.year * 12 + start.month,
+            end_index=end.year * 12 + end.month,
+            after_value=after[0] if after else "",
+            after_id=after[1] if after else "",
+            limit=page_size + 1,
+            **input_data,
         )
         try:
-            logger.debug(f"Executing SQL query: {sql_query}")
             result = cls.fetch_all(
                 sql_query, current_app.config["db_config"][session["role"]]
-            )
-            if result:
-                logger.info("Query executed successfully, results found.")
-                return InfoResponse(result=result, error_message="", status=True)
-
-            logger.warning("Query executed, but no results found.")
-            return InfoResponse(
-                result=tuple(), error_message="Nothing could be found", status=False
-            )
+            ) or ()
         except OperationalError as e:
             logger.error(
                 f"SQL Operational Error - Code: {e.args[0]}, Description: {e.args[1]}"
@@ -93,3 +337,17 @@ class QueryHandler(BaseModel, metaclass=MetaSQL):
             return InfoResponse(
                 result=tuple(), error_message="Bad SQL query", status=False
             )
+
+        if not result:
+            return InfoResponse(
+                result=tuple(), error_message="Nothing could be found", status=False
+            )
+        page = tuple(result[:page_size])
+        has_next = len(result) > page_size
+        return InfoResponse(
+            result=page,
+            error_message="",
+            status=True,
+            has_next=has_next,
+            next_cursor=encode_cursor((page[-1][1], page[-1][0])) if has_next else None,
+        )
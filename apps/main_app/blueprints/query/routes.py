@@ -1,18 +1,77 @@
-from flask import render_template, request, session
+from typing import Union
+
+from apps.common.export import export_response
+from apps.main_app.blueprints.renter.models import Billboard
+from flask import Response, jsonify, render_template, request, session
+from werkzeug.datastructures import MultiDict
 
 from .blueprint import query_app
 from .models import QueryHandler
 
 
-@query_app.route("/", methods=["GET"])
-def handle_index_query() -> str:
+def get_filters(form: MultiDict[str, str]) -> dict[str, str]:
     """
-    Handles GET requests for the index page.
+    Extracts billboard filters from submitted form data.
+
+    Args:
+        form (MultiDict[str, str]): Submitted form fields or query string arguments.
 
     Returns:
-        str: Rendered HTML for the index page, including the user role from the session.
+        dict[str, str]: Trimmed filters with empty strings for missing bounds and any city.
+    """
+    return {
+        key: form.get(key, '').strip()
+        for key in ("min_price", "max_price", "city", "min_quality", "max_quality", "min_size", "max_size")
+    }
+
+
+def render_billboard_page(args: MultiDict[str, str]) -> str:
     """
-    return render_template("query_index.html", role=session.get("role"))
+    Runs the billboard query for one page of results and renders it.
+
+    Args:
+        args (MultiDict[str, str]): Filters, sort order, page size and cursor from the form or the query string.
+
+    Returns:
+        str:
+            - Rendered HTML with a page of search results if the query is successful.
+            - Rendered HTML with the form and an error message if validation or the query fails.
+    """
+    user_input = get_filters(args)
+    sort = args.get("sort", "price")
+    descending = args.get("order", "asc") == "desc"
+
+    try:
+        QueryHandler.check_input(user_input)
+        result = QueryHandler.process_user_input(
+            user_input,
+            sort=sort,
+            descending=descending,
+            cursor=args.get("cursor", ""),
+            page_size=args.get("page_size", None, type=int),
+        )
+    except ValueError as e:
+        return render_template(
+            "billboard_query_form.html",
+            role=session.get("role"),
+            error=str(e),
+        )
+
+    if result.status:
+        query_args = {key: value for key, value in args.items() if key != "cursor"}
+        return render_template(
+            "billboard_query_result.html",
+            role=session.get("role"),
+            search_results=result.result,
+            next_cursor=result.next_cursor,
+            is_first_page=not args.get("cursor"),
+            query_args=dict(query_args, sort=sort, order="desc" if descending else "asc"),
+        )
+    return render_template(
+        "billboard_query_form.html",
+        role=session.get("role"),
+        error=result.error_message,
+    )
 
 
 @query_app.route("/billboard_query", methods=["GET"])
@@ -20,10 +79,15 @@ def billboard_get_handler() -> str:
     """
     Handles GET requests for the billboard query form.
 
+    Renders the form until filters are given in the query string, then a page of results.
+    Result pages link to each other through this handler with a cursor in the query string.
+
     Returns:
-        str: Rendered HTML for the billboard query form.
+        str: Rendered HTML for the billboard query form or a page of results.
     """
-    return render_template("billboard_query_form.html", role=session.get("role"))
+    if not request.args:
+        return render_template("billboard_query_form.html", role=session.get("role"))
+    return render_billboard_page(request.args)
 
 
 @query_app.route("/billboard_query", methods=["POST"])
@@ -31,25 +95,40 @@ def billboard_post_handler() -> str:
     """
     Handles POST requests for processing a billboard query.
 
-    Processes user input, validates it, executes the query, and returns the results.
+    Processes user input, validates it, executes the query, and returns the first page of results.
 
     Returns:
         str:
             - Rendered HTML with search results if the query is successful.
             - Rendered HTML with the form and an error message if validation or the query fails.
     """
-    user_input = {
-        "min_price": request.form.get("min_price", '') ,
-        "max_price": request.form.get("max_price", ''),
-        "city": request.form.get("city", "%") or "%",
-        "min_quality": request.form.get("min_quality", ''),
-        "max_quality": request.form.get("max_quality", ''),
-        "min_size": request.form.get("min_size", ''),
-        "max_size": request.form.get("max_size", ''),
-    }
+    return render_billboard_page(request.form)
+
+
+@query_app.route("/billboard_query/export", methods=["GET"])
+def billboard_export_handler() -> Union[Response, str]:
+    """
+    Handles GET requests for downloading every billboard matching a query.
+
+    The filters and the sort order are taken from the query string, and `format` selects
+    CSV (default) or NDJSON. Rows are streamed from the database while the file is sent.
 
+    Returns:
+        Union[Response, str]:
+            - Streamed file with the matching billboards.
+            - Rendered HTML with the form and an error message if validation fails.
+    """
+    user_input = get_filters(request.args)
     try:
         QueryHandler.check_input(user_input)
+        rows = QueryHandler.export_billboards(
+            user_input,
+            sort=request.args.get("sort", "price"),
+            descending=request.args.get("order", "asc") == "desc",
+        )
+        return export_response(
+            QueryHandler.EXPORT_COLUMNS, rows, request.args.get("format", "csv"), "billboards"
+        )
     except ValueError as e:
         return render_template(
             "billboard_query_form.html",
@@ -57,16 +136,77 @@ def billboard_post_handler() -> str:
             error=str(e),
         )
 
-    result = QueryHandler.process_user_input(user_input)
+
+@query_app.route("/free_billboards", methods=["GET"])
+def free_billboards_handler() -> str:
+    """
+    Handles GET requests for the search of billboards free during a period.
+
+    Renders the search form until a period is submitted, then a page of matching free billboards.
+    The filters and the page cursor are carried in the query string.
+
+    Returns:
+        str:
+            - Rendered HTML with a page of free billboards if any are found.
+            - Rendered HTML with the form and an error message otherwise.
+    """
+    if "start_date" not in request.args:
+        return render_template("free_billboards_form.html", role=session.get("role"))
+
+    user_input = get_filters(request.args)
+    try:
+        QueryHandler.check_input(user_input)
+        result = QueryHandler.find_free_billboards(
+            user_input,
+            request.args.get("start_date", ""),
+            request.args.get("end_date", ""),
+            cursor=request.args.get("cursor", ""),
+            page_size=request.args.get("page_size", None, type=int),
+        )
+    except ValueError as e:
+        return render_template(
+            "free_billboards_form.html",
+            role=session.get("role"),
+            error=str(e),
+        )
 
     if result.status:
         return render_template(
-            "billboard_query_result.html",
+            "free_billboards_result.html",
             role=session.get("role"),
             search_results=result.result,
+            next_cursor=result.next_cursor,
+            is_first_page=not request.args.get("cursor"),
+            query_args={key: value for key, value in request.args.items() if key not in ("cursor", "page")},
         )
     return render_template(
-        "billboard_query_form.html",
+        "free_billboards_form.html",
         role=session.get("role"),
         error=result.error_message,
     )
+
+
+@query_app.route("/stats", methods=["GET"])
+def query_stats_handler() -> Response:
+    """
+    Handles GET requests for the billboard query result cache statistics.
+
+    The counters belong to the worker process that serves the request.
+
+    Returns:
+        Response: JSON with hits, misses, evictions, hit ratio and saved database time in seconds.
+    """
+    return jsonify(QueryHandler.get_cache_stats())
+
+
+@query_app.route("/billboard_stats", methods=["GET"])
+def billboard_cache_stats_handler() -> Response:
+    """
+    Handles GET requests for the billboard cache statistics.
+
+    The counters belong to the worker process that serves the request.
+
+    Returns:
+        Response: JSON with hits, misses, evictions, expirations, invalidations, size and hit ratio.
+    """
+    return jsonify(Billboard.get_cache_stats())
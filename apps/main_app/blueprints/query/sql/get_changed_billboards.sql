@@ -0,0 +1,3 @@
+select billboard_id, price_per_month, size, billboard_address, quality, city, updated_at
+from advertising.billboards
+where updated_at >= "$since";
\ No newline at end of file
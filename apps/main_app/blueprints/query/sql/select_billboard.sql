@@ -2,8 +2,13 @@ select billboard_id, price_per_month, size, billboard_address, quality
 from advertising.billboards
 where (price_per_month > "$min_price" or "$min_price" = '')
   and (price_per_month < "$max_price" or "$max_price" = '')
-  and billboard_address like "%. $city,%"
+  and (city = "$city" or "$city" = '')
   and (quality > "$min_quality" or "$min_quality" = '')
   and (quality < "$max_quality" or "$max_quality" = '')
   and (size > "$min_size" or "$min_size" = '')
-  and (size < "$max_size" or "$max_size" = '');
\ No newline at end of file
+  and (size < "$max_size" or "$max_size" = '')
+  and ("$after_id" = ''
+    or $sort_column $seek_operator "$after_value"
+    or ($sort_column = "$after_value" and billboard_id $seek_operator "$after_id"))
+order by $sort_column $direction, billboard_id $direction
+limit $limit;
@@ -0,0 +1,24 @@
+select b.billboard_id, b.price_per_month, b.size, b.billboard_address, b.quality
+from advertising.billboards b
+where (b.price_per_month > "$min_price" or "$min_price" = '')
+  and (b.price_per_month < "$max_price" or "$max_price" = '')
+  and (b.city = "$city" or "$city" = '')
+  and (b.quality > "$min_quality" or "$min_quality" = '')
+  and (b.quality < "$max_quality" or "$max_quality" = '')
+  and (b.size > "$min_size" or "$min_size" = '')
+  and (b.size < "$max_size" or "$max_size" = '')
+  and not exists(select 1
+                 from advertising.order_row o
+                 where o.billboard_id = b.billboard_id
+                   and o.start_year * 12 + o.start_month <= $end_index
+                   and o.end_year * 12 + o.end_month >= $start_index)
+  and not exists(select 1
+                 from advertising.schedule s
+                 where s.billboard_id = b.billboard_id
+                   and s.start_year * 12 + s.start_month <= $end_index
+                   and s.end_year * 12 + s.end_month >= $start_index)
+  and ("$after_id" = ''
+    or b.price_per_month > "$after_value"
+    or (b.price_per_month = "$after_value" and b.billboard_id > "$after_id"))
+order by b.price_per_month, b.billboard_id
+limit $limit;
\ No newline at end of file
@@ -0,0 +1,275 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Any, ClassVar, Dict, List, Optional, Tuple
+
+from apps.common.database.base_model import BaseModel
+from apps.common.database.sql_provider import SQLProvider
+from apps.common.meta import MetaSQL
+from flask import current_app, session
+
+logger = logging.getLogger(__name__)
+
+
+def month_index(year: int, month: int) -> int:
+    """
+    Converts a year and month into a sequential month number.
+
+    Arguments:
+        year (int): Year.
+        month (int): Month (1-12).
+
+    Returns:
+        int: Number of months since January of year 0.
+    """
+    return int(year) * 12 + int(month) - 1
+
+
+def month_from_index(index: int) -> datetime:
+    """
+    Converts a sequential month number back into the first day of that month.
+
+    Arguments:
+        index (int): Sequential month number produced by `month_index`.
+
+    Returns:
+        datetime: First day of the month.
+    """
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+class AvailabilityIndex(BaseModel, metaclass=MetaSQL):
+    """
+    Process-wide index of occupied months for every billboard.
+
+    Occupancy of a billboard is kept as two parallel sorted lists with the first and last
+    month numbers of disjoint, merged booking intervals, so an overlap check is a single
+    binary search. The index is built from `order_row` and the historical `schedule`
+    table and updated incrementally after checkout. Every `REFRESH_INTERVAL` seconds the
+    bookings added since the previous read are loaded by primary key, which picks up
+    bookings committed by other workers without reading the whole history. Every
+    `FULL_RELOAD_INTERVAL` seconds the index is rebuilt from scratch in a background
+    thread, dropping deleted bookings, while requests keep using the current index.
+
+    Attributes:
+        REFRESH_INTERVAL (float): Seconds after which new bookings are loaded.
+        FULL_RELOAD_INTERVAL (float): Seconds after which the whole index is rebuilt.
+        ID_MARGIN (int): How many IDs before the last seen one are read again on every refresh.
+    """
+    sql_provider: SQLProvider
+
+    REFRESH_INTERVAL: ClassVar[float] = 10.0
+    FULL_RELOAD_INTERVAL: ClassVar[float] = 3600.0
+    # Rows whose IDs were allocated before a refresh may commit after it; merging a booking
+    # twice is harmless, so a margin of recent IDs is simply read again.
+    ID_MARGIN: ClassVar[int] = 1000
+
+    _starts: ClassVar[Dict[int, List[int]]] = {}
+    _ends: ClassVar[Dict[int, List[int]]] = {}
+    _loaded_at: ClassVar[Optional[float]] = None
+    _refreshed_at: ClassVar[float] = 0.0
+    _last_order_row_id: ClassVar[int] = 0
+    _last_schedule_id: ClassVar[int] = 0
+    _rebuilding: ClassVar[bool] = False
+    _lock: ClassVar[threading.RLock] = threading.RLock()
+
+    @classmethod
+    def refresh(cls, db_config: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Rebuilds the whole index from the database.
+
+        Args:
+            db_config (Optional[Dict[str, Any]]): Database configuration; defaults to the one of the session role.
+        """
+        started = time.monotonic()
+        result = cls.fetch_all(
+            cls.sql_provider.get("get_all_occupied_periods.sql"),
+            db_config or current_app.config["db_config"][session["role"]],
+        )
+        starts: Dict[int, List[int]] = {}
+        ends: Dict[int, List[int]] = {}
+        for billboard_id, start_month, start_year, end_month, end_year, *_ in sorted(
+                result or (), key=lambda row: (row[0], row[2], row[1])
+        ):
+            cls._insert(
+                starts.setdefault(int(billboard_id), []),
+                ends.setdefault(int(billboard_id), []),
+                month_index(start_year, start_month),
+                month_index(end_year, end_month),
+            )
+        order_row_id, schedule_id = cls._last_ids(result or ())
+        with cls._lock:
+            cls._starts, cls._ends = starts, ends
+            cls._last_order_row_id, cls._last_schedule_id = order_row_id, schedule_id
+            cls._loaded_at = cls._refreshed_at = started
+
+    @classmethod
+    def load_new(cls, db_config: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Adds bookings whose IDs follow the last ones read to the index.
+
+        Args:
+            db_config (Optional[Dict[str, Any]]): Database configuration; defaults to the one of the session role.
+        """
+        started = time.monotonic()
+        with cls._lock:
+            after_order_row_id, after_schedule_id = cls._last_order_row_id, cls._last_schedule_id
+        result = cls.fetch_all(
+            cls.sql_provider.get(
+                "get_new_occupied_periods.sql",
+                after_order_row_id=max(0, after_order_row_id - cls.ID_MARGIN),
+                after_schedule_id=max(0, after_schedule_id - cls.ID_MARGIN),
+            ),
+            db_config or current_app.config["db_config"][session["role"]],
+        ) or ()
+        order_row_id, schedule_id = cls._last_ids(result)
+        with cls._lock:
+            for billboard_id, start_month, start_year, end_month, end_year, *_ in result:
+                cls._insert(
+                    cls._starts.setdefault(int(billboard_id), []),
+                    cls._ends.setdefault(int(billboard_id), []),
+                    month_index(start_year, start_month),
+                    month_index(end_year, end_month),
+                )
+            cls._last_order_row_id = max(cls._last_order_row_id, order_row_id)
+            cls._last_schedule_id = max(cls._last_schedule_id, schedule_id)
+            cls._refreshed_at = started
+
+    @classmethod
+    def overlaps(cls, billboard_id: int, start_date: datetime, end_date: datetime) -> bool:
+        """
+        Checks whether a period overlaps with any booking of the billboard.
+
+        Args:
+            billboard_id (int): ID of the billboard.
+            start_date (datetime): First month of the period.
+            end_date (datetime): Last month of the period.
+
+        Returns:
+            bool: True if the period overlaps, False otherwise.
+        """
+        cls._ensure_fresh()
+        start, end = month_index(start_date.year, start_date.month), month_index(end_date.year, end_date.month)
+        with cls._lock:
+            starts = cls._starts.get(int(billboard_id), [])
+            ends = cls._ends.get(int(billboard_id), [])
+            position = bisect_left(ends, start)
+            return position < len(starts) and starts[position] <= end
+
+    @classmethod
+    def get_periods(cls, billboard_id: int) -> List[Dict[str, datetime]]:
+        """
+        Returns the merged occupied periods of the billboard.
+
+        Args:
+            billboard_id (int): ID of the billboard.
+
+        Returns:
+            List[Dict[str, datetime]]: Occupied periods with start and end dates in chronological order.
+        """
+        cls._ensure_fresh()
+        with cls._lock:
+            intervals = list(zip(cls._starts.get(int(billboard_id), []), cls._ends.get(int(billboard_id), [])))
+        return [
+            {"start": month_from_index(start), "end": month_from_index(end)}
+            for start, end in intervals
+        ]
+
+    @classmethod
+    def add(cls, billboard_id: int, start_date: datetime, end_date: datetime) -> None:
+        """
+        Marks a period of the billboard as occupied.
+
+        Args:
+            billboard_id (int): ID of the billboard.
+            start_date (datetime): First month of the period.
+            end_date (datetime): Last month of the period.
+        """
+        with cls._lock:
+            cls._insert(
+                cls._starts.setdefault(int(billboard_id), []),
+                cls._ends.setdefault(int(billboard_id), []),
+                month_index(start_date.year, start_date.month),
+                month_index(end_date.year, end_date.month),
+            )
+
+    @classmethod
+    def replace(cls, periods: Dict[int, List[Dict[str, datetime]]]) -> None:
+        """
+        Replaces the occupancy of the given billboards with freshly read periods.
+
+        Args:
+            periods (Dict[int, List[Dict[str, datetime]]]): Occupied periods keyed by billboard ID.
+        """
+        for billboard_id, billboard_periods in periods.items():
+            starts: List[int] = []
+            ends: List[int] = []
+            for start, end in sorted(cls._to_interval(period) for period in billboard_periods):
+                cls._insert(starts, ends, start, end)
+            with cls._lock:
+                cls._starts[int(billboard_id)], cls._ends[int(billboard_id)] = starts, ends
+
+    @classmethod
+    def _ensure_fresh(cls) -> None:
+        if cls._loaded_at is None:
+            cls.refresh()
+            return
+        now = time.monotonic()
+        if now - cls._refreshed_at > cls.REFRESH_INTERVAL:
+            cls.load_new()
+        if now - cls._loaded_at > cls.FULL_RELOAD_INTERVAL:
+            with cls._lock:
+                if cls._rebuilding:
+                    return
+                cls._rebuilding = True
+            threading.Thread(
+                target=cls._rebuild,
+                args=(current_app.config["db_config"][session["role"]],),
+                name="availability-rebuild",
+                daemon=True,
+            ).start()
+
+    @classmethod
+    def _rebuild(cls, db_config: Dict[str, Any]) -> None:
+        """Rebuilds the index outside of any request, keeping the current one on failure."""
+        try:
+            cls.refresh(db_config)
+        except Exception as e:
+            logger.error(f"Failed to rebuild the availability index: {e}")
+            with cls._lock:
+                # Try again after another full interval instead of on every request.
+                cls._loaded_at = time.monotonic()
+        finally:
+            with cls._lock:
+                cls._rebuilding = False
+
+    @staticmethod
+    def _last_ids(rows: Any) -> Tuple[int, int]:
+        """Returns the highest order row and schedule IDs among booking rows."""
+        return (
+            max((int(row[5]) for row in rows if row[5] is not None), default=0),
+            max((int(row[6]) for row in rows if row[6] is not None), default=0),
+        )
+
+    @staticmethod
+    def _to_interval(period: Dict[str, Any]) -> Tuple[int, int]:
+        return (
+            month_index(period["start"].year, period["start"].month),
+            month_index(period["end"].year, period["end"].month),
+        )
+
+    @staticmethod
+    def _insert(starts: List[int], ends: List[int], start: int, end: int) -> None:
+        """Inserts an interval, merging it with every overlapping or adjacent one."""
+        first = bisect_left(ends, start - 1)
+        last = bisect_right(starts, end + 1)
+        if first < last:
+            start = min(start, starts[first])
+            end = max(end, ends[last - 1])
+        starts[first:last] = [start]
+        ends[first:last] = [end]
+
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import ClassVar, Dict, Optional, Tuple
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ImageInfo:
+    """
+    Describes a billboard image file.
+
+    Attributes:
+        filename (str): Path of the image relative to the blueprint static folder.
+        size (int): File size in bytes.
+        mtime (float): Modification time of the file.
+        digest (str): Short content hash, used to build cache-busting URLs.
+    """
+
+    filename: str
+    size: int
+    mtime: float
+    digest: str
+
+
+class ImageManifest:
+    """
+    Manifest of billboard images, built once and shared by the worker.
+
+    The image directory is listed once instead of checking every billboard image with a
+    separate `stat`. The directory modification time is polled at most every
+    `POLL_INTERVAL` seconds, so added, removed or renamed images are picked up without
+    a restart; a gunicorn reload (SIGHUP) rebuilds the manifest as well.
+
+    Attributes:
+        IMAGE_DIR (str): Directory containing `<billboard_id>.jpg` images.
+        POLL_INTERVAL (float): Minimum number of seconds between two checks of the directory.
+    """
+
+    IMAGE_DIR: ClassVar[str] = os.path.join(os.path.dirname(__file__), "static", "img")
+    POLL_INTERVAL: ClassVar[float] = 5.0
+
+    _images: ClassVar[Dict[int, ImageInfo]] = {}
+    _dir_mtime: ClassVar[Optional[float]] = None
+    _checked_at: ClassVar[float] = 0.0
+    _lock: ClassVar[threading.Lock] = threading.Lock()
+
+    @classmethod
+    def refresh(cls) -> None:
+        """Rebuilds the manifest from the image directory."""
+        images: Dict[int, ImageInfo] = {}
+        try:
+            dir_mtime = os.stat(cls.IMAGE_DIR).st_mtime
+            entries = list(os.scandir(cls.IMAGE_DIR))
+        except FileNotFoundError:
+            logger.warning(f"Billboard image directory {cls.IMAGE_DIR} does not exist")
+            dir_mtime, entries = None, []
+
+        for entry in entries:
+            name, extension = os.path.splitext(entry.name)
+            if extension != ".jpg" or not name.isdigit() or not entry.is_file():
+                continue
+            stat = entry.stat()
+            with open(entry.path, "rb") as image:
+                digest = hashlib.sha256(image.read()).hexdigest()[:12]
+            images[int(name)] = ImageInfo(
+                filename=f"img/{entry.name}",
+                size=stat.st_size,
+                mtime=stat.st_mtime,
+                digest=digest,
+            )
+
+        with cls._lock:
+            cls._images = images
+            cls._dir_mtime = dir_mtime
+            cls._checked_at = time.monotonic()
+
+    @classmethod
+    def get(cls, billboard_id: int) -> Optional[ImageInfo]:
+        """
+        Returns the image of a billboard.
+
+        Args:
+            billboard_id (int): ID of the billboard.
+
+        Returns:
+            Optional[ImageInfo]: Image description, or None if the billboard has no image.
+        """
+        cls._ensure_fresh()
+        return cls._images.get(int(billboard_id))
+
+    @classmethod
+    def _ensure_fresh(cls) -> None:
+        if time.monotonic() - cls._checked_at < cls.POLL_INTERVAL:
+            return
+        try:
+            dir_mtime: Optional[float] = os.stat(cls.IMAGE_DIR).st_mtime
+        except FileNotFoundError:
+            dir_mtime = None
+        if dir_mtime != cls._dir_mtime:
+            cls.refresh()
+        else:
+            cls._checked_at = time.monotonic()
+
+
+class ImageVariants:
+    """
+    Resized and recompressed copies of billboard images kept in an on-disk cache.
+
+    A variant is generated on first request and stored under a name containing the
+    content hash of the original, so a changed image never reuses an outdated variant
+    and the variant files can be shared between workers.
+
+    Attributes:
+        CACHE_DIR (str): Directory holding generated variants.
+        SIZES (Dict[str, int]): Maximum width in pixels of every variant.
+        FORMATS (Dict[str, Tuple[str, str]]): Pillow format and MIME type for every file extension.
+        MAX_AGE (int): Seconds browsers may keep a variant, as its URL changes with the image.
+    """
+
+    CACHE_DIR: ClassVar[str] = os.environ.get(
+        "IMAGE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "advertising_img_cache")
+    )
+    SIZES: ClassVar[Dict[str, int]] = {"thumb": 480, "medium": 1200}
+    FORMATS: ClassVar[Dict[str, Tuple[str, str]]] = {
+        "webp": ("WEBP", "image/webp"),
+        "jpg": ("JPEG", "image/jpeg"),
+    }
+    QUALITY: ClassVar[int] = 80
+    MAX_AGE: ClassVar[int] = 365 * 24 * 60 * 60
+
+    @classmethod
+    def get_path(cls, image: ImageInfo, billboard_id: int, variant: str, extension: str) -> str:
+        """
+        Returns the path of a variant, generating it if it is not cached yet.
+
+        Args:
+            image (ImageInfo): Original image from the manifest.
+            billboard_id (int): ID of the billboard.
+            variant (str): Name of the variant from `SIZES`.
+            extension (str): File extension from `FORMATS`.
+
+        Returns:
+            str: Absolute path of the variant file.
+
+        Raises:
+            KeyError: If the variant or the format is unknown.
+        """
+        width, (image_format, _) = cls.SIZES[variant], cls.FORMATS[extension]
+        variant_path = os.path.join(
+            cls.CACHE_DIR, f"{billboard_id}-{image.digest}-{variant}.{extension}"
+        )
+        if os.path.isfile(variant_path):
+            return variant_path
+
+        os.makedirs(cls.CACHE_DIR, exist_ok=True)
+        with Image.open(os.path.join(ImageManifest.IMAGE_DIR, os.path.basename(image.filename))) as original:
+            resized = original.convert("RGB")
+            resized.thumbnail((width, width * 4))
+            # Write to a unique file and rename it, so concurrent workers never serve a partial file.
+            descriptor, temporary_path = tempfile.mkstemp(dir=cls.CACHE_DIR, suffix=f".{extension}")
+            try:
+                with os.fdopen(descriptor, "wb") as output:
+                    resized.save(output, image_format, quality=cls.QUALITY, optimize=True)
+                os.replace(temporary_path, variant_path)
+            except BaseException:
+                # A failed write, e.g. on a full disk, must not leave its file in the cache.
+                os.unlink(temporary_path)
+                raise
+        return variant_path
+
+    @classmethod
+    def get_mimetype(cls, extension: str) -> str:
+        """
+        Returns the MIME type of a variant format.
+
+        Args:
+            extension (str): File extension from `FORMATS`.
+
+        Returns:
+            str: The MIME type.
+        """
+        return cls.FORMATS[extension][1]
+
+
+ImageManifest.refresh()
@@ -1,13 +1,25 @@
 from __future__ import annotations
 
+import random
+import threading
+import time
+from dataclasses import asdict
 from datetime import datetime
-from os import path
-from typing import Any, Dict, List, Optional
+from os import environ
+from typing import Any, ClassVar, Dict, Iterable, List, Optional, Tuple
 
+from apps.common.cache import SharedVersion, TTLCache
 from apps.common.database.base_model import BaseModel
+from apps.common.database.retry import retry_on_lock_conflict
 from apps.common.database.sql_provider import SQLProvider
 from apps.common.meta import MetaSQL
-from flask import current_app, session
+from apps.common.signals import order_placed
+from flask import current_app, g, session, url_for
+from pymysql import OperationalError
+from pymysql.cursors import Cursor
+
+from .availability import AvailabilityIndex
+from .images import ImageManifest
 
 
 def is_period_overlaps(occupied_periods: List[Dict[str, datetime]], start_date: datetime, end_date: datetime) -> bool:
@@ -28,6 +40,25 @@ def is_period_overlaps(occupied_periods: List[Dict[str, datetime]], start_date:
     )
 
 
+def to_period(start_month: int, start_year: int, end_month: int, end_year: int) -> Dict[str, datetime]:
+    """
+    Builds an occupied period from the month and year columns of an order row.
+
+    Arguments:
+        start_month (int): First month of the period.
+        start_year (int): Year of the first month.
+        end_month (int): Last month of the period.
+        end_year (int): Year of the last month.
+
+    Returns:
+        Dict[str, datetime]: Period with start and end dates.
+    """
+    return {
+        "start": datetime(int(start_year), int(start_month), 1),
+        "end": datetime(int(end_year), int(end_month), 1),
+    }
+
+
 class Renter(BaseModel, metaclass=MetaSQL):
     """
     Represents a renter and their associated data.
@@ -100,9 +131,20 @@ class Billboard(BaseModel, metaclass=MetaSQL):
         quality (int): Quality of the billboard.
         owner_id (int): ID of the owner of the billboard.
         img_path (Optional[str]): Path to the billboard's image.
+        cache (TTLCache): Billboards shared between requests of the worker, invalidated through `invalidate_cache`.
+        CHANGE_CHECK_INTERVAL (float): Minimum seconds between two checks of the table for changes.
     """
 
     sql_provider: SQLProvider
+    cache = TTLCache(
+        max_size=int(environ.get("BILLBOARD_CACHE_SIZE", 4096)),
+        ttl=float(environ.get("BILLBOARD_CACHE_TTL", 300)),
+        version=SharedVersion("billboards"),
+    )
+    CHANGE_CHECK_INTERVAL: ClassVar[float] = float(environ.get("BILLBOARD_CHANGE_CHECK_INTERVAL", 5))
+    _change_marker: ClassVar[Optional[Tuple[Any, ...]]] = None
+    _checked_at: ClassVar[Optional[float]] = None
+    _change_lock: ClassVar[threading.Lock] = threading.Lock()
 
     def __init__(
             self,
@@ -121,12 +163,33 @@ class Billboard(BaseModel, metaclass=MetaSQL):
         self.mount_date = mount_date
         self.quality = quality
         self.owner_id = owner_id
-        self.img_path = (
-            f"img/{self.billboard_id}.jpg"
-            if path.isfile(
-                path.join(path.dirname(__file__), f"static/img/{self.billboard_id}.jpg")
-            )
-            else None
+
+    @property
+    def img_path(self) -> Optional[str]:
+        """Path to the billboard's image relative to the static folder, resolved from the image manifest."""
+        image = ImageManifest.get(self.billboard_id)
+        return image.filename if image else None
+
+    def img_url(self, variant: str, extension: str = "jpg") -> Optional[str]:
+        """
+        Builds the fingerprinted URL of a resized billboard image.
+
+        Args:
+            variant (str): Name of the image size, e.g. "thumb" or "medium".
+            extension (str): Image format, e.g. "webp" or "jpg".
+
+        Returns:
+            Optional[str]: URL of the image, or None if the billboard has no image.
+        """
+        image = ImageManifest.get(self.billboard_id)
+        if image is None:
+            return None
+        return url_for(
+            "renter.billboard_image_handler",
+            variant=variant,
+            digest=image.digest,
+            billboard_id=self.billboard_id,
+            extension=extension,
         )
 
     @classmethod
@@ -143,54 +206,210 @@ class Billboard(BaseModel, metaclass=MetaSQL):
         Raises:
             ValueError: If the billboard does not exist.
         """
-        result = cls.fetch_one(
-            cls.sql_provider.get("get_billboard.sql", billboard_id=billboard_id),
-            current_app.config["db_config"][session["role"]],
-        )
-        if not result:
-            raise ValueError("Billboard with such ID does not exist.")
-        return Billboard(*result)  # type: ignore
+        loaded = cls._loaded_billboards()
+        if int(billboard_id) in loaded:
+            return loaded[int(billboard_id)]
+        cls.check_for_changes()
+        billboard = cls.cache.get(int(billboard_id))
+        if billboard is None:
+            result = cls.fetch_one(
+                cls.sql_provider.get("get_billboard.sql", billboard_id=billboard_id),
+                current_app.config["db_config"][session["role"]],
+            )
+            if not result:
+                raise ValueError("Billboard with such ID does not exist.")
+            billboard = Billboard(*result)  # type: ignore
+            cls.cache.set(int(billboard_id), billboard)
+        loaded[int(billboard_id)] = billboard
+        return billboard
+
+    @classmethod
+    def get_many(cls, billboard_ids: Iterable[int], cached: bool = True) -> Dict[int, Billboard]:
+        """
+        Fetches several billboards by ID with a single query.
+
+        Billboards already loaded during the current request are not fetched again.
+
+        Args:
+            billboard_ids (Iterable[int]): IDs of the billboards.
+            cached (bool): Whether billboards may be taken from the worker cache.
+                Pass False where stale prices are not acceptable.
+
+        Returns:
+            Dict[int, Billboard]: Found billboards keyed by ID. Missing IDs are omitted.
+        """
+        ids = set(map(int, billboard_ids))
+        loaded = cls._loaded_billboards()
+        missing = ids - loaded.keys()
+        if cached and missing:
+            cls.check_for_changes()
+            for billboard_id in list(missing):
+                billboard = cls.cache.get(billboard_id)
+                if billboard is not None:
+                    loaded[billboard_id] = billboard
+                    missing.discard(billboard_id)
+        if missing:
+            result = cls.fetch_all(
+                cls.sql_provider.get(
+                    "get_billboards_by_ids.sql",
+                    billboard_ids=", ".join(map(str, sorted(missing))),
+                ),
+                current_app.config["db_config"][session["role"]],
+            )
+            for row in result or ():
+                billboard = Billboard(*row)  # type: ignore
+                loaded[int(billboard.billboard_id)] = billboard
+                cls.cache.set(int(billboard.billboard_id), billboard)
+        return {billboard_id: loaded[billboard_id] for billboard_id in ids if billboard_id in loaded}
+
+    @staticmethod
+    def _loaded_billboards() -> Dict[int, Billboard]:
+        """
+        Returns the identity map of billboards loaded during the current request.
+
+        Returns:
+            Dict[int, Billboard]: Billboards keyed by ID.
+        """
+        if "billboards" not in g:
+            g.billboards = {}
+        return g.billboards
 
     @classmethod
     def get_random_billboards(cls, count: int) -> List[Billboard]:
         """
         Fetches a random set of billboards.
 
+        IDs are sampled from the cached list of all billboard IDs, and only the sampled
+        billboards are loaded, so the cost does not grow with the catalog size.
+
         Args:
             count (int): Number of random billboards to fetch.
 
         Returns:
             List[Billboard]: A list of Billboard instances.
         """
-        result = cls.fetch_all(
-            cls.sql_provider.get("get_n_random_billboards.sql", n=count),
-            db_config=current_app.config["db_config"][session["role"]],
+        cls.check_for_changes()
+        billboard_ids: List[int] = cls.cache.get_or_load(
+            "ids",
+            lambda: [
+                int(row[0])
+                for row in cls.fetch_all(
+                    cls.sql_provider.get("get_billboard_ids.sql"),
+                    db_config=current_app.config["db_config"][session["role"]],
+                ) or ()
+            ],
         )
-        return [Billboard(*x) for x in result]  # type: ignore
+        sample = random.sample(billboard_ids, min(count, len(billboard_ids)))
+        billboards = cls.get_many(sample)
+        return [billboards[billboard_id] for billboard_id in sample if billboard_id in billboards]
+
+    @classmethod
+    def invalidate_cache(cls) -> None:
+        """Drops cached billboards, their ID list and query result pages in every worker."""
+        cls.cache.version.bump()  # type: ignore
+
+    @classmethod
+    def check_for_changes(cls) -> None:
+        """
+        Invalidates the billboard caches if the table changed since the previous check.
+
+        Billboards are edited outside the application, so changes are detected through the
+        `updated_at` column of migration 002: its maximum and the row count are compared
+        with the previous check, at most once per `CHANGE_CHECK_INTERVAL` seconds per worker.
+        Both come from one index-only query. A change bumps the shared version, so every
+        worker drops its copies.
+        """
+        now = time.monotonic()
+        with cls._change_lock:
+            if cls._checked_at is not None and now - cls._checked_at < cls.CHANGE_CHECK_INTERVAL:
+                return
+            cls._checked_at = now
+        try:
+            marker = cls.fetch_one(
+                cls.sql_provider.get("get_billboards_marker.sql"),
+                current_app.config["db_config"][session["role"]],
+            )
+        except OperationalError:
+            # Cached billboards are still served; the next check tries again.
+            return
+        with cls._change_lock:
+            previous, cls._change_marker = cls._change_marker, tuple(marker or ())
+        if previous is not None and previous != cls._change_marker:
+            cls.invalidate_cache()
+
+    @classmethod
+    def get_cache_stats(cls) -> Dict[str, Any]:
+        """
+        Returns usage statistics of the billboard cache of this worker.
+
+        Returns:
+            Dict[str, Any]: Cache counters together with the hit ratio.
+        """
+        stats = asdict(cls.cache.stats())
+        lookups = stats["hits"] + stats["misses"]
+        return dict(stats, hit_ratio=stats["hits"] / lookups if lookups else 0.0)
 
     def get_occupied_periods(self) -> List[Dict[str, datetime]]:
         """
-        Fetches occupied periods for the billboard.
+        Fetches occupied periods for the billboard from the availability index.
 
         Returns:
             List[Dict[str, datetime]]: A list of occupied periods with start and end dates.
         """
-        result = self.fetch_all(
-            Billboard.sql_provider.get(
-                "get_occupied_periods.sql", billboard_id=self.billboard_id
+        return AvailabilityIndex.get_periods(self.billboard_id)
+
+    @classmethod
+    def get_occupied_periods_many(
+            cls, billboard_ids: Iterable[int], cursor: Optional[Cursor] = None
+    ) -> Dict[int, List[Dict[str, datetime]]]:
+        """
+        Fetches occupied periods for several billboards with a single query.
+
+        Args:
+            billboard_ids (Iterable[int]): IDs of the billboards.
+            cursor (Optional[Cursor], optional): Reusable database cursor. Defaults to None.
+
+        Returns:
+            Dict[int, List[Dict[str, datetime]]]: Occupied periods keyed by billboard ID.
+        """
+        periods: Dict[int, List[Dict[str, datetime]]] = {
+            billboard_id: [] for billboard_id in map(int, billboard_ids)
+        }
+        if not periods:
+            return periods
+        result = cls.fetch_all(
+            cls.sql_provider.get(
+                "get_occupied_periods_many.sql",
+                billboard_ids=", ".join(map(str, periods)),
             ),
             current_app.config["db_config"][session["role"]],
+            cursor=cursor,
         )
-        return (
-            [
-                {
-                    "start": datetime.strptime(f"{x[0]}/{x[1]}", "%m/%Y"),
-                    "end": datetime.strptime(f"{x[2]}/{x[3]}", "%m/%Y"),
-                }
-                for x in result
-            ]
-            if result
-            else []
+        for billboard_id, *period in result or ():
+            periods[int(billboard_id)].append(to_period(*period))  # type: ignore
+        return periods
+
+    @classmethod
+    def lock_many(cls, billboard_ids: Iterable[int], cursor: Cursor) -> None:
+        """
+        Locks billboard rows until the end of the current transaction.
+
+        Rows are locked in ascending ID order, so concurrent transactions over
+        intersecting sets of billboards cannot deadlock each other.
+
+        Args:
+            billboard_ids (Iterable[int]): IDs of the billboards to lock.
+            cursor (Cursor): Cursor of the running transaction.
+        """
+        ids = sorted(set(map(int, billboard_ids)))
+        if not ids:
+            return
+        cls.fetch_all(
+            cls.sql_provider.get(
+                "lock_billboards.sql", billboard_ids=", ".join(map(str, ids))
+            ),
+            current_app.config["db_config"][session["role"]],
+            cursor=cursor,
         )
 
     def is_period_overlaps(self, start_date: datetime, end_date: datetime) -> bool:
@@ -204,7 +423,7 @@ class Billboard(BaseModel, metaclass=MetaSQL):
         Returns:
             bool: True if the period overlaps, False otherwise.
         """
-        return is_period_overlaps(self.get_occupied_periods(), start_date, end_date)
+        return AvailabilityIndex.overlaps(self.billboard_id, start_date, end_date)
 
 
 class OrderHandler(BaseModel, metaclass=MetaSQL):
@@ -316,15 +535,24 @@ class OrderHandler(BaseModel, metaclass=MetaSQL):
         """
         Returns dict of parameters about items saved in the cart.
 
+        All cart billboards are loaded with a single query.
+
         Returns:
             List[Dict[str, float]]: List of parameters.
+
+        Raises:
+            ValueError: If a billboard from the cart does not exist.
         """
+        cart = session.get("cart", [])
+        billboards = Billboard.get_many(order["billboard_id"] for order in cart)
+        if len(billboards) < len({order["billboard_id"] for order in cart}):
+            raise ValueError("Billboard with such ID does not exist.")
         return [
             {
                 **order,
-                "price_per_month": Billboard.get_billboard(order["billboard_id"]).price_per_month,
+                "price_per_month": billboards[order["billboard_id"]].price_per_month,
             }
-            for order in session.get("cart", [])
+            for order in cart
         ]
 
     @classmethod
@@ -345,10 +573,15 @@ class CheckoutHandler(BaseModel, metaclass=MetaSQL):
     sql_provider: SQLProvider
 
     @classmethod
+    @retry_on_lock_conflict()
     def checkout(cls, order_rows: List[Dict[str, Any]]) -> None:
         """
         Processes the checkout for the user's cart.
 
+        The affected billboards are locked before their bookings are checked, so
+        concurrent checkouts of the same billboard are serialized while unrelated
+        ones proceed in parallel. Lock timeouts and deadlocks are retried.
+
         Args:
             order_rows (List[Dict[str, Any]]): List of order details from the cart.
         """
@@ -377,28 +610,53 @@ class CheckoutHandler(BaseModel, metaclass=MetaSQL):
             return price_per_month * months
 
         # Retrieve all billboard data and associated prices
-        cart = session.get("cart", [])
-        billboards = [Billboard.get_billboard(order["billboard_id"]) for order in cart]
+        billboards = Billboard.get_many((order["billboard_id"] for order in order_rows), cached=False)
+        missing = {order["billboard_id"] for order in order_rows} - billboards.keys()
+        if missing:
+            raise ValueError(
+                f"Billboards {', '.join(map(str, sorted(missing)))} do not exist anymore."
+            )
         prices = [
             calculate_price(
-                billboard.price_per_month,
+                billboards[order["billboard_id"]].price_per_month,
                 order["start_month"],
                 order["start_year"],
                 order["end_month"],
                 order["end_year"],
             )
-            for billboard, order in zip(billboards, cart)
+            for order in order_rows
         ]
 
+        # Load the renter first, so the transaction never waits for a second pooled connection
+        renter = Renter.get_by_user_id(session["user_id"])
+
         # Begin transaction for order processing
         with cls.transaction(
                 current_app.config["db_config"][session["role"]]
         ) as cursor:
-            renter = Renter.get_by_user_id(session["user_id"])
+            # Lock the cart billboards, then check every row against their bookings at once
+            billboard_ids = {order_row["billboard_id"] for order_row in order_rows}
+            Billboard.lock_many(billboard_ids, cursor)
+            occupied_periods = Billboard.get_occupied_periods_many(billboard_ids, cursor=cursor)
+            AvailabilityIndex.replace(occupied_periods)
+            for order_row in order_rows:
+                start_date = datetime(
+                    order_row["start_year"], order_row["start_month"], 1
+                )
+                end_date = datetime(order_row["end_year"], order_row["end_month"], 1)
+
+                if is_period_overlaps(
+                        occupied_periods[order_row["billboard_id"]], start_date, end_date
+                ):
+                    raise ValueError(
+                        f"Selected period for billboard {order_row['billboard_id']} overlaps with existing bookings."
+                    )
+
+            registration_date = datetime.now().date()
             order_id = cls.insert(
                 cls.sql_provider.get(
                     "add_order.sql",
-                    registration_date=datetime.now().date(),
+                    registration_date=registration_date,
                     total_cost=sum(prices),
                     renter_id=renter.renter_id,
                 ),
@@ -406,32 +664,46 @@ class CheckoutHandler(BaseModel, metaclass=MetaSQL):
                 cursor=cursor,
             )
 
-            # Process each order row
-            for billboard, order_row, price in zip(billboards, order_rows, prices):
-                start_date = datetime(
-                    order_row["start_year"], order_row["start_month"], 1
-                )
-                end_date = datetime(order_row["end_year"], order_row["end_month"], 1)
-
-                if billboard.is_period_overlaps(start_date, end_date):
-                    raise ValueError(
-                        f"Selected period for billboard {billboard.billboard_id} overlaps with existing bookings."
+            # Write all order rows with a single multi-row insert
+            cls.insert_many(
+                cls.sql_provider.get("add_order_rows.sql"),
+                current_app.config["db_config"][session["role"]],
+                [
+                    (
+                        order_row["start_year"],
+                        order_row["start_month"],
+                        order_row["end_year"],
+                        order_row["end_month"],
+                        price,
+                        order_id,
+                        order_row["billboard_id"],
                     )
+                    for order_row, price in zip(order_rows, prices)
+                ],
+                cursor=cursor,
+            )
 
-                cls.insert(
-                    cls.sql_provider.get(
-                        "add_order_row.sql",
-                        start_year=order_row["start_year"],
-                        start_month=order_row["start_month"],
-                        end_year=order_row["end_year"],
-                        end_month=order_row["end_month"],
-                        price=price,
-                        order_id=order_id,
-                        billboard_id=order_row["billboard_id"],
-                    ),
-                    current_app.config["db_config"][session["role"]],
-                    cursor=cursor,
-                )
+        # Mark the committed periods as occupied
+        for order_row in order_rows:
+            AvailabilityIndex.add(
+                order_row["billboard_id"],
+                datetime(order_row["start_year"], order_row["start_month"], 1),
+                datetime(order_row["end_year"], order_row["end_month"], 1),
+            )
+
+        # Let the reports count the committed order
+        order_placed.send(
+            current_app._get_current_object(),
+            order_id=order_id,
+            registration_date=registration_date,
+            renter_id=renter.renter_id,
+            renter_name=" ".join(filter(None, (renter.last_name, renter.first_name))),
+            business_sphere=renter.business_sphere,
+            rows=[
+                (order_row["billboard_id"], billboards[order_row["billboard_id"]].billboard_address, price)
+                for order_row, price in zip(order_rows, prices)
+            ],
+        )
 
         # Clear the session cart after successful checkout
         session["cart"] = []
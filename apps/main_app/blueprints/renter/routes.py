@@ -1,8 +1,9 @@
-from flask import redirect, render_template, request, session, url_for
-from pymysql import ProgrammingError
+from flask import abort, redirect, render_template, request, send_file, session, url_for
+from pymysql import OperationalError, ProgrammingError
 from werkzeug import Response
 
 from .blueprint import renter_app
+from .images import ImageManifest, ImageVariants
 from .models import Billboard, CheckoutHandler, OrderHandler
 
 
@@ -111,6 +112,15 @@ def checkout_handler() -> str:
             error=str(e),
             total=total_cost,
         )
+    except OperationalError:
+        items = OrderHandler.get_cart()
+        total_cost = OrderHandler.get_total_cost(items)
+        return render_template(
+            "cart.html",
+            cart_items=items,
+            error="Checkout could not be completed right now. Please try again.",
+            total=total_cost,
+        )
     except ProgrammingError:
         return render_template("cart.html", error="Database error occurred during checkout.")
 
@@ -133,3 +143,49 @@ def remove_billboard_from_cart() -> str | Response:
         return render_template("cart.html", error="Failed to remove item from cart.")
 
     return redirect(url_for("renter.cart_handler"))
+
+
+@renter_app.route("/img/<variant>/<digest>/<int:billboard_id>.<extension>", methods=["GET"])
+def billboard_image_handler(variant: str, digest: str, billboard_id: int, extension: str) -> Response:
+    """
+    Handle GET requests for a resized billboard image.
+
+    The URL carries the content hash of the original image, so responses can be cached
+    by browsers forever. Requests with an outdated hash are redirected to the current URL.
+
+    Args:
+        variant (str): Name of the image size, e.g. "thumb" or "medium".
+        digest (str): Content hash of the original image.
+        billboard_id (int): The ID of the billboard.
+        extension (str): Image format, e.g. "webp" or "jpg".
+
+    Returns:
+        Response: The image, or a redirect to the URL of the current image.
+    """
+    image = ImageManifest.get(billboard_id)
+    if image is None:
+        abort(404)
+    if digest != image.digest:
+        return redirect(url_for(
+            "renter.billboard_image_handler",
+            variant=variant,
+            digest=image.digest,
+            billboard_id=billboard_id,
+            extension=extension,
+        ))
+
+    try:
+        variant_path = ImageVariants.get_path(image, billboard_id, variant, extension)
+    except KeyError:
+        abort(404)
+
+    response = send_file(
+        variant_path,
+        mimetype=ImageVariants.get_mimetype(extension),
+        etag=f"{image.digest}-{variant}-{extension}",
+        max_age=ImageVariants.MAX_AGE,
+        conditional=True,
+    )
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
@@ -1,8 +0,0 @@
-insert into advertising.order_row (start_year, start_month, end_year, end_month, price, order_id, billboard_id)
-values ("$start_year",
-        "$start_month",
-        "$end_year",
-        "$end_month",
-        "$price",
-        "$order_id",
-        "$billboard_id");
\ No newline at end of file
@@ -0,0 +1,2 @@
+insert into advertising.order_row (start_year, start_month, end_year, end_month, price, order_id, billboard_id)
+values (%s, %s, %s, %s, %s, %s, %s);
\ No newline at end of file
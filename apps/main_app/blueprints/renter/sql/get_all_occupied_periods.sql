@@ -0,0 +1,5 @@
+select billboard_id, start_month, start_year, end_month, end_year, order_row_id, null
+from advertising.order_row
+union all
+select billboard_id, start_month, start_year, end_month, end_year, null, schedule_id
+from advertising.schedule;
\ No newline at end of file
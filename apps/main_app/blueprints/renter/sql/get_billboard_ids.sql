@@ -0,0 +1,2 @@
+select billboard_id
+from advertising.billboards;
\ No newline at end of file
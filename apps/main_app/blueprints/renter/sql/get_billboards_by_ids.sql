@@ -0,0 +1,3 @@
+select billboard_id, price_per_month, size, billboard_address, mount_date, quality, owner_id
+from advertising.billboards
+where billboard_id in ($billboard_ids);
\ No newline at end of file
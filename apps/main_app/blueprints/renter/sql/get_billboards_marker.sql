@@ -0,0 +1,2 @@
+select count(*), max(updated_at)
+from advertising.billboards;
\ No newline at end of file
@@ -0,0 +1,7 @@
+select billboard_id, start_month, start_year, end_month, end_year, order_row_id, null
+from advertising.order_row
+where order_row_id > $after_order_row_id
+union all
+select billboard_id, start_month, start_year, end_month, end_year, null, schedule_id
+from advertising.schedule
+where schedule_id > $after_schedule_id;
\ No newline at end of file
@@ -0,0 +1,7 @@
+select billboard_id, start_month, start_year, end_month, end_year
+from advertising.order_row
+where billboard_id in ($billboard_ids)
+union all
+select billboard_id, start_month, start_year, end_month, end_year
+from advertising.schedule
+where billboard_id in ($billboard_ids);
\ No newline at end of file
@@ -0,0 +1,5 @@
+select billboard_id
+from advertising.billboards
+where billboard_id in ($billboard_ids)
+order by billboard_id
+for update;
\ No newline at end of file
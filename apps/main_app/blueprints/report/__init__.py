@@ -1,2 +1,3 @@
+from . import events as events
 from . import routes as routes
 from .blueprint import report_app as report_app
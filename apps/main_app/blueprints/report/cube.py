@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from datetime import date
+from decimal import Decimal
+from typing import Any, Callable, ClassVar, Dict, Iterable, List, Optional, Set, Tuple
+
+from apps.common.database.base_model import BaseModel
+from apps.common.database.sql_provider import SQLProvider
+from apps.common.meta import MetaSQL
+from flask import current_app, session
+
+logger = logging.getLogger(__name__)
+
+
+def city_from_address(address: str) -> str:
+    """
+    Extracts the city from a billboard address, as the `city` column of `billboards` does.
+
+    Arguments:
+        address (str): Address like 'г. Омск, ул. Гоголя, 5'.
+
+    Returns:
+        str: The city, e.g. 'Омск'.
+    """
+    return address.split(",", 1)[0].rsplit(". ", 1)[-1].strip()
+
+
+def format_month(index: int) -> str:
+    """
+    Formats a sequential month number as MM/YYYY.
+
+    Arguments:
+        index (int): Number of months since January of year 0.
+
+    Returns:
+        str: The month in MM/YYYY format.
+    """
+    return f"{index % 12 + 1:02d}/{index // 12}"
+
+
+class RevenueCube(BaseModel, metaclass=MetaSQL):
+    """
+    Process-wide pre-aggregated order revenue for slicing reports without a stored procedure.
+
+    Revenue and the number of order rows are summed per cell of (registration month,
+    renter, billboard); business spheres and cities are looked up per renter and billboard,
+    so any roll-up is a single pass over the cells. The cube is built by streaming all
+    orders once, then extended with orders newer than the last seen order ID minus
+    `ID_MARGIN` every `REFRESH_INTERVAL` seconds and with orders committed by this worker
+    right after checkout. Orders are counted once by ID. It is rebuilt from scratch every
+    `FULL_RELOAD_INTERVAL` seconds.
+
+    Attributes:
+        DIMENSIONS (Dict[str, str]): Column names of the supported roll-up dimensions.
+        REFRESH_INTERVAL (float): Seconds between two reads of new orders.
+        FULL_RELOAD_INTERVAL (float): Seconds after which the cube is rebuilt.
+        ID_MARGIN (int): How many order IDs before the last seen one are read again on every refresh.
+    """
+    sql_provider: SQLProvider
+
+    DIMENSIONS: ClassVar[Dict[str, str]] = {
+        "business_sphere": "Business sphere",
+        "renter": "Renter",
+        "billboard": "Billboard id",
+        "city": "City",
+        "month": "Month",
+    }
+    REFRESH_INTERVAL: ClassVar[float] = 30.0
+    FULL_RELOAD_INTERVAL: ClassVar[float] = 3600.0
+    # Order IDs are allocated before commit, so an order may become visible after a higher
+    # one was read. A margin of recent IDs is read again and orders already counted are skipped.
+    ID_MARGIN: ClassVar[int] = 1000
+
+    _cells: ClassVar[Dict[Tuple[int, int, int], List[Any]]] = {}
+    _renters: ClassVar[Dict[int, Tuple[str, str]]] = {}
+    _cities: ClassVar[Dict[int, str]] = {}
+    _max_order_id: ClassVar[int] = 0
+    _counted_orders: ClassVar[Set[int]] = set()
+    _loaded_at: ClassVar[Optional[float]] = None
+    _refreshed_at: ClassVar[float] = 0.0
+    _lock: ClassVar[threading.RLock] = threading.RLock()
+
+    @classmethod
+    def rollup(
+            cls, dimension: str, start_month: int, end_month: int
+    ) -> List[Tuple[Any, Decimal, int]]:
+        """
+        Sums revenue and order rows of a month range by one dimension.
+
+        Args:
+            dimension (str): One of `DIMENSIONS`.
+            start_month (int): First month as a sequential month number (year * 12 + month - 1).
+            end_month (int): Last month as a sequential month number.
+
+        Returns:
+            List[Tuple[Any, Decimal, int]]: Rows of (dimension value, revenue, order rows),
+            by descending revenue; months are listed chronologically instead.
+
+        Raises:
+            KeyError: If the dimension is unknown.
+        """
+        key_of: Callable[[int, int, int], Any] = {
+            "business_sphere": lambda month, renter, billboard: cls._renters.get(renter, ("", ""))[1],
+            "renter": lambda month, renter, billboard: renter,
+            "billboard": lambda month, renter, billboard: billboard,
+            "city": lambda month, renter, billboard: cls._cities.get(billboard, ""),
+            "month": lambda month, renter, billboard: month,
+        }[dimension]
+        cls._ensure_fresh()
+
+        totals: Dict[Any, List[Any]] = {}
+        with cls._lock:
+            for (month, renter, billboard), (revenue, count) in cls._cells.items():
+                if start_month <= month <= end_month:
+                    total = totals.setdefault(key_of(month, renter, billboard), [Decimal(0), 0])
+                    total[0] += revenue
+                    total[1] += count
+
+        if dimension == "month":
+            return [(format_month(month), revenue, count) for month, (revenue, count) in sorted(totals.items())]
+        rows = sorted(
+            ((key, revenue, count) for key, (revenue, count) in totals.items()),
+            key=lambda row: (-row[1], str(row[0])),
+        )
+        if dimension == "renter":
+            # Renters are grouped by ID, so namesakes stay apart; the name is only the label.
+            with cls._lock:
+                return [
+                    (cls._renters.get(renter, (str(renter), ""))[0], revenue, count)
+                    for renter, revenue, count in rows
+                ]
+        return rows
+
+    @classmethod
+    def add_order(
+            cls,
+            order_id: int,
+            registration_date: date,
+            renter_id: int,
+            renter_name: str,
+            business_sphere: str,
+            rows: Iterable[Tuple[int, str, Any]],
+    ) -> None:
+        """
+        Adds a committed order, so it is visible without waiting for the next refresh.
+
+        Args:
+            order_id (int): ID of the order.
+            registration_date (date): Registration date of the order.
+            renter_id (int): ID of the renter.
+            renter_name (str): Display name of the renter.
+            business_sphere (str): Business sphere of the renter.
+            rows (Iterable[Tuple[int, str, Any]]): (billboard_id, billboard_address, price) of every order row.
+        """
+        if cls._loaded_at is None:
+            return
+        month = registration_date.year * 12 + registration_date.month - 1
+        with cls._lock:
+            if order_id in cls._counted_orders:
+                return
+            cls._counted_orders.add(order_id)
+            cls._renters[int(renter_id)] = (renter_name, business_sphere)
+            for billboard_id, address, price in rows:
+                cls._cities.setdefault(int(billboard_id), city_from_address(address))
+                cls._add_cell(month, int(renter_id), int(billboard_id), price)
+
+    @classmethod
+    def refresh(cls, full: bool = False) -> None:
+        """
+        Reads orders newer than the last seen one minus `ID_MARGIN`, or rebuilds the whole cube.
+
+        Rows are streamed and aggregated outside the lock, so roll-ups keep being answered
+        from the previous state while the cube is refreshed.
+
+        Args:
+            full (bool): Rebuild the cube from all orders.
+        """
+        started = time.monotonic()
+        rows = cls.stream(
+            cls.sql_provider.get(
+                "get_order_revenue.sql", after_order_id=0 if full else max(0, cls._max_order_id - cls.ID_MARGIN)
+            ),
+            current_app.config["db_config"][session["role"]],
+        )
+        if not full:
+            new_rows = list(rows)
+            with cls._lock:
+                # All rows of an order commit together, so an order is either counted whole or not at all.
+                added: Set[int] = set()
+                for order_id, year, month, renter_id, renter_name, sphere, billboard_id, city, price in new_rows:
+                    cls._renters[renter_id] = (renter_name, sphere)
+                    cls._cities[billboard_id] = city
+                    if order_id in added or order_id not in cls._counted_orders:
+                        added.add(order_id)
+                        cls._add_cell(year * 12 + month - 1, renter_id, billboard_id, price)
+                    cls._max_order_id = max(cls._max_order_id, order_id)
+                cls._counted_orders = cls._recent(cls._counted_orders | added, cls._max_order_id)
+                cls._refreshed_at = time.monotonic()
+            return
+
+        cells: Dict[Tuple[int, int, int], List[Any]] = {}
+        renters: Dict[int, Tuple[str, str]] = {}
+        cities: Dict[int, str] = {}
+        max_order_id = 0
+        counted: Set[int] = set()
+        for order_id, year, month, renter_id, renter_name, sphere, billboard_id, city, price in rows:
+            max_order_id = max(max_order_id, order_id)
+            counted.add(order_id)
+            renters[renter_id] = (renter_name, sphere)
+            cities[billboard_id] = city
+            cell = cells.setdefault((year * 12 + month - 1, renter_id, billboard_id), [Decimal(0), 0])
+            cell[0] += price
+            cell[1] += 1
+        with cls._lock:
+            cls._cells, cls._renters, cls._cities = cells, renters, cities
+            cls._max_order_id = max_order_id
+            # Orders committed while streaming are picked up by the next incremental refresh.
+            cls._counted_orders = cls._recent(counted, max_order_id)
+            cls._loaded_at = cls._refreshed_at = time.monotonic()
+        logger.info(f"Revenue cube built with {len(cells)} cells in {time.monotonic() - started:.2f}s")
+
+    @classmethod
+    def _ensure_fresh(cls) -> None:
+        now = time.monotonic()
+        if cls._loaded_at is None or now - cls._loaded_at > cls.FULL_RELOAD_INTERVAL:
+            cls.refresh(full=True)
+        elif now - cls._refreshed_at > cls.REFRESH_INTERVAL:
+            cls.refresh()
+
+    @classmethod
+    def _recent(cls, order_ids: Set[int], max_order_id: int) -> Set[int]:
+        """Keeps the IDs that later refreshes may read again."""
+        return {order_id for order_id in order_ids if order_id > max_order_id - cls.ID_MARGIN}
+
+    @classmethod
+    def _add_cell(cls, month: int, renter_id: int, billboard_id: int, price: Any) -> None:
+        cell = cls._cells.setdefault((month, renter_id, billboard_id), [Decimal(0), 0])
+        cell[0] += Decimal(str(price))
+        cell[1] += 1
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import logging
+from datetime import date
+from os import environ
+from typing import Any, ClassVar, Dict, List, Optional, Set, Tuple
+
+from apps.common.cache import SharedVersion, TTLCache
+from apps.common.database.base_model import BaseModel
+from apps.common.database.sql_provider import SQLProvider
+from apps.common.meta import MetaSQL
+from flask import current_app, session
+from pymysql import OperationalError
+from pymysql.converters import escape_item
+
+logger = logging.getLogger(__name__)
+
+
+class ReportEngine(BaseModel, metaclass=MetaSQL):
+    """
+    Compiles declarative report definitions into a single aggregate query over orders.
+
+    A definition from `report_config.json` with the "query" source names its `dimensions`,
+    `measures` and optional `filters`, `rollup` and `order_by`; the engine joins only the
+    tables those fields need, restricts orders to the requested months with a range on
+    `registration_date`, and groups by the dimensions, adding subtotal and total rows
+    with ``WITH ROLLUP``. Results are cached per compiled query until an order is placed
+    anywhere on the host, and the plan of every report is checked once per worker with
+    EXPLAIN, logging a warning when orders or order rows are read without an index.
+
+    Attributes:
+        FIELDS (Dict[str, Tuple[str, Optional[str]]]): Expression and required join of every field
+            usable as a dimension or filter.
+        MEASURES (Dict[str, str]): Aggregate expression of every measure.
+        JOINS (Dict[str, str]): Join clauses of the tables fields can come from.
+        INDEXED_TABLES (Tuple[str, ...]): Aliases of the tables that must not be scanned in full.
+        result_cache (TTLCache): Report rows by compiled query, invalidated through `invalidate_cache`.
+    """
+    sql_provider: SQLProvider
+
+    FIELDS: ClassVar[Dict[str, Tuple[str, Optional[str]]]] = {
+        "business_sphere": ("r.business_sphere", "renters"),
+        "renter": ("concat_ws(' ', r.last_name, r.first_name)", "renters"),
+        "billboard": ("orw.billboard_id", None),
+        "city": ("b.city", "billboards"),
+        "quality": ("b.quality", "billboards"),
+        "owner": ("b.owner_id", "billboards"),
+        "year": ("year(o.registration_date)", None),
+        "month": ("date_format(o.registration_date, '%Y-%m')", None),
+    }
+    MEASURES: ClassVar[Dict[str, str]] = {
+        "revenue": "sum(orw.price)",
+        "orders": "count(distinct o.order_id)",
+        "order_rows": "count(*)",
+        "renters": "count(distinct o.renter_id)",
+        "average_price": "round(avg(orw.price), 2)",
+    }
+    JOINS: ClassVar[Dict[str, str]] = {
+        "renters": "join advertising.renters r on r.renter_id = o.renter_id",
+        "billboards": "join advertising.billboards b on b.billboard_id = orw.billboard_id",
+    }
+    INDEXED_TABLES: ClassVar[Tuple[str, ...]] = ("o", "orw")
+
+    result_cache = TTLCache(
+        max_size=int(environ.get("REPORT_CACHE_SIZE", 128)),
+        ttl=float(environ.get("REPORT_CACHE_TTL", 300)),
+        version=SharedVersion("orders"),
+    )
+    _checked_plans: ClassVar[Set[str]] = set()
+
+    @classmethod
+    def compile(cls, config: Dict[str, Any], start_month: int, end_month: int) -> str:
+        """
+        Builds the aggregate query of a report definition.
+
+        Args:
+            config (Dict[str, Any]): Report definition with `dimensions` and `measures`.
+            start_month (int): First month as a sequential month number (year * 12 + month - 1).
+            end_month (int): Last month as a sequential month number.
+
+        Returns:
+            str: The SQL query.
+
+        Raises:
+            KeyError: If the definition uses an unknown field or measure.
+            ValueError: If a filter is malformed.
+        """
+        dimensions = [cls.FIELDS[name][0] for name in config["dimensions"]]
+        measures = [cls.MEASURES[name] for name in config["measures"]]
+        filters = config.get("filters", {})
+        rollup = config.get("rollup", False)
+
+        tables = {cls.FIELDS[name][1] for name in [*config["dimensions"], *filters]}
+        columns = [
+            f"if(grouping({expression}), 'Total', {expression}) as `{name}`" if rollup
+            else f"{expression} as `{name}`"
+            for name, expression in zip(config["dimensions"], dimensions)
+        ]
+        columns += [f"{expression} as `{name}`" for name, expression in zip(config["measures"], measures)]
+
+        order_by = [f"grouping({expression})" for expression in dimensions] if rollup else []
+        for name in config.get("order_by", config["dimensions"]):
+            column = name.lstrip("-")
+            if column not in config["dimensions"] and column not in config["measures"]:
+                raise KeyError(column)
+            order_by.append(f"`{column}` desc" if name.startswith("-") else f"`{column}`")
+
+        start_year, start = divmod(start_month, 12)
+        end_year, end = divmod(end_month + 1, 12)
+        return cls.sql_provider.get(
+            "compiled_report.sql",
+            columns=", ".join(columns),
+            joins=" ".join(cls.JOINS[table] for table in sorted(tables - {None})),
+            start_date=date(start_year, start + 1, 1).isoformat(),
+            end_date=date(end_year, end + 1, 1).isoformat(),
+            filters="".join(f" and {cls._compile_filter(name, value)}" for name, value in filters.items()),
+            group_by=", ".join(dimensions),
+            rollup=" with rollup" if rollup else "",
+            order_by=", ".join(order_by),
+        )
+
+    @classmethod
+    def run(
+            cls, report_type: str, config: Dict[str, Any], start_month: int, end_month: int
+    ) -> Tuple[Tuple[Any, ...], ...]:
+        """
+        Returns the rows of a report for a range of months.
+
+        Args:
+            report_type (str): Name of the report, used to check its plan once.
+            config (Dict[str, Any]): Report definition.
+            start_month (int): First month as a sequential month number.
+            end_month (int): Last month as a sequential month number.
+
+        Returns:
+            Tuple[Tuple[Any, ...], ...]: Dimension values followed by measures, totals last.
+
+        Raises:
+            KeyError: If the definition uses an unknown field or measure.
+            OperationalError: If the query fails.
+        """
+        sql_query = cls.compile(config, start_month, end_month)
+        db_config = current_app.config["db_config"][session["role"]]
+        if report_type not in cls._checked_plans:
+            cls._checked_plans.add(report_type)
+            cls.check_plan(report_type, sql_query, db_config)
+        return cls.result_cache.get_or_load(sql_query, lambda: cls.fetch_all(sql_query, db_config))
+
+    @classmethod
+    def check_plan(cls, report_type: str, sql_query: str, db_config: Dict[str, Any]) -> List[str]:
+        """
+        Runs EXPLAIN on a compiled report and warns about full scans of order tables.
+
+        Args:
+            report_type (str): Name of the report, used in the warnings.
+            sql_query (str): Compiled query of the report.
+            db_config (Dict[str, Any]): Database configuration.
+
+        Returns:
+            List[str]: Aliases of the order tables read without an index.
+        """
+        try:
+            plan = cls.fetch_all(f"explain {sql_query}", db_config)
+        except OperationalError as e:
+            logger.warning(f"Could not explain report '{report_type}': {e}")
+            return []
+        # Columns of traditional EXPLAIN output: id, select_type, table, partitions, type, possible_keys, key, ...
+        scanned = [row[2] for row in plan if row[2] in cls.INDEXED_TABLES and row[4] == "ALL"]
+        for table in scanned:
+            logger.warning(f"Report '{report_type}' reads every row of '{table}'; check the indexes of migrations")
+        return scanned
+
+    @classmethod
+    def invalidate_cache(cls) -> None:
+        """Drops cached report rows in every worker process, e.g. after an order is placed."""
+        cls.result_cache.version.bump()  # type: ignore
+
+    @classmethod
+    def _compile_filter(cls, name: str, value: Any) -> str:
+        """
+        Builds the condition of one filter.
+
+        A list matches any of its values and a dict with "min" and/or "max" matches an
+        inclusive range; any other value matches itself. Values are escaped as literals.
+        """
+        expression = cls.FIELDS[name][0]
+        if isinstance(value, list):
+            if not value:
+                raise ValueError(f"Empty filter: '{name}'")
+            return f"{expression} in ({', '.join(escape_item(item, 'utf8mb4') for item in value)})"
+        if isinstance(value, dict):
+            if not value.keys() & {"min", "max"} or value.keys() - {"min", "max"}:
+                raise ValueError(f"Invalid range filter: '{name}'")
+            bounds = [
+                f"{expression} {operator} {escape_item(value[key], 'utf8mb4')}"
+                for key, operator in (("min", ">="), ("max", "<="))
+                if key in value
+            ]
+            return " and ".join(bounds)
+        return f"{expression} = {escape_item(value, 'utf8mb4')}"
@@ -0,0 +1,19 @@
+from typing import Any
+
+from apps.common.signals import order_placed
+
+from .cube import RevenueCube
+from .engine import ReportEngine
+
+
+@order_placed.connect
+def count_placed_order(sender: Any, **order: Any) -> None:
+    """
+    Counts an order committed by this worker in the revenue cube and drops cached report rows.
+
+    Args:
+        sender (Any): The application that placed the order.
+        **order (Any): The order as sent with `order_placed`.
+    """
+    RevenueCube.add_order(**order)
+    ReportEngine.invalidate_cache()
@@ -0,0 +1,303 @@
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, ClassVar, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ReportQueueFullError(Exception):
+    """Raised when a worker already has `ReportJobQueue.MAX_PENDING` unfinished jobs."""
+
+
+@dataclass
+class ReportJob:
+    """
+    State of a background report generation job.
+
+    Attributes:
+        job_id (str): Unique ID of the job.
+        report_type (str): The type of report being created.
+        year (int): The year for the report.
+        month (int): The month for the report.
+        status (str): One of "queued", "running", "done" and "failed".
+        message (str): Result of the stored procedure or the error description.
+        created_at (float): UNIX time the job was enqueued.
+        updated_at (float): UNIX time of the last status change.
+        owner (str): ID of the worker process that runs the job.
+        heartbeat_at (float): UNIX time the owner last reported that it is alive.
+    """
+
+    job_id: str
+    report_type: str
+    year: int
+    month: int
+    status: str
+    message: str
+    created_at: float
+    updated_at: float
+    owner: str
+    heartbeat_at: float
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+
+class ReportJobQueue:
+    """
+    Queue of report generation jobs run on a bounded thread pool.
+
+    Job state lives in a SQLite file shared by every worker process on the host, so the
+    status of a job can be polled through any worker, and a request for a report that is
+    already queued or running anywhere returns the existing job instead of a new one.
+    Jobs run in the worker that enqueued them, which refreshes their heartbeat every
+    `HEARTBEAT_INTERVAL` seconds while it has unfinished jobs; a job whose heartbeat is older
+    than `LOST_AFTER` seconds belonged to a worker that died and is reported as failed.
+
+    Attributes:
+        DB_PATH (str): Path of the SQLite file with job state.
+        MAX_WORKERS (int): Number of jobs run concurrently by one worker process.
+        MAX_PENDING (int): Most unfinished jobs one worker process accepts.
+        HEARTBEAT_INTERVAL (float): Seconds between heartbeats of a worker with unfinished jobs.
+        LOST_AFTER (float): Seconds without a heartbeat after which an unfinished job is considered lost.
+        KEEP_FOR (float): Seconds finished jobs are kept for polling.
+    """
+
+    DB_PATH: ClassVar[str] = os.environ.get(
+        "REPORT_JOB_DB", os.path.join(tempfile.gettempdir(), "advertising_report_jobs.sqlite3")
+    )
+    MAX_WORKERS: ClassVar[int] = int(os.environ.get("REPORT_JOB_WORKERS", 2))
+    MAX_PENDING: ClassVar[int] = int(os.environ.get("REPORT_JOB_MAX_PENDING", 128))
+    HEARTBEAT_INTERVAL: ClassVar[float] = float(os.environ.get("REPORT_JOB_HEARTBEAT_INTERVAL", 5))
+    LOST_AFTER: ClassVar[float] = float(os.environ.get("REPORT_JOB_LOST_AFTER", 30))
+    KEEP_FOR: ClassVar[float] = 24 * 60 * 60
+
+    _executor: ClassVar[Optional[ThreadPoolExecutor]] = None
+    _executor_lock: ClassVar[threading.Lock] = threading.Lock()
+    _schema_ready: ClassVar[bool] = False
+    _owner: ClassVar[str] = uuid.uuid4().hex
+    _pending: ClassVar[int] = 0
+    _heartbeat: ClassVar[Optional[threading.Thread]] = None
+    _pending_lock: ClassVar[threading.Lock] = threading.Lock()
+
+    @classmethod
+    def submit(
+            cls, report_type: str, year: int, month: int, task: Callable[[], str]
+    ) -> ReportJob:
+        """
+        Enqueues a job, or returns the unfinished job for the same report.
+
+        Args:
+            report_type (str): The type of report to create.
+            year (int): The year for the report.
+            month (int): The month for the report.
+            task (Callable[[], str]): Creates the report and returns "OK" or an error message.
+
+        Returns:
+            ReportJob: The new or the already running job.
+
+        Raises:
+            ReportQueueFullError: If a new job is needed and this worker already has `MAX_PENDING` unfinished jobs.
+        """
+        reserved = submitted = False
+        try:
+            now = time.time()
+            with cls._connect() as connection:
+                connection.execute("begin immediate")
+                cls._expire(connection, now)
+                row = connection.execute(
+                    "select * from report_jobs"
+                    " where report_type = ? and year = ? and month = ? and status in ('queued', 'running')",
+                    (report_type, year, month),
+                ).fetchone()
+                if row is not None:
+                    logger.info(f"Report job {row['job_id']} is already pending for {report_type} {month}/{year}")
+                    return cls._to_job(row)
+                cls._reserve()
+                reserved = True
+                job = ReportJob(uuid.uuid4().hex, report_type, year, month, "queued", "", now, now, cls._owner, now)
+                connection.execute(
+                    "insert into report_jobs (job_id, report_type, year, month, status, message,"
+                    " created_at, updated_at, owner, heartbeat_at) values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (job.job_id, job.report_type, job.year, job.month, job.status,
+                     job.message, job.created_at, job.updated_at, job.owner, job.heartbeat_at),
+                )
+            cls._get_executor().submit(cls._run, job.job_id, task)
+            submitted = True
+        finally:
+            # Once the job is handed to the executor, it frees its reserved slot itself.
+            if reserved and not submitted:
+                cls._release()
+        return job
+
+    @classmethod
+    def get(cls, job_id: str) -> Optional[ReportJob]:
+        """
+        Returns the current state of a job.
+
+        Args:
+            job_id (str): ID of the job.
+
+        Returns:
+            Optional[ReportJob]: The job, or None if it is unknown or was cleaned up.
+        """
+        with cls._connect() as connection:
+            row = connection.execute(
+                "select * from report_jobs where job_id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job = cls._to_job(row)
+        if not job.is_finished and time.time() - job.heartbeat_at > cls.LOST_AFTER:
+            job.status, job.message = "failed", "Report generation was interrupted"
+        return job
+
+    @classmethod
+    def _run(cls, job_id: str, task: Callable[[], str]) -> None:
+        try:
+            cls._update(job_id, "running", "")
+            try:
+                message = task()
+            except Exception as e:
+                logger.error(f"Report job {job_id} failed: {e}")
+                cls._update(job_id, "failed", "Error has occurred")
+                return
+            cls._update(job_id, "done" if message == "OK" else "failed", message)
+        finally:
+            cls._release()
+
+    @classmethod
+    def _reserve(cls) -> None:
+        """Counts a new unfinished job of this worker and makes sure its heartbeat runs."""
+        with cls._pending_lock:
+            if cls._pending >= cls.MAX_PENDING:
+                raise ReportQueueFullError(f"At most {cls.MAX_PENDING} reports can be pending at once.")
+            cls._pending += 1
+            if cls._heartbeat is None:
+                cls._heartbeat = threading.Thread(target=cls._beat, name="report-job-heartbeat", daemon=True)
+                cls._heartbeat.start()
+
+    @classmethod
+    def _release(cls) -> None:
+        with cls._pending_lock:
+            cls._pending -= 1
+
+    @classmethod
+    def _beat(cls) -> None:
+        """Refreshes the heartbeat of the jobs of this worker until none of them is left unfinished."""
+        while True:
+            time.sleep(cls.HEARTBEAT_INTERVAL)
+            with cls._pending_lock:
+                if not cls._pending:
+                    cls._heartbeat = None
+                    return
+            try:
+                with cls._connect() as connection:
+                    connection.execute(
+                        "update report_jobs set heartbeat_at = ?"
+                        " where owner = ? and status in ('queued', 'running')",
+                        (time.time(), cls._owner),
+                    )
+            except sqlite3.Error as e:
+                logger.error(f"Report job heartbeat failed: {e}")
+
+    @classmethod
+    def _update(cls, job_id: str, status: str, message: str) -> None:
+        with cls._connect() as connection:
+            connection.execute(
+                "update report_jobs set status = ?, message = ?, updated_at = ? where job_id = ?",
+                (status, message, time.time(), job_id),
+            )
+
+    @classmethod
+    def _expire(cls, connection: sqlite3.Connection, now: float) -> None:
+        """Fails jobs lost with their worker and forgets old finished jobs."""
+        connection.execute(
+            "update report_jobs set status = 'failed', message = 'Report generation was interrupted'"
+            " where status in ('queued', 'running') and heartbeat_at < ?",
+            (now - cls.LOST_AFTER,),
+        )
+        connection.execute(
+            "delete from report_jobs where status in ('done', 'failed') and updated_at < ?",
+            (now - cls.KEEP_FOR,),
+        )
+
+    @classmethod
+    def _connect(cls) -> _ClosingConnection:
+        connection = sqlite3.connect(cls.DB_PATH, timeout=10, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        if not cls._schema_ready:
+            connection.execute("begin immediate")
+            connection.execute(
+                "create table if not exists report_jobs ("
+                " job_id text primary key, report_type text not null, year integer not null,"
+                " month integer not null, status text not null, message text not null,"
+                " created_at real not null, updated_at real not null,"
+                " owner text not null default '', heartbeat_at real not null default 0)"
+            )
+            columns = {column["name"] for column in connection.execute("pragma table_info(report_jobs)")}
+            # Files created before heartbeats lack the columns; their unfinished jobs expire at once.
+            if "owner" not in columns:
+                connection.execute("alter table report_jobs add column owner text not null default ''")
+            if "heartbeat_at" not in columns:
+                connection.execute("alter table report_jobs add column heartbeat_at real not null default 0")
+            connection.execute(
+                "create index if not exists report_jobs_period_idx on report_jobs (report_type, year, month)"
+            )
+            connection.execute("commit")
+            cls._schema_ready = True
+        return _ClosingConnection(connection)
+
+    @classmethod
+    def _get_executor(cls) -> ThreadPoolExecutor:
+        if cls._executor is None:
+            with cls._executor_lock:
+                if cls._executor is None:
+                    cls._executor = ThreadPoolExecutor(
+                        max_workers=cls.MAX_WORKERS, thread_name_prefix="report-job"
+                    )
+        return cls._executor
+
+    @classmethod
+    def _reset_after_fork(cls) -> None:
+        """Drops the executor and the jobs inherited from the parent, whose threads do not exist in the child."""
+        cls._executor = None
+        cls._executor_lock = threading.Lock()
+        cls._owner = uuid.uuid4().hex
+        cls._pending = 0
+        cls._heartbeat = None
+        cls._pending_lock = threading.Lock()
+
+    @staticmethod
+    def _to_job(row: sqlite3.Row) -> ReportJob:
+        return ReportJob(**{key: row[key] for key in row.keys()})
+
+
+class _ClosingConnection:
+    """Wraps a SQLite connection in autocommit mode so ``with`` commits an explicit transaction and closes it."""
+
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+
+    def __enter__(self) -> sqlite3.Connection:
+        return self.connection
+
+    def __exit__(self, exc_type: Any, exc: Any, traceback: Any) -> None:
+        try:
+            if self.connection.in_transaction:
+                self.connection.execute("rollback" if exc_type else "commit")
+        finally:
+            self.connection.close()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=ReportJobQueue._reset_after_fork)
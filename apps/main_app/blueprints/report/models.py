@@ -1,14 +1,20 @@
 import json
 import logging
 from dataclasses import dataclass, field
-from typing import List, Optional, Tuple
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 
 from apps.common.database.base_model import BaseModel
 from apps.common.database.sql_provider import SQLProvider
 from apps.common.meta import MetaSQL
+from apps.common.pagination import NO_LIMIT, clamp_page_size, decode_cursor, encode_cursor
 from flask import current_app, session
 from pymysql import OperationalError
 
+from .cube import RevenueCube
+from .engine import ReportEngine
+from .jobs import ReportJob, ReportJobQueue
+
 logger = logging.getLogger(__name__)
 
 
@@ -23,6 +29,7 @@ class ReportResponse:
         column_names (Optional[List[str]]): Names of the columns in the report.
         report_desc (Optional[str]): description of the report.
         result (Optional[Tuple[Tuple, ...]]): The fetched report data.
+        next_cursor (Optional[str]): Cursor token of the next page, if more rows follow.
     """
 
     error_message: str
@@ -30,6 +37,7 @@ class ReportResponse:
     column_names: Optional[List[str]] = field(default=None)
     report_desc: Optional[str] = field(default=None)
     result: Optional[Tuple[Tuple[str, ...], ...]] = field(default=None)
+    next_cursor: Optional[str] = field(default=None)
 
 
 class ReportManager(BaseModel, metaclass=MetaSQL):
@@ -39,8 +47,10 @@ class ReportManager(BaseModel, metaclass=MetaSQL):
     Attributes:
         report_config (dict): Configuration for available report scenarios.
         sql_provider(SQLProvider): SQLProvider instance.
+        MAX_BATCH_MONTHS (int): Longest range of months a batch may cover.
     """
     sql_provider: SQLProvider
+    MAX_BATCH_MONTHS = 120
     try:
         with open("apps/main_app/data/report_config.json", "r") as file:
             report_config = json.load(file)
@@ -48,64 +58,241 @@ class ReportManager(BaseModel, metaclass=MetaSQL):
         report_config = {}
 
     @classmethod
-    def create_report(cls, report_type: str, month: int, year: int) -> str:
+    def create_report(
+            cls,
+            report_type: str,
+            month: int,
+            year: int,
+            db_config: Optional[Dict[str, Any]] = None,
+            replace: bool = False,
+    ) -> str:
         """
         Generates a report by calling a stored procedure.
 
+        A report generated after its month ended is final, so it is kept without calling
+        the procedure unless `replace` is set. Otherwise the rows of the period are deleted
+        and the procedure is called in one transaction, which replaces an existing report
+        atomically: readers see either the old or the new rows.
+
         Args:
             report_type (str): The type of report to create.
             month (int): The month for the report.
             year (int): The year for the report.
+            db_config (Optional[Dict[str, Any]]): Database configuration; defaults to the one of the session role.
+            replace (bool): Regenerate the report even if it is up to date.
 
         Returns:
             str: The status message or result of the procedure.
         """
         try:
-            result = cls.call_procedure(
-                cls.report_config[report_type]["procedure_name"],
-                current_app.config["db_config"][session["role"]],
-                year,
-                month,
-            )
+            db_config = db_config or current_app.config["db_config"][session["role"]]
+            config = cls.report_config[report_type]
+            if not replace and cls.is_report_current(report_type, month, year, db_config):
+                logger.info(f"Report {report_type} for {month}/{year} is up to date, skipping generation")
+                return "OK"
+            with cls.transaction(db_config) as cursor:
+                cls.execute_query(
+                    cls.sql_provider.get("delete_report.sql", table=config["table"], year=year, month=month),
+                    db_config,
+                    cursor,
+                )
+                result = cls.call_procedure(config["procedure_name"], db_config, year, month, cursor=cursor)
+                # Reads the status result set of CALL, so the transaction can be committed.
+                while cursor.nextset():
+                    pass
+                message = result[0][0] if result else "Error has occurred"
+                if message != "OK":
+                    raise _ReportRejected(message)
             logger.info(f"Report created successfully: {result}")
-            return result[0][0] if result else "Error has occurred"
+            return message
+        except _ReportRejected as e:
+            logger.error(f"Report procedure rejected {report_type} for {month}/{year}: {e}")
+            return str(e)
         except Exception as e:
             logger.error(f"Failed to create report: {e}")
             return "Error has occurred"
 
     @classmethod
-    def get_report(cls, report_type: str, month: int, year: int) -> ReportResponse:
+    def is_report_current(
+            cls, report_type: str, month: int, year: int, db_config: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """
+        Checks whether a stored report exists and was generated after its month ended.
+
+        Orders are registered on the day they are placed, so such a report cannot change.
+        The check reads the period through the unique (year, month, business_sphere) index.
+
+        Args:
+            report_type (str): The type of report.
+            month (int): The month for the report.
+            year (int): The year for the report.
+            db_config (Optional[Dict[str, Any]]): Database configuration; defaults to the one of the session role.
+
+        Returns:
+            bool: Whether the stored report is final.
+
+        Raises:
+            KeyError: If the report type is unknown.
+            OperationalError: If the report table cannot be read.
+        """
+        row = cls.fetch_one(
+            cls.sql_provider.get(
+                "get_report_status.sql", table=cls.report_config[report_type]["table"], year=year, month=month
+            ),
+            db_config or current_app.config["db_config"][session["role"]],
+        )
+        if not row or not row[0]:
+            return False
+        next_year, next_month = divmod(year * 12 + month, 12)
+        return row[1] >= datetime(next_year, next_month + 1, 1)
+
+    @classmethod
+    def create_report_async(
+            cls, report_type: str, month: int, year: int, replace: bool = False
+    ) -> ReportJob:
         """
-        Retrieves a report from the database.
+        Enqueues generation of a report and returns without waiting for the stored procedure.
+
+        Args:
+            report_type (str): The type of report to create.
+            month (int): The month for the report.
+            year (int): The year for the report.
+            replace (bool): Regenerate the report even if it is up to date.
+
+        Returns:
+            ReportJob: The new job, or the unfinished job already creating the same report.
+
+        Raises:
+            KeyError: If the report type is unknown or is not created by a stored procedure.
+        """
+        if "procedure_name" not in cls.report_config.get(report_type, {}):
+            raise KeyError(report_type)
+        db_config = current_app.config["db_config"][session["role"]]
+        return ReportJobQueue.submit(
+            report_type,
+            year,
+            month,
+            lambda: cls.create_report(report_type, month, year, db_config, replace),
+        )
+
+    @classmethod
+    def create_reports_async(
+            cls, report_type: str, start_month: int, start_year: int, end_month: int, end_year: int
+    ) -> List[Tuple[str, Optional[ReportJob]]]:
+        """
+        Enqueues generation of a report for every month of a range that has no report yet.
+
+        Months are run as separate jobs, so they are generated concurrently on the bounded
+        job pool and share pooled database connections.
+
+        Args:
+            report_type (str): The type of report to create.
+            start_month (int): First month of the range.
+            start_year (int): Year of the first month.
+            end_month (int): Last month of the range.
+            end_year (int): Year of the last month.
+
+        Returns:
+            List[Tuple[str, Optional[ReportJob]]]: Every month of the range as MM/YYYY with its job,
+            or None if the report for the month already exists.
+
+        Raises:
+            KeyError: If the report type is unknown.
+            ValueError: If the range is empty or longer than `MAX_BATCH_MONTHS`.
+            OperationalError: If existing reports cannot be read.
+        """
+        start, end = start_year * 12 + start_month - 1, end_year * 12 + end_month - 1
+        if not 1 <= start_month <= 12 or not 1 <= end_month <= 12 or end < start:
+            raise ValueError("Invalid period: the end month must not precede the start month.")
+        if end - start + 1 > cls.MAX_BATCH_MONTHS:
+            raise ValueError(f"A batch can cover at most {cls.MAX_BATCH_MONTHS} months.")
+
+        existing = {
+            (int(year), int(month))
+            for year, month in cls.fetch_all(
+                cls.sql_provider.get(
+                    "get_existing_periods.sql",
+                    table=cls.report_config[report_type]["table"],
+                    start_year=start_year,
+                    end_year=end_year,
+                ),
+                current_app.config["db_config"][session["role"]],
+            ) or ()
+        }
+        outcomes: List[Tuple[str, Optional[ReportJob]]] = []
+        for index in range(start, end + 1):
+            year, month = divmod(index, 12)
+            month += 1
+            job = None if (year, month) in existing else cls.create_report_async(report_type, month, year)
+            outcomes.append((f"{month:02d}/{year}", job))
+        return outcomes
+
+    @classmethod
+    def get_report(
+            cls,
+            report_type: str,
+            month: int,
+            year: int,
+            cursor: str = "",
+            page_size: Optional[int] = None,
+            end_month: Optional[int] = None,
+            end_year: Optional[int] = None,
+    ) -> ReportResponse:
+        """
+        Retrieves one page of a report from the database.
+
+        Rows are paginated by the `key_column` of the report configuration, so every page
+        is a bounded index range scan. Reports with the "cube" source are rolled up from
+        `RevenueCube` and reports with the "query" source are compiled by `ReportEngine`
+        for the whole month range instead.
 
         Args:
             report_type (str): The type of report to retrieve.
             month (int): The month for the report.
             year (int): The year for the report.
+            cursor (str): Cursor token of the requested page; empty for the first page.
+            page_size (Optional[int]): Number of rows per page.
+            end_month (Optional[int]): Last month of the range for live reports; defaults to `month`.
+            end_year (Optional[int]): Year of the last month for live reports; defaults to `year`.
 
         Returns:
-            ReportResponse: Contains the report data, column names, and status.
+            ReportResponse: Contains the page of report data, column names, next page cursor, and status.
+
+        Raises:
+            ValueError: If the cursor is invalid.
         """
+        after = decode_cursor(cursor, 1)[0] if cursor else ""
+        page_size = clamp_page_size(page_size)
         try:
+            config = cls.report_config[report_type]
+            if config.get("source") in ("cube", "query"):
+                return cls._get_live_report(
+                    report_type, month, year, end_month or month, end_year or year, int(after or 0), page_size
+                )
             sql_query = cls.sql_provider.get(
                 "get_report.sql",
                 year=year,
                 month=month,
-                db_columns=", ".join(cls.report_config[report_type]["db_columns"]),
-                table=cls.report_config[report_type]["table"],
+                db_columns=", ".join(config["db_columns"]),
+                table=config["table"],
+                key_column=config["key_column"],
+                after=after,
+                limit=page_size + 1,
             )
             result = cls.fetch_all(
                 sql_query, current_app.config["db_config"][session["role"]]
             )
             if result:
+                page = tuple(result[:page_size])
+                key_position = config["db_columns"].index(config["key_column"])
                 return ReportResponse(
-                    column_names=cls.report_config[report_type][
-                        "displayable_column_names"
-                    ],
-                    result=result,
+                    column_names=config["displayable_column_names"],
+                    result=page,
                     error_message="",
-                    report_desc=cls.report_config[report_type]["desc"],
+                    report_desc=config["desc"],
                     status=True,
+                    next_cursor=encode_cursor((page[-1][key_position],))
+                    if len(result) > page_size else None,
                 )
             logger.warning("Report not found for the selected period.")
             return ReportResponse(
@@ -120,11 +307,112 @@ class ReportManager(BaseModel, metaclass=MetaSQL):
             return ReportResponse(error_message="Invalid report type", status=False)
 
     @classmethod
-    def get_scenarios(cls) -> List[Tuple[str, str]]:
+    def export_report(
+            cls,
+            report_type: str,
+            month: int,
+            year: int,
+            end_month: Optional[int] = None,
+            end_year: Optional[int] = None,
+    ) -> Tuple[List[str], Iterator[Tuple[Any, ...]]]:
+        """
+        Streams every row of a report from the database.
+
+        Args:
+            report_type (str): The type of report to export.
+            month (int): The month for the report.
+            year (int): The year for the report.
+            end_month (Optional[int]): Last month of the range for live reports; defaults to `month`.
+            end_year (Optional[int]): Year of the last month for live reports; defaults to `year`.
+
+        Returns:
+            Tuple[List[str], Iterator[Tuple[Any, ...]]]: Column names and the report rows, read lazily.
+
+        Raises:
+            KeyError: If the report type is unknown.
+            OperationalError: If a report compiled by `ReportEngine` cannot be read.
+        """
+        config = cls.report_config[report_type]
+        if config.get("source") in ("cube", "query"):
+            rows = cls._get_live_rows(
+                report_type,
+                year * 12 + month - 1,
+                (end_year or year) * 12 + (end_month or month) - 1,
+            )
+            if config["source"] == "cube":
+                return [config["group_by"], "revenue", "count"], iter(rows)
+            return [*config["dimensions"], *config["measures"]], iter(rows)
+        sql_query = cls.sql_provider.get(
+            "get_report.sql",
+            year=year,
+            month=month,
+            db_columns=", ".join(config["db_columns"]),
+            table=config["table"],
+            key_column=config["key_column"],
+            after="",
+            limit=NO_LIMIT,
+        )
+        return config["db_columns"], cls.stream(
+            sql_query, current_app.config["db_config"][session["role"]]
+        )
+
+    @classmethod
+    def get_scenarios(cls, creatable: bool = False) -> List[Tuple[str, str]]:
         """
         Fetches available report scenarios.
 
+        Args:
+            creatable (bool): Return only reports created by a stored procedure.
+
         Returns:
             List[Tuple[str, str]]: A list of report type names and descriptions.
         """
-        return [(name, data["desc"]) for name, data in cls.report_config.items()]
+        return [
+            (name, data["desc"])
+            for name, data in cls.report_config.items()
+            if not creatable or "procedure_name" in data
+        ]
+
+    @classmethod
+    def _get_live_rows(
+            cls, report_type: str, start_month: int, end_month: int
+    ) -> Sequence[Tuple[Any, ...]]:
+        """Computes the rows of a report that is not stored in a table for a range of sequential month numbers."""
+        config = cls.report_config[report_type]
+        if config["source"] == "cube":
+            return RevenueCube.rollup(config["group_by"], start_month, end_month)
+        return ReportEngine.run(report_type, config, start_month, end_month)
+
+    @classmethod
+    def _get_live_report(
+            cls,
+            report_type: str,
+            month: int,
+            year: int,
+            end_month: int,
+            end_year: int,
+            offset: int,
+            page_size: int,
+    ) -> ReportResponse:
+        """Computes a report that is not stored in a table and returns the page starting at `offset`."""
+        start, end = year * 12 + month - 1, end_year * 12 + end_month - 1
+        if end < start:
+            return ReportResponse(
+                error_message="End date must be equal to or later than start date.", status=False
+            )
+        config = cls.report_config[report_type]
+        rows = cls._get_live_rows(report_type, start, end)
+        if not rows:
+            return ReportResponse(error_message="No orders in the selected period", status=False)
+        return ReportResponse(
+            column_names=config["displayable_column_names"],
+            result=tuple(rows[offset:offset + page_size]),
+            error_message="",
+            report_desc=config["desc"],
+            status=True,
+            next_cursor=encode_cursor((offset + page_size,)) if len(rows) > offset + page_size else None,
+        )
+
+
+class _ReportRejected(Exception):
+    """Raised inside the report transaction to roll it back when the procedure returns an error message."""
@@ -1,8 +1,17 @@
-from flask import render_template, request, session
+import logging
+from typing import Tuple, Union
+
+from apps.common.export import export_response
+from flask import Response, jsonify, render_template, request, session
+from pymysql import OperationalError
+from werkzeug.datastructures import MultiDict
 
 from .blueprint import report_app
+from .jobs import ReportJobQueue, ReportQueueFullError
 from .models import ReportManager
 
+logger = logging.getLogger(__name__)
+
 
 @report_app.route("/create", methods=["GET"])
 def create_get_handler() -> str:
@@ -16,7 +25,7 @@ def create_get_handler() -> str:
     return render_template(
         "create_report.html",
         role=session.get("role"),
-        scenarios=ReportManager.get_scenarios(),
+        scenarios=ReportManager.get_scenarios(creatable=True),
     )
 
 
@@ -25,13 +34,13 @@ def create_post_handler() -> str:
     """
     Handles the POST request for creating a new report.
 
-    Processes form data to create a report based on the selected scenario and date.
-    Returns a success message if the report is created successfully, otherwise
-    returns an error message.
+    Processes form data and enqueues creation of a report for the selected scenario
+    and date; an up-to-date report is only regenerated if `replace` is checked.
+    The page then polls the status of the returned job.
 
     Returns:
-        Response: Renders the 'create_report.html' template with a success
-        or error message.
+        Response: Renders the 'create_report.html' template with the enqueued job
+        or an error message.
     """
     report_scenario = request.form.get("report_scenario")
     report_date = request.form.get("report_date")
@@ -41,7 +50,7 @@ def create_post_handler() -> str:
             "create_report.html",
             role=session.get("role"),
             error="Invalid input: both scenario and date are required.",
-            scenarios=ReportManager.get_scenarios(),
+            scenarios=ReportManager.get_scenarios(creatable=True),
         )
 
     try:
@@ -51,57 +60,122 @@ def create_post_handler() -> str:
             "create_report.html",
             role=session.get("role"),
             error="Invalid date format. Please use DD/MM/YYYY.",
-            scenarios=ReportManager.get_scenarios(),
+            scenarios=ReportManager.get_scenarios(creatable=True),
         )
 
-    res = ReportManager.create_report(report_scenario, month, year)
-
-    if res == "OK":
+    try:
+        job = ReportManager.create_report_async(
+            report_scenario, month, year, replace=bool(request.form.get("replace"))
+        )
+    except KeyError:
         return render_template(
             "create_report.html",
             role=session.get("role"),
-            message="Report has been successfully created.",
-            scenarios=ReportManager.get_scenarios(),
+            error="Invalid report type",
+            scenarios=ReportManager.get_scenarios(creatable=True),
+        )
+    except ReportQueueFullError as e:
+        return render_template(
+            "create_report.html",
+            role=session.get("role"),
+            error=f"{e} Try again later",
+            scenarios=ReportManager.get_scenarios(creatable=True),
         )
 
     return render_template(
         "create_report.html",
         role=session.get("role"),
-        error=res,
-        scenarios=ReportManager.get_scenarios(),
+        message="Report generation has started.",
+        job=job,
+        scenarios=ReportManager.get_scenarios(creatable=True),
     )
 
 
-@report_app.route("/view", methods=["GET"])
-def view_get_handler() -> str:
+@report_app.route("/create_batch", methods=["POST"])
+def create_batch_handler() -> str:
     """
-    Handles the GET request for the 'View Report' page.
+    Handles the POST request for creating reports for a range of months.
+
+    Enqueues a job for every month of the range without a report and renders a per-month
+    summary that polls the status of the jobs.
 
     Returns:
-        Response: Renders the 'view_report_form.html' template with the
-        current user's role and available scenarios for viewing reports.
+        Response: Renders the 'report_batch.html' template with the outcome of every month,
+        or the 'create_report.html' template with an error message.
     """
+    report_scenario = request.form.get("report_scenario", "")
+    try:
+        start_month, start_year = map(int, request.form.get("start_date", "").split("/"))
+        end_month, end_year = map(int, request.form.get("end_date", "").split("/"))
+    except ValueError:
+        return render_template(
+            "create_report.html",
+            role=session.get("role"),
+            error="Invalid date format. Please use MM/YYYY.",
+            scenarios=ReportManager.get_scenarios(creatable=True),
+        )
+
+    try:
+        outcomes = ReportManager.create_reports_async(
+            report_scenario, start_month, start_year, end_month, end_year
+        )
+    except KeyError:
+        error = "Invalid report type"
+    except ValueError as e:
+        error = str(e)
+    except ReportQueueFullError as e:
+        error = f"{e} Try again later"
+    except OperationalError as e:
+        logger.error(f"Database error: {e.args[0]} - {e.args[1]}")
+        error = "Try again later"
+    else:
+        return render_template(
+            "report_batch.html",
+            role=session.get("role"),
+            outcomes=outcomes,
+        )
+
     return render_template(
-        "view_report_form.html",
+        "create_report.html",
         role=session.get("role"),
-        scenarios=ReportManager.get_scenarios(),
+        error=error,
+        scenarios=ReportManager.get_scenarios(creatable=True),
     )
 
 
-@report_app.route("/view", methods=["POST"])
-def view_post_handler() -> str:
+@report_app.route("/jobs/<job_id>", methods=["GET"])
+def report_job_handler(job_id: str) -> Union[Response, Tuple[Response, int]]:
     """
-    Handles the POST request for viewing a report.
+    Handles the GET request for the status of a report generation job.
+
+    Returns:
+        Union[Response, Tuple[Response, int]]: JSON with the job status and message,
+        or a 404 error if the job is unknown.
+    """
+    job = ReportJobQueue.get(job_id)
+    if job is None:
+        return jsonify(error="Unknown report job"), 404
+    return jsonify(
+        job_id=job.job_id,
+        status=job.status,
+        message=job.message,
+        finished=job.is_finished,
+    )
 
-    Processes form data to fetch and display a report for a specific scenario
-    and date. If the report retrieval fails, displays an error message.
+
+def render_report_page(args: MultiDict[str, str]) -> str:
+    """
+    Fetches one page of a report and renders it.
+
+    Args:
+        args (MultiDict[str, str]): Scenario, date, page size and cursor from the form or the query string.
 
     Returns:
         Response: Renders the 'view_report.html' template with the report data
         if successful, or the 'view_report_form.html' template with an error message.
     """
-    report_scenario = request.form.get("report_scenario")
-    report_date = request.form.get("report_date")
+    report_scenario = args.get("report_scenario")
+    report_date = args.get("report_date")
 
     if not report_scenario or not report_date:
         return render_template(
@@ -121,7 +195,33 @@ def view_post_handler() -> str:
             scenarios=ReportManager.get_scenarios(),
         )
 
-    res = ReportManager.get_report(report_scenario, month, year)
+    try:
+        end_month, end_year = map(int, (args.get("report_date_to") or report_date).split("/"))
+    except ValueError:
+        return render_template(
+            "view_report_form.html",
+            role=session.get("role"),
+            error="Invalid date format. Please use MM/YYYY.",
+            scenarios=ReportManager.get_scenarios(),
+        )
+
+    try:
+        res = ReportManager.get_report(
+            report_scenario,
+            month,
+            year,
+            cursor=args.get("cursor", ""),
+            page_size=args.get("page_size", None, type=int),
+            end_month=end_month,
+            end_year=end_year,
+        )
+    except ValueError as e:
+        return render_template(
+            "view_report_form.html",
+            role=session.get("role"),
+            error=str(e),
+            scenarios=ReportManager.get_scenarios(),
+        )
 
     if res.status:
         return render_template(
@@ -131,7 +231,12 @@ def view_post_handler() -> str:
             report_data=res.result,
             year=year,
             month=month,
+            end_year=end_year,
+            end_month=end_month,
             report_type=res.report_desc,
+            next_cursor=res.next_cursor,
+            is_first_page=not args.get("cursor"),
+            query_args={key: value for key, value in args.items() if key != "cursor"},
         )
 
     return render_template(
@@ -140,3 +245,87 @@ def view_post_handler() -> str:
         error=res.error_message,
         scenarios=ReportManager.get_scenarios(),
     )
+
+
+@report_app.route("/export", methods=["GET"])
+def export_handler() -> Union[Response, str]:
+    """
+    Handles the GET request for downloading a whole report.
+
+    The scenario and date are taken from the query string, and `format` selects CSV
+    (default) or NDJSON. Rows are streamed from the database while the file is sent.
+
+    Returns:
+        Union[Response, str]: Streamed report file, or the 'view_report_form.html'
+        template with an error message.
+    """
+    report_scenario = request.args.get("report_scenario", "")
+    try:
+        month, year = map(int, request.args.get("report_date", "").split("/"))
+        end_month, end_year = map(int, (request.args.get("report_date_to") or request.args["report_date"]).split("/"))
+    except ValueError:
+        return render_template(
+            "view_report_form.html",
+            role=session.get("role"),
+            error="Invalid date format. Please use MM/YYYY.",
+            scenarios=ReportManager.get_scenarios(),
+        )
+
+    try:
+        column_names, rows = ReportManager.export_report(report_scenario, month, year, end_month, end_year)
+        return export_response(
+            column_names,
+            rows,
+            request.args.get("format", "csv"),
+            f"{report_scenario}_{year}_{month:02d}",
+        )
+    except KeyError:
+        error = "Invalid report type"
+    except ValueError as e:
+        error = str(e)
+    except OperationalError as e:
+        logger.error(f"Database error: {e.args[0]} - {e.args[1]}")
+        error = "Try again later"
+    return render_template(
+        "view_report_form.html",
+        role=session.get("role"),
+        error=error,
+        scenarios=ReportManager.get_scenarios(),
+    )
+
+
+@report_app.route("/view", methods=["GET"])
+def view_get_handler() -> str:
+    """
+    Handles the GET request for the 'View Report' page.
+
+    Renders the form until a scenario is given in the query string, then a page of the report.
+    Report pages link to each other through this handler with a cursor in the query string.
+
+    Returns:
+        Response: Renders the 'view_report_form.html' template with the
+        current user's role and available scenarios for viewing reports,
+        or a page of the requested report.
+    """
+    if "report_scenario" not in request.args:
+        return render_template(
+            "view_report_form.html",
+            role=session.get("role"),
+            scenarios=ReportManager.get_scenarios(),
+        )
+    return render_report_page(request.args)
+
+
+@report_app.route("/view", methods=["POST"])
+def view_post_handler() -> str:
+    """
+    Handles the POST request for viewing a report.
+
+    Processes form data to fetch and display the first page of a report for a
+    specific scenario and date. If the report retrieval fails, displays an error message.
+
+    Returns:
+        Response: Renders the 'view_report.html' template with the report data
+        if successful, or the 'view_report_form.html' template with an error message.
+    """
+    return render_report_page(request.form)
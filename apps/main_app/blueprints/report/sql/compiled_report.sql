@@ -0,0 +1,8 @@
+select $columns
+from advertising.orders o
+         join advertising.order_row orw on orw.order_id = o.order_id
+         $joins
+where o.registration_date >= "$start_date"
+  and o.registration_date < "$end_date"$filters
+group by $group_by$rollup
+order by $order_by;
@@ -0,0 +1,4 @@
+delete
+from advertising.$table
+where year = "$year"
+  and month = "$month";
@@ -0,0 +1,3 @@
+select distinct year, month
+from advertising.$table
+where year between "$start_year" and "$end_year";
\ No newline at end of file
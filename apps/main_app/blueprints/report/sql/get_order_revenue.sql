@@ -0,0 +1,15 @@
+select o.order_id,
+       year(o.registration_date),
+       month(o.registration_date),
+       o.renter_id,
+       concat_ws(' ', r.last_name, r.first_name),
+       r.business_sphere,
+       orw.billboard_id,
+       b.city,
+       orw.price
+from advertising.orders o
+         join advertising.renters r on r.renter_id = o.renter_id
+         join advertising.order_row orw on orw.order_id = o.order_id
+         join advertising.billboards b on b.billboard_id = orw.billboard_id
+where o.order_id > $after_order_id
+order by o.order_id;
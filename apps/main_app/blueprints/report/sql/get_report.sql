@@ -1,4 +1,7 @@
 select $db_columns
 from advertising.$table
 where year = "$year"
-  and month = "$month";
\ No newline at end of file
+  and month = "$month"
+  and ($key_column > "$after" or "$after" = '')
+order by $key_column
+limit $limit;
\ No newline at end of file
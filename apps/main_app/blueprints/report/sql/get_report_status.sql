@@ -0,0 +1,4 @@
+select count(*), min(created_at)
+from advertising.$table
+where year = "$year"
+  and month = "$month";
@@ -0,0 +1,128 @@
+"""
+Compares the in-process billboard catalog with the SQL billboard query.
+
+The catalog is always measured on synthetic data. The SQL path is measured only when
+`DB_HOST`, `DB_USER`, `DB_PASSWORD` and `DB_NAME` are set; the rows are then loaded into
+a temporary copy of the `billboards` table of that database.
+
+Usage:
+    python -m benchmarks.billboard_catalog [rows ...]
+"""
+import os
+import random
+import sys
+import time
+from statistics import median
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from apps.main_app.blueprints.query.catalog import ColumnarSnapshot
+
+CITIES = ["Омск", "Москва", "Новосибирск", "Томск", "Казань", "Тюмень", "Пермь", "Самара"]
+FILTERS: List[Dict[str, str]] = [
+    {"min_price": "", "max_price": "", "city": "", "min_quality": "", "max_quality": "", "min_size": "", "max_size": ""},
+    {"min_price": "300", "max_price": "600", "city": "", "min_quality": "50", "max_quality": "", "min_size": "", "max_size": ""},
+    {"min_price": "", "max_price": "400", "city": "Омск", "min_quality": "", "max_quality": "", "min_size": "10", "max_size": "40"},
+]
+LIMIT = 100
+REPEATS = 7
+
+
+def make_rows(count: int, seed: int = 0) -> List[Tuple[Any, ...]]:
+    """
+    Generates synthetic billboard rows.
+
+    Arguments:
+        count (int): Number of rows.
+        seed (int): Seed of the random generator.
+
+    Returns:
+        List[Tuple[Any, ...]]: Rows of (billboard_id, price_per_month, size, billboard_address, quality, city).
+    """
+    rng = random.Random(seed)
+    rows = []
+    for billboard_id in range(1, count + 1):
+        city = rng.choice(CITIES)
+        rows.append((
+            billboard_id,
+            rng.randrange(10000, 99900) / 100,
+            rng.randrange(6, 60),
+            f"г. {city}, ул. Ленина, {rng.randrange(1, 200)}",
+            rng.randrange(0, 10000) / 100,
+            city,
+        ))
+    return rows
+
+
+def measure(function: Callable[[], Any]) -> float:
+    """Returns the median wall time of `function` in milliseconds."""
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - started) * 1000)
+    return median(timings)
+
+
+def bench_catalog(rows: List[Tuple[Any, ...]], limit: Optional[int]) -> List[float]:
+    snapshot = ColumnarSnapshot(rows)
+    return [measure(lambda: snapshot.search(filters, limit)) for filters in FILTERS]
+
+
+def bench_sql(rows: List[Tuple[Any, ...]], limit: Optional[int]) -> List[float]:
+    from pymysql import connect
+
+    connection = connect(
+        host=os.environ["DB_HOST"],
+        user=os.environ["DB_USER"],
+        password=os.environ["DB_PASSWORD"],
+        database=os.environ["DB_NAME"],
+    )
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("drop temporary table if exists bench_billboards")
+            cursor.execute("create temporary table bench_billboards like billboards")
+            cursor.executemany(
+                "insert into bench_billboards "
+                "(billboard_id, price_per_month, size, billboard_address, quality, mount_date, owner_id) "
+                "values (%s, %s, %s, %s, %s, '2024-01-01', 1)",
+                [row[:5] for row in rows],
+            )
+            connection.commit()
+            query = (
+                "select billboard_id, price_per_month, size, billboard_address, quality "
+                "from bench_billboards "
+                "where (price_per_month > %(min_price)s or %(min_price)s = '') "
+                "and (price_per_month < %(max_price)s or %(max_price)s = '') "
+                "and (city = %(city)s or %(city)s = '') "
+                "and (quality > %(min_quality)s or %(min_quality)s = '') "
+                "and (quality < %(max_quality)s or %(max_quality)s = '') "
+                "and (size > %(min_size)s or %(min_size)s = '') "
+                "and (size < %(max_size)s or %(max_size)s = '') "
+                "order by price_per_month, billboard_id"
+                + (f" limit {int(limit)}" if limit is not None else "")
+            )
+
+            def run(filters: Dict[str, str]) -> None:
+                cursor.execute(query, filters)
+                cursor.fetchall()
+
+            return [measure(lambda: run(filters)) for filters in FILTERS]
+    finally:
+        connection.close()
+
+
+def main(sizes: List[int]) -> None:
+    with_sql = all(os.environ.get(name) for name in ("DB_HOST", "DB_USER", "DB_PASSWORD", "DB_NAME"))
+    print(f"{'rows':>9} {'filter':>6} {'limit':>5} {'catalog, ms':>12} {'sql, ms':>9}")
+    for size in sizes:
+        rows = make_rows(size)
+        for limit in (None, LIMIT):
+            catalog = bench_catalog(rows, limit)
+            sql = bench_sql(rows, limit) if with_sql else [None] * len(FILTERS)
+            for number, (catalog_ms, sql_ms) in enumerate(zip(catalog, sql), start=1):
+                sql_column = f"{sql_ms:9.2f}" if sql_ms is not None else f"{'-':>9}"
+                print(f"{size:>9} {number:>6} {limit or '-':>5} {catalog_ms:12.2f} {sql_column}")
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
@@ -0,0 +1,7 @@
+-- City of a billboard, parsed from addresses like 'г. Омск, ул. Гоголя, 5'.
+-- The column is generated and stored, so existing rows are backfilled by this statement
+-- and the value stays in sync with billboard_address on every insert and update.
+alter table advertising.billboards
+    add column city varchar(50)
+        generated always as (trim(substring_index(substring_index(billboard_address, ',', 1), '. ', -1))) stored,
+    add index bil_city_idx (city, price_per_month);
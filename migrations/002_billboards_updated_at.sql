@@ -0,0 +1,4 @@
+-- Change marker for billboards, so in-process snapshots can reload only the rows changed since the last refresh.
+alter table advertising.billboards
+    add column updated_at timestamp(6) not null default current_timestamp(6) on update current_timestamp(6),
+    add index bil_updated_idx (updated_at);
@@ -0,0 +1,9 @@
+-- Indexes backing keyset pagination of billboard queries and report pages.
+-- InnoDB secondary indexes end with the primary key, so each index also orders ties by ID.
+alter table advertising.billboards
+    add index bil_price_idx (price_per_month),
+    add index bil_size_idx (size),
+    add index bil_quality_idx (quality);
+
+alter table advertising.reports
+    add index rep_period_idx (year, month);
@@ -0,0 +1,4 @@
+-- Range index for reports compiled from report_config.json, which select orders by registration month.
+-- Order rows are then found through ord_id_order_idx, renters and billboards through their primary keys.
+alter table advertising.orders
+    add index ord_registration_idx (registration_date);
@@ -0,0 +1,14 @@
+-- One row per business sphere and month in the reports table, so a report cannot be stored twice.
+-- Duplicates left by repeated report creation are removed first, keeping the earliest row.
+delete newer
+from advertising.reports newer
+         join advertising.reports older
+              on older.year = newer.year
+                  and older.month = newer.month
+                  and older.business_sphere = newer.business_sphere
+                  and older.report_id < newer.report_id;
+
+-- created_at tells reports generated after their month ended, which cannot change anymore.
+alter table advertising.reports
+    add column created_at timestamp not null default current_timestamp,
+    add unique index rep_period_uq (year, month, business_sphere);
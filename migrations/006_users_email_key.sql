@@ -0,0 +1,6 @@
+-- Case-normalized, unique login key for users, so logins and registration checks use an index lookup.
+-- Fails if two existing users differ only by case or surrounding spaces of their email; merge them first:
+--   select lower(trim(email)), count(*) from advertising.users group by 1 having count(*) > 1;
+alter table advertising.users
+    add column email_key varchar(45) generated always as (lower(trim(email))) stored,
+    add unique index user_email_key_uq (email_key);
@@ -0,0 +1,154 @@
+import os
+import re
+import threading
+import time
+from typing import Any, Optional
+
+import pytest
+from apps.common.database.connection_pool import PoolTimeoutError
+from pymysql.err import OperationalError
+
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("AUTH_URL", "http://localhost:5001")
+
+
+class FakeDatabase:
+    """
+    In-memory stand-in for the advertising database with InnoDB-like row locks.
+
+    Rows locked with ``select ... for update`` stay locked until the owning connection
+    commits or rolls back, and a lock that cannot be taken within ``lock_wait_timeout``
+    fails with error 1205. Order rows become visible to other connections on commit.
+    A read of the bookings takes its snapshot and then waits for ``read_delay`` seconds,
+    which widens the window between the overlap check and the insert of concurrent checkouts.
+    Like ``ConnectionPool``, at most ``max_connections`` connections are checked out at once,
+    and a checkout that finds none free within ``pool_timeout`` fails with ``PoolTimeoutError``.
+
+    Args:
+        billboards (dict[int, tuple]): Rows of advertising.billboards keyed by ID.
+        renter (tuple): The row of advertising.renters every user maps to.
+        lock_wait_timeout (float): Seconds a row lock is waited for.
+        read_delay (float): Seconds every read of the bookings takes.
+        max_connections (int): Connections that may be checked out at once.
+        pool_timeout (float): Seconds a checkout waits for a free connection.
+    """
+
+    def __init__(self, billboards: dict[int, tuple], renter: tuple, lock_wait_timeout: float = 5.0,
+                 read_delay: float = 0.02, max_connections: int = 32, pool_timeout: float = 5.0):
+        self.billboards = billboards
+        self.renter = renter
+        self.lock_wait_timeout = lock_wait_timeout
+        self.read_delay = read_delay
+        self.order_rows: list[tuple] = []
+        self.row_locks = {billboard_id: threading.Lock() for billboard_id in billboards}
+        self.lock = threading.Lock()
+        self.next_order_id = 1
+        self.pool_timeout = pool_timeout
+        self.connections = threading.BoundedSemaphore(max_connections)
+
+    def acquire(self) -> "FakeConnection":
+        if not self.connections.acquire(timeout=self.pool_timeout):
+            raise PoolTimeoutError(0, "Timed out waiting for a connection from the fake pool.")
+        return FakeConnection(self)
+
+    def release(self, connection: "FakeConnection", discard: bool = False) -> None:
+        connection.rollback()
+        self.connections.release()
+
+
+class FakeConnection:
+    def __init__(self, database: FakeDatabase):
+        self.database = database
+        self.locked: list[threading.Lock] = []
+        self.pending: list[tuple] = []
+
+    def cursor(self, *args: Any) -> "FakeCursor":
+        return FakeCursor(self)
+
+    def commit(self) -> None:
+        with self.database.lock:
+            self.database.order_rows.extend(self.pending)
+        self.pending = []
+        self._unlock()
+
+    def rollback(self) -> None:
+        self.pending = []
+        self._unlock()
+
+    def _unlock(self) -> None:
+        while self.locked:
+            self.locked.pop().release()
+
+
+class FakeCursor:
+    def __init__(self, connection: FakeConnection):
+        self.connection = connection
+        self.database = connection.database
+        self.rows: tuple = ()
+        self.lastrowid: Optional[int] = None
+
+    def execute(self, query: str) -> None:
+        ids = [int(i) for i in re.findall(r"\d+", query.split(" in (", 1)[1].split(")", 1)[0])] \
+            if " in (" in query else []
+        if "for update" in query:
+            for billboard_id in ids:
+                lock = self.database.row_locks[billboard_id]
+                if lock not in self.connection.locked:
+                    if not lock.acquire(timeout=self.database.lock_wait_timeout):
+                        raise OperationalError(1205, "Lock wait timeout exceeded; try restarting transaction")
+                    self.connection.locked.append(lock)
+            self.rows = tuple((billboard_id,) for billboard_id in ids)
+        elif "from advertising.order_row" in query:
+            with self.database.lock:
+                committed = list(self.database.order_rows)
+            time.sleep(self.database.read_delay)
+            self.rows = tuple(
+                (row[6], row[1], row[0], row[3], row[2])
+                for row in committed + self.connection.pending
+                if row[6] in ids
+            )
+        elif "from advertising.renters" in query:
+            self.rows = (self.database.renter,)
+        elif "from advertising.billboards" in query:
+            self.rows = tuple(self.database.billboards[i] for i in ids if i in self.database.billboards)
+        elif "insert into advertising.orders" in query:
+            with self.database.lock:
+                self.lastrowid = self.database.next_order_id
+                self.database.next_order_id += 1
+        else:
+            raise AssertionError(f"Unexpected query: {query}")
+
+    def executemany(self, query: str, rows: list[tuple]) -> int:
+        assert "insert into advertising.order_row" in query
+        self.connection.pending.extend(rows)
+        return len(rows)
+
+    def fetchall(self) -> tuple:
+        return self.rows
+
+    def fetchone(self) -> Optional[tuple]:
+        return self.rows[0] if self.rows else None
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.fixture
+def main_app():
+    from apps.main_app.app import app
+
+    app.config["TESTING"] = True
+    return app
+
+
+@pytest.fixture
+def fake_database(monkeypatch):
+    from apps.common.database.connection_pool import ConnectionPool
+
+    database = FakeDatabase(
+        billboards={1: (1, 1000.0, 12.0, "Moscow, Tverskaya 1", None, 5, 1)},
+        renter=(1, "Ivan", "Petrov", "+70000000000", "Moscow", "Retail", 1),
+    )
+    monkeypatch.setattr(ConnectionPool, "for_config", classmethod(lambda cls, db_config: database))
+    return database
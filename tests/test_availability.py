@@ -0,0 +1,71 @@
+import threading
+from datetime import datetime
+
+import pytest
+from apps.common.database.base_model import BaseModel
+from apps.main_app.blueprints.renter.availability import AvailabilityIndex
+from flask import session
+
+
+@pytest.fixture
+def bookings(monkeypatch):
+    """Rows of order_row as (billboard_id, start_month, start_year, end_month, end_year, order_row_id, None)."""
+    rows = [(1, 1, 2030, 3, 2030, 1, None)]
+    queries = []
+
+    def fetch_all(cls, query, db_config, cursor=None):
+        queries.append(query)
+        if "order_row_id >" in query:
+            after = int(query.split("order_row_id >", 1)[1].split()[0])
+            return tuple(row for row in rows if row[5] > after)
+        return tuple(rows)
+
+    monkeypatch.setattr(BaseModel, "fetch_all", classmethod(fetch_all))
+    monkeypatch.setattr(AvailabilityIndex, "_loaded_at", None)
+    monkeypatch.setattr(AvailabilityIndex, "_starts", {})
+    monkeypatch.setattr(AvailabilityIndex, "_ends", {})
+    monkeypatch.setattr(AvailabilityIndex, "ID_MARGIN", 0)
+    return rows, queries
+
+
+def overlaps(app, month: int) -> bool:
+    with app.test_request_context():
+        session["role"] = "renter"
+        return AvailabilityIndex.overlaps(1, datetime(2030, month, 1), datetime(2030, month, 1))
+
+
+def test_new_bookings_are_loaded_by_id(main_app, bookings, monkeypatch):
+    rows, queries = bookings
+    assert overlaps(main_app, 2)
+    assert not overlaps(main_app, 6)
+
+    rows.append((1, 6, 2030, 6, 2030, 2, None))
+    monkeypatch.setattr(AvailabilityIndex, "_refreshed_at", 0.0)
+    assert overlaps(main_app, 6)
+    assert "order_row_id > 1" in queries[-1]
+    assert len(queries) == 2
+
+
+def test_full_reload_runs_in_background(main_app, bookings, monkeypatch):
+    rows, queries = bookings
+    overlaps(main_app, 2)
+    rows[:] = [(1, 6, 2030, 6, 2030, 2, None)]
+    monkeypatch.setattr(AvailabilityIndex, "_loaded_at", -AvailabilityIndex.FULL_RELOAD_INTERVAL)
+    release = threading.Event()
+    fetch_all = BaseModel.fetch_all.__func__
+
+    def slow_fetch_all(cls, query, db_config, cursor=None):
+        if "order_row_id >" not in query:
+            release.wait(5)
+        return fetch_all(cls, query, db_config, cursor)
+
+    monkeypatch.setattr(BaseModel, "fetch_all", classmethod(slow_fetch_all))
+
+    # The request that finds the index outdated still answers from the current one.
+    assert overlaps(main_app, 2)
+    release.set()
+    for thread in threading.enumerate():
+        if thread.name == "availability-rebuild":
+            thread.join()
+    assert not overlaps(main_app, 2)
+    assert overlaps(main_app, 6)
@@ -0,0 +1,42 @@
+import pytest
+from apps.common.database.base_model import BaseModel
+from apps.main_app.blueprints.renter.models import Billboard
+from flask import session
+
+ROW = (1, 1000.0, 12.0, "Moscow, Tverskaya 1", None, 5, 1)
+
+
+@pytest.fixture
+def table(monkeypatch):
+    state = {"marker": (1, "2030-01-01 00:00:00"), "reads": 0}
+
+    def fetch_one(cls, query, db_config, cursor=None):
+        if "count(*)" in query:
+            return state["marker"]
+        state["reads"] += 1
+        return ROW
+
+    monkeypatch.setattr(BaseModel, "fetch_one", classmethod(fetch_one))
+    monkeypatch.setattr(Billboard, "CHANGE_CHECK_INTERVAL", 0.0)
+    monkeypatch.setattr(Billboard, "_change_marker", None)
+    monkeypatch.setattr(Billboard, "_checked_at", None)
+    Billboard.cache.invalidate()
+    return state
+
+
+def get_billboard(app) -> Billboard:
+    with app.test_request_context():
+        session["role"] = "manager"
+        return Billboard.get_billboard(1)
+
+
+def test_cached_billboard_is_reloaded_after_table_changes(main_app, table):
+    invalidations = Billboard.get_cache_stats()["invalidations"]
+    get_billboard(main_app)
+    get_billboard(main_app)
+    assert table["reads"] == 1
+
+    table["marker"] = (1, "2030-01-01 00:00:01")
+    get_billboard(main_app)
+    assert table["reads"] == 2
+    assert Billboard.get_cache_stats()["invalidations"] == invalidations + 1
@@ -0,0 +1,59 @@
+import logging
+
+import pytest
+from apps.main_app.blueprints.query import catalog
+from apps.main_app.blueprints.query.catalog import BillboardCatalog, ColumnarSnapshot
+
+pytest.importorskip("numpy")
+
+ROWS = [
+    (1, 1000.0, 12.0, "г. Омск, ул. Гоголя, 5", 5, "Омск"),
+    (2, 2000.0, 18.0, "г. Москва, ул. Тверская, 1", 4, "Москва"),
+    (3, 1500.0, 12.0, "г. Омск, ул. Ленина, 1", 3, "Омск"),
+    (4, 1500.0, 24.0, "г. Омск, ул. Мира, 7", 5, " омск "),
+]
+NO_FILTERS = dict.fromkeys(
+    ("min_price", "max_price", "city", "min_quality", "max_quality", "min_size", "max_size"), ""
+)
+
+
+def ids(rows):
+    return [row[0] for row in rows]
+
+
+def test_filters_use_exclusive_bounds_and_case_insensitive_cities():
+    snapshot = ColumnarSnapshot(ROWS)
+
+    assert ids(snapshot.search(dict(NO_FILTERS, min_price="1000", max_price="2000"))) == [3, 4]
+    assert ids(snapshot.search(dict(NO_FILTERS, city="ОМСК", min_quality="3"))) == [1, 4]
+    assert ids(snapshot.search(dict(NO_FILTERS, min_size="12", max_size="20"))) == [2]
+    assert snapshot.search(dict(NO_FILTERS, city="Казань")) == []
+
+
+def test_pages_follow_sort_order_with_ties_broken_by_id():
+    snapshot = ColumnarSnapshot(ROWS)
+
+    first = snapshot.search(NO_FILTERS, limit=2, sort="price", descending=True)
+    assert ids(first) == [2, 4]
+    after = (first[-1][1], first[-1][0])
+    second = snapshot.search(NO_FILTERS, limit=2, sort="price", descending=True, after=after)
+    assert ids(second) == [3, 1]
+
+
+def test_upsert_overwrites_existing_billboards():
+    snapshot = ColumnarSnapshot(ROWS)
+    snapshot.upsert([(3, 900.0, 12.0, "г. Омск, ул. Ленина, 1", 3, "Омск"), (5, 800.0, 6.0, "г. Омск", 2, "Омск")])
+
+    assert len(snapshot) == 5
+    assert ids(snapshot.search(dict(NO_FILTERS, max_price="1000"))) == [5, 3]
+
+
+def test_enabled_catalog_without_numpy_is_reported(monkeypatch, caplog):
+    monkeypatch.setenv("BILLBOARD_CATALOG", "1")
+    monkeypatch.setattr(catalog, "np", None)
+    monkeypatch.setattr(BillboardCatalog, "_warned", False)
+
+    with caplog.at_level(logging.WARNING):
+        assert not BillboardCatalog.is_enabled()
+        assert not BillboardCatalog.is_enabled()
+    assert len([record for record in caplog.records if "NumPy" in record.message]) == 1
@@ -0,0 +1,143 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from apps.common.database import retry
+from apps.common.database.retry import retry_on_lock_conflict
+from apps.common.signals import order_placed
+from apps.main_app.blueprints.renter.models import CheckoutHandler
+from flask import session
+from pymysql.err import OperationalError
+
+CHECKOUTS = 16
+
+
+def checkout(app, start_month: int, end_month: int) -> str:
+    """Checks out a cart with billboard 1 booked for months of 2030, returning the outcome."""
+    with app.test_request_context():
+        session["role"] = "renter"
+        session["user_id"] = 1
+        try:
+            CheckoutHandler.checkout([{
+                "billboard_id": 1,
+                "start_month": start_month,
+                "start_year": 2030,
+                "end_month": end_month,
+                "end_year": 2030,
+            }])
+        except ValueError:
+            return "overlap"
+        return "ordered"
+
+
+def test_parallel_checkouts_of_overlapping_periods_book_once(main_app, fake_database):
+    # Every period contains June, so any two of them overlap.
+    periods = [(1 + i % 6, 6 + i % 7) for i in range(CHECKOUTS)]
+    with ThreadPoolExecutor(CHECKOUTS) as executor:
+        outcomes = list(executor.map(lambda period: checkout(main_app, *period), periods))
+
+    assert outcomes.count("ordered") == 1
+    assert outcomes.count("overlap") == CHECKOUTS - 1
+    assert len(fake_database.order_rows) == 1
+
+
+def test_parallel_checkouts_of_disjoint_periods_all_succeed(main_app, fake_database):
+    with ThreadPoolExecutor(12) as executor:
+        outcomes = list(executor.map(lambda month: checkout(main_app, month, month), range(1, 13)))
+
+    assert outcomes == ["ordered"] * 12
+    assert sorted(row[1] for row in fake_database.order_rows) == list(range(1, 13))
+
+
+def test_checkout_retries_lock_wait_timeout(main_app, fake_database, monkeypatch):
+    monkeypatch.setattr(retry.time, "sleep", lambda delay: None)
+    fake_database.lock_wait_timeout = 0.01
+    lock = fake_database.row_locks[1]
+    lock.acquire()
+    original_acquire = lock.acquire
+    attempts = []
+
+    class Lock:
+        def acquire(self, timeout):
+            attempts.append(timeout)
+            if len(attempts) == 3:
+                lock.release()
+            return original_acquire(timeout=timeout)
+
+        def release(self):
+            lock.release()
+
+    fake_database.row_locks[1] = Lock()
+
+    assert checkout(main_app, 1, 3) == "ordered"
+    assert len(attempts) == 3
+    assert len(fake_database.order_rows) == 1
+
+
+def test_parallel_checkouts_use_one_connection_each(main_app, fake_database):
+    # Fewer connections than checkouts: one holding a connection while waiting for another would starve the pool.
+    fake_database.connections = threading.BoundedSemaphore(4)
+    fake_database.pool_timeout = 1.0
+    with ThreadPoolExecutor(12) as executor:
+        outcomes = list(executor.map(lambda month: checkout(main_app, month, month), range(1, 13)))
+
+    assert outcomes == ["ordered"] * 12
+    assert len(fake_database.order_rows) == 12
+
+
+def test_checkout_announces_the_committed_order(main_app, fake_database):
+    orders = []
+
+    def receive(sender, **order):
+        orders.append(order)
+
+    with order_placed.connected_to(receive):
+        assert checkout(main_app, 3, 4) == "ordered"
+
+    assert len(orders) == 1
+    assert orders[0]["renter_name"] == "Petrov Ivan"
+    assert orders[0]["rows"] == [(1, "Moscow, Tverskaya 1", 2000.0)]
+
+
+@pytest.mark.parametrize("code", [1205, 1213])
+def test_retry_on_lock_conflict_reruns_until_success(monkeypatch, code):
+    monkeypatch.setattr(retry.time, "sleep", lambda delay: None)
+    calls = []
+
+    @retry_on_lock_conflict(attempts=4)
+    def transaction():
+        calls.append(code)
+        if len(calls) < 3:
+            raise OperationalError(code, "Lock conflict")
+        return "committed"
+
+    assert transaction() == "committed"
+    assert len(calls) == 3
+
+
+def test_retry_on_lock_conflict_gives_up_after_attempts(monkeypatch):
+    delays = []
+    monkeypatch.setattr(retry.time, "sleep", delays.append)
+
+    @retry_on_lock_conflict(attempts=3, base_delay=0.1, max_delay=0.15)
+    def transaction():
+        raise OperationalError(1213, "Deadlock found when trying to get lock")
+
+    with pytest.raises(OperationalError):
+        transaction()
+    assert len(delays) == 2
+    assert all(0 <= delay <= 0.15 for delay in delays)
+
+
+def test_retry_on_lock_conflict_does_not_retry_other_errors(monkeypatch):
+    monkeypatch.setattr(retry.time, "sleep", lambda delay: None)
+    calls = []
+
+    @retry_on_lock_conflict()
+    def transaction():
+        calls.append(1)
+        raise OperationalError(2006, "MySQL server has gone away")
+
+    with pytest.raises(OperationalError):
+        transaction()
+    assert len(calls) == 1
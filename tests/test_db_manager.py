@@ -0,0 +1,64 @@
+import threading
+
+import pytest
+from apps.common.database.base_model import BaseModel
+from apps.common.database.connection_pool import PoolTimeoutError
+from apps.main_app.blueprints.report.engine import ReportEngine
+from pymysql.err import OperationalError
+
+
+class Connection:
+    def __init__(self):
+        self.finished = []
+
+    def cursor(self):
+        return self
+
+    def execute(self, query):
+        raise OperationalError(2013, "Lost connection to MySQL server during query")
+
+    def rollback(self):
+        self.finished.append("rollback")
+
+    def commit(self):
+        self.finished.append("commit")
+
+    def close(self):
+        pass
+
+
+class Pool:
+    def __init__(self):
+        self.connection = Connection()
+        self.released = []
+
+    def acquire(self):
+        return self.connection
+
+    def release(self, connection, discard=False):
+        self.released.append(discard)
+
+
+def test_query_error_is_raised_after_rollback_and_release(monkeypatch):
+    pool = Pool()
+    monkeypatch.setattr("apps.common.database.connection_pool.ConnectionPool.for_config", lambda db_config: pool)
+
+    with pytest.raises(OperationalError):
+        BaseModel.fetch_all("select 1", {})
+    assert pool.connection.finished == ["rollback"]
+    assert pool.released == [True]
+
+
+def test_pool_timeout_reaches_the_caller(fake_database):
+    fake_database.connections = threading.BoundedSemaphore(1)
+    fake_database.pool_timeout = 0.01
+    fake_database.acquire()
+    with pytest.raises(PoolTimeoutError):
+        BaseModel.fetch_all("select 1 from advertising.renters", {})
+
+
+def test_database_error_branch_of_caller_runs(fake_database):
+    fake_database.connections = threading.BoundedSemaphore(1)
+    fake_database.pool_timeout = 0.01
+    fake_database.acquire()
+    assert ReportEngine.check_plan("sales", "select 1", {}) == []
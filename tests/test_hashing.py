@@ -0,0 +1,74 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from apps.common.hashing import HashPoolBusyError, PasswordHasher
+
+
+@pytest.fixture
+def finish():
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+@pytest.fixture
+def hasher(monkeypatch, finish):
+    executor = ThreadPoolExecutor(2)
+    monkeypatch.setattr(PasswordHasher, "_executor", executor)
+    monkeypatch.setattr(PasswordHasher, "_in_flight", 0)
+    monkeypatch.setattr(PasswordHasher, "_stats", {})
+    monkeypatch.setattr(PasswordHasher, "QUEUE_LIMIT", 2)
+    monkeypatch.setattr(PasswordHasher, "TIMEOUT", 0.05)
+    yield PasswordHasher
+    finish.set()
+    executor.shutdown(wait=True)
+
+
+def test_timed_out_call_keeps_its_slot_until_it_finishes(hasher, finish):
+    for _ in range(2):
+        with pytest.raises(HashPoolBusyError, match="timed out"):
+            hasher._run("hash", finish.wait)
+    assert hasher.get_stats()["hash"].in_flight == 2
+    with pytest.raises(HashPoolBusyError, match="Too many"):
+        hasher._run("hash", finish.wait)
+
+    finish.set()
+    deadline = time.monotonic() + 5
+    while hasher.get_stats()["hash"].in_flight and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert hasher.get_stats()["hash"].in_flight == 0
+    assert hasher._run("hash", lambda: "hashed") == "hashed"
+    assert hasher.get_stats()["hash"].rejected == 3
+
+
+def test_timed_out_queued_call_frees_its_slot(hasher, finish):
+    hasher.QUEUE_LIMIT = 3
+    for _ in range(3):
+        with pytest.raises(HashPoolBusyError, match="timed out"):
+            hasher._run("hash", finish.wait)
+    # Two calls run and cannot be stopped; the queued one was cancelled.
+    assert hasher.get_stats()["hash"].in_flight == 2
+
+
+def test_hash_many_keeps_at_most_workers_calls_in_the_pool(hasher, monkeypatch):
+    hasher.QUEUE_LIMIT = 16
+    monkeypatch.setattr(hasher, "WORKERS", 2)
+    lock = threading.Lock()
+    running, peak = [0], [0]
+
+    def generate_password_hash(password):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0], hasher._in_flight)
+        time.sleep(0.005)
+        with lock:
+            running[0] -= 1
+        return f"hashed {password}"
+
+    monkeypatch.setattr("apps.common.hashing.generate_password_hash", generate_password_hash)
+
+    assert hasher.hash_many([str(i) for i in range(10)]) == [f"hashed {i}" for i in range(10)]
+    assert peak[0] <= 2
+    assert hasher.get_stats()["hash"].calls == 10
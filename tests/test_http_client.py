@@ -0,0 +1,69 @@
+import io
+
+import pytest
+import requests
+from apps.common import http_client
+from apps.common.http_client import CircuitBreaker, CircuitOpenError, HttpClient
+
+
+class FakeSession:
+    """Answers requests with the queued responses, raising queued exceptions."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+
+def make_response(status_code: int, **headers: str) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response.raw = io.BytesIO()
+    response.headers.update(headers)
+    return response
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(http_client.time, "sleep", lambda delay: None)
+    return HttpClient("http://auth", retries=2, breaker=CircuitBreaker(failure_threshold=1, reset_timeout=0))
+
+
+def test_unexpected_error_of_trial_call_admits_next_trial(client):
+    client.breaker.record_failure()
+    client._session = FakeSession(ValueError("unexpected"), make_response(200))
+
+    with pytest.raises(ValueError):
+        client.request("GET", "/find_user")
+    assert client.request("GET", "/find_user").status_code == 200
+    assert client.breaker.state == "closed"
+
+
+def test_concurrent_trial_is_refused(client):
+    client.breaker.record_failure()
+    assert client.breaker.allow()
+    with pytest.raises(CircuitOpenError):
+        client.request("GET", "/find_user")
+
+
+def test_load_shedding_response_is_final_and_keeps_circuit_closed(client):
+    client.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    client._session = FakeSession(*[make_response(503, **{"Retry-After": "1"}) for _ in range(3)])
+
+    for _ in range(3):
+        assert client.request("GET", "/find_user").status_code == 503
+    assert client._session.calls == 3
+    assert client.breaker.state == "closed"
+
+
+def test_unavailable_response_without_retry_after_is_retried(client):
+    client._session = FakeSession(make_response(503), make_response(502), make_response(200))
+
+    assert client.request("GET", "/find_user").status_code == 200
+    assert client._session.calls == 3
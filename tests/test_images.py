@@ -0,0 +1,34 @@
+import os
+
+import pytest
+from apps.main_app.blueprints.renter.images import ImageInfo, ImageManifest, ImageVariants
+from PIL import Image
+
+
+@pytest.fixture
+def image(tmp_path, monkeypatch):
+    image_dir, cache_dir = tmp_path / "img", tmp_path / "cache"
+    image_dir.mkdir()
+    Image.new("RGB", (960, 540), "red").save(image_dir / "1.jpg")
+    monkeypatch.setattr(ImageManifest, "IMAGE_DIR", str(image_dir))
+    monkeypatch.setattr(ImageVariants, "CACHE_DIR", str(cache_dir))
+    return ImageInfo("img/1.jpg", 0, 0.0, "abc")
+
+
+def test_variant_is_generated_once(image):
+    path = ImageVariants.get_path(image, 1, "thumb", "webp")
+
+    with Image.open(path) as variant:
+        assert variant.size == (480, 270)
+    assert os.listdir(ImageVariants.CACHE_DIR) == [os.path.basename(path)]
+
+
+def test_failed_write_leaves_no_file_in_the_cache(image, monkeypatch):
+    def save(self, *args, **kwargs):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(Image.Image, "save", save)
+
+    with pytest.raises(OSError):
+        ImageVariants.get_path(image, 1, "thumb", "jpg")
+    assert os.listdir(ImageVariants.CACHE_DIR) == []
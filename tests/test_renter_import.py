@@ -0,0 +1,43 @@
+import json
+
+import pytest
+from apps.auth.importer import RenterImporter
+from apps.common.hashing import PasswordHasher
+
+CSV = (
+    "email,password,first_name,last_name,phone_number,renter_address,business_sphere\n"
+    "a@example.com,1,Ivan,Petrov,+70000000000,Moscow,Retail\n"
+    "b@example.com,2,Anna,Petrova,+70000000001,Moscow,Retail\n"
+)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    from apps.auth.app import app
+
+    monkeypatch.setenv("SERVICE_TOKEN", "secret")
+    app.config["TESTING"] = True
+    return app.test_client()
+
+
+@pytest.mark.parametrize("headers", [{}, {"X-Service-Token": "wrong"}])
+def test_import_requires_service_token(client, monkeypatch, headers):
+    monkeypatch.setattr(RenterImporter, "run", lambda self, lines: pytest.fail("import must not run"))
+
+    response = client.post("/renters/import", data=CSV, content_type="text/csv", headers=headers)
+
+    assert response.status_code == 401
+
+
+def test_import_hashes_on_the_shared_pool(client, monkeypatch):
+    inserted = []
+    monkeypatch.setattr(PasswordHasher, "hash_many", classmethod(lambda cls, passwords: [p * 2 for p in passwords]))
+    monkeypatch.setattr(RenterImporter, "_get_user_ids", lambda self, email_keys, cursor=None: ())
+    monkeypatch.setattr(RenterImporter, "_insert", lambda self, entries: inserted.extend(entries))
+
+    response = client.post(
+        "/renters/import", data=CSV, content_type="text/csv", headers={"X-Service-Token": "secret"}
+    )
+
+    assert json.loads(response.get_data(as_text=True)) == {"status": 200, "imported": 2, "failed": 0}
+    assert [values["password"] for _, _, values in inserted] == ["11", "22"]
@@ -0,0 +1,85 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+from apps.main_app.blueprints.report.jobs import ReportJobQueue, ReportQueueFullError
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    monkeypatch.setattr(ReportJobQueue, "DB_PATH", str(tmp_path / "jobs.sqlite3"))
+    monkeypatch.setattr(ReportJobQueue, "_schema_ready", False)
+    monkeypatch.setattr(ReportJobQueue, "_pending", 0)
+    monkeypatch.setattr(ReportJobQueue, "HEARTBEAT_INTERVAL", 0.02)
+    monkeypatch.setattr(ReportJobQueue, "LOST_AFTER", 0.5)
+    finish = threading.Event()
+    yield finish
+    finish.set()
+    deadline = time.time() + 5
+    while ReportJobQueue._pending and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def blocking(finish: threading.Event):
+    """Builds a report task that succeeds once ``finish`` is set."""
+    return lambda: "OK" if finish.wait() else ""
+
+
+def wait_for(condition, timeout: float = 5.0) -> None:
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline
+        time.sleep(0.01)
+
+
+def test_job_of_dead_worker_expires_without_waiting_an_hour(queue):
+    job = ReportJobQueue.submit("sales", 2030, 1, blocking(queue))
+    with sqlite3.connect(ReportJobQueue.DB_PATH) as connection:
+        # A worker that died leaves its job behind and stops refreshing the heartbeat.
+        connection.execute(
+            "update report_jobs set owner = 'dead', heartbeat_at = ? where job_id = ?",
+            (time.time() - ReportJobQueue.LOST_AFTER - 1, job.job_id),
+        )
+
+    assert ReportJobQueue.get(job.job_id).status == "failed"
+    assert ReportJobQueue.submit("sales", 2030, 1, lambda: "OK").job_id != job.job_id
+
+
+def test_heartbeat_keeps_long_job_alive(queue):
+    job = ReportJobQueue.submit("sales", 2030, 2, blocking(queue))
+    time.sleep(ReportJobQueue.LOST_AFTER * 2)
+
+    assert ReportJobQueue.get(job.job_id).status == "running"
+    assert ReportJobQueue.submit("sales", 2030, 2, lambda: "OK").job_id == job.job_id
+
+    queue.set()
+    wait_for(lambda: ReportJobQueue.get(job.job_id).status == "done")
+
+
+def test_full_queue_refuses_new_jobs(queue, monkeypatch):
+    monkeypatch.setattr(ReportJobQueue, "MAX_PENDING", 3)
+    jobs = [ReportJobQueue.submit("sales", 2030, month, blocking(queue)) for month in range(1, 4)]
+
+    assert ReportJobQueue.submit("sales", 2030, 1, blocking(queue)).job_id == jobs[0].job_id
+    with pytest.raises(ReportQueueFullError):
+        ReportJobQueue.submit("sales", 2030, 4, blocking(queue))
+
+    queue.set()
+    wait_for(lambda: ReportJobQueue._pending == 0)
+    assert ReportJobQueue.submit("sales", 2030, 4, lambda: "OK").status == "queued"
+
+
+def test_old_job_file_is_upgraded(queue):
+    with sqlite3.connect(ReportJobQueue.DB_PATH) as connection:
+        connection.execute(
+            "create table report_jobs (job_id text primary key, report_type text not null, year integer not null,"
+            " month integer not null, status text not null, message text not null,"
+            " created_at real not null, updated_at real not null)"
+        )
+        connection.execute(
+            "insert into report_jobs values ('old', 'sales', 2030, 5, 'running', '', ?, ?)", (time.time(), time.time())
+        )
+
+    assert ReportJobQueue.get("old").status == "failed"
+    assert ReportJobQueue.submit("sales", 2030, 5, lambda: "OK").job_id != "old"
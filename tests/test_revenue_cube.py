@@ -0,0 +1,79 @@
+from datetime import date
+from decimal import Decimal
+
+import re
+
+import pytest
+from apps.common.signals import order_placed
+from apps.main_app.blueprints.report.cube import RevenueCube
+from apps.main_app.blueprints.report.engine import ReportEngine
+from flask import session
+
+
+@pytest.fixture
+def cube(monkeypatch):
+    monkeypatch.setattr(RevenueCube, "_cells", {})
+    monkeypatch.setattr(RevenueCube, "_renters", {})
+    monkeypatch.setattr(RevenueCube, "_cities", {})
+    monkeypatch.setattr(RevenueCube, "_max_order_id", 0)
+    monkeypatch.setattr(RevenueCube, "_counted_orders", set())
+    monkeypatch.setattr(RevenueCube, "_loaded_at", 0.0)
+    monkeypatch.setattr(RevenueCube, "_ensure_fresh", classmethod(lambda cls: None))
+    return RevenueCube
+
+
+def test_renters_with_the_same_name_are_not_merged(cube):
+    march = date(2030, 3, 1)
+    cube.add_order(1, march, 10, "Petrov Ivan", "Retail", [(1, "г. Омск, ул. Гоголя, 5", Decimal("300"))])
+    cube.add_order(2, march, 11, "Petrov Ivan", "Food", [(2, "г. Омск, ул. Ленина, 1", Decimal("200"))])
+    month = 2030 * 12 + 2
+
+    assert cube.rollup("renter", month, month) == [
+        ("Petrov Ivan", Decimal("300"), 1),
+        ("Petrov Ivan", Decimal("200"), 1),
+    ]
+
+
+def order_row(order_id: int, price: str) -> tuple:
+    return order_id, 2030, 3, 10, "Petrov Ivan", "Retail", 1, "Омск", Decimal(price)
+
+
+def test_order_committed_after_a_higher_one_is_counted_once(main_app, cube, monkeypatch):
+    committed = [order_row(1, "100"), order_row(3, "300")]
+
+    def stream(query, db_config, batch_size=1000):
+        after = int(re.search(r"order_id > (\d+)", query).group(1))
+        return iter([row for row in committed if row[0] > after])
+
+    monkeypatch.setattr(cube, "stream", staticmethod(stream))
+    month = 2030 * 12 + 2
+    with main_app.test_request_context():
+        session["role"] = "manager"
+        cube.refresh(full=True)
+        cube.add_order(
+            4, date(2030, 3, 1), 10, "Petrov Ivan", "Retail", [(1, "г. Омск, ул. Гоголя, 5", Decimal("400"))]
+        )
+        # Order 2 got its ID before order 3 but commits only now, with order 4 of this worker.
+        committed[1:1] = [order_row(2, "200")]
+        committed.append(order_row(4, "400"))
+        cube.refresh()
+        cube.refresh()
+
+    assert cube.rollup("month", month, month) == [("03/2030", Decimal("1000"), 4)]
+
+
+def test_placed_order_is_counted_and_drops_cached_reports(main_app, cube):
+    version = ReportEngine.result_cache.version.get()
+    order_placed.send(
+        main_app,
+        order_id=1,
+        registration_date=date(2030, 3, 1),
+        renter_id=10,
+        renter_name="Petrov Ivan",
+        business_sphere="Retail",
+        rows=[(1, "г. Омск, ул. Гоголя, 5", Decimal("300"))],
+    )
+    month = 2030 * 12 + 2
+
+    assert cube.rollup("city", month, month) == [("Омск", Decimal("300"), 1)]
+    assert ReportEngine.result_cache.version.get() != version
@@ -0,0 +1,58 @@
+import pytest
+from apps.auth.models import AuthManager
+
+USERS = [
+    (1, "renter", "Ivan@Example.com", 1, "Ivan", "Petrov", "+70000000000", "Moscow", "Retail"),
+    (1, "renter", "Ivan@Example.com", 2, "Ivan", "Petrov", "+70000000001", "Moscow", "Retail"),
+    (2, "manager", "man@example.com", None, None, None, None, None, None),
+]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    from apps.auth.app import app
+
+    queries = []
+
+    def stream(query, db_config, batch_size=1000):
+        queries.append(query)
+        yield from USERS
+
+    monkeypatch.setenv("SERVICE_TOKEN", "secret")
+    monkeypatch.setattr(AuthManager, "stream", staticmethod(stream))
+    app.config["TESTING"] = True
+    client = app.test_client()
+    client.queries = queries
+    return client
+
+
+@pytest.mark.parametrize("headers", [{}, {"X-Service-Token": "wrong"}])
+def test_batch_lookup_requires_service_token(client, headers):
+    response = client.post("/users/batch", json={"user_ids": [1]}, headers=headers)
+
+    assert response.status_code == 401
+    assert client.queries == []
+
+
+def test_batch_lookup_is_closed_without_configured_token(client, monkeypatch):
+    monkeypatch.delenv("SERVICE_TOKEN")
+
+    response = client.post("/users/batch", json={"user_ids": [1]}, headers={"X-Service-Token": ""})
+
+    assert response.status_code == 401
+
+
+def test_batch_lookup_streams_users_and_missing(client):
+    response = client.post(
+        "/users/batch",
+        json={"user_ids": [1, 3], "emails": ["MAN@example.com ", "nobody@example.com"]},
+        headers={"X-Service-Token": "secret"},
+    )
+
+    assert response.is_streamed
+    body = response.get_json()
+    assert [user["user_id"] for user in body["users"]] == [1, 2]
+    assert body["users"][0]["renter"]["renter_id"] == 1
+    assert body["users"][1]["renter"] is None
+    assert body["missing"] == {"user_ids": [3], "emails": ["nobody@example.com"]}
+    assert len(client.queries) == 1